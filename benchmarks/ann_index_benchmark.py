@@ -0,0 +1,105 @@
+"""
+ANN index benchmark
+-------------------
+Builds every FAISS index type (flat, IVF-Flat, IVF-PQ, HNSW) over the masked log
+corpus and reports, per build/search setting:
+  recall@k against the flat baseline, query latency (p50/p95, one query at a
+  time), build time and index memory.
+
+Run from the repo root:
+    python -m benchmarks.ann_index_benchmark --k 10 --nprobe 4 16 64 --ef-search 32 64 128
+"""
+
+import argparse
+import random
+import time
+import numpy as np
+
+from src.Rag_pipeline import load_masked_rows, EMBEDDING_MODEL
+from src.embedding_cache import CachedEmbeddings
+from src.ann_index import build_index, apply_search_params, index_memory_bytes
+
+
+def make_queries(rows, n: int, seed: int = 42) -> list:
+    """Natural-language queries built from the fields of randomly chosen rows."""
+    rng = random.Random(seed)
+    queries = []
+    for _, text, _ in rng.sample(rows, min(n, len(rows))):
+        fields = dict(part.split(": ", 1) for part in text.split(" | ") if ": " in part)
+        queries.append(
+            f"{fields.get('LogLevel', '')} logs from {fields.get('Service', '')} "
+            f"about {fields.get('Message', '')} for {fields.get('User', '')}"
+        )
+    return queries
+
+
+def search_all(index, queries: np.ndarray, k: int):
+    """Search one query at a time (like the API does); return ids and per-query ms."""
+    ids, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        _, found = index.search(q.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append(found[0])
+    return np.array(ids), np.array(latencies)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[32, 64, 128])
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--pq-m", type=int, default=48)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    args = parser.parse_args()
+
+    rows = load_masked_rows()
+    embeddings = CachedEmbeddings(model_name=EMBEDDING_MODEL)
+    corpus = np.array(embeddings.embed_documents([text for _, text, _ in rows]), dtype=np.float32)
+    queries = np.array(embeddings.embed_documents(make_queries(rows, args.queries)), dtype=np.float32)
+    print(f"{len(corpus):,} vectors (dim={corpus.shape[1]}), {len(queries)} queries, k={args.k}\n")
+
+    builds = {
+        "flat": {},
+        "ivf_flat": {"nlist": args.nlist},
+        "ivf_pq": {"nlist": args.nlist, "pq_m": args.pq_m},
+        "hnsw": {"hnsw_m": args.hnsw_m},
+    }
+
+    header = f"{'index':<10}{'search param':<16}{'recall@k':>10}{'p50 ms':>9}{'p95 ms':>9}{'build s':>9}{'memory MB':>11}"
+    print(header)
+    print("-" * len(header))
+
+    truth = None
+    for index_type, params in builds.items():
+        start = time.perf_counter()
+        index = build_index(corpus, index_type, **params)
+        build_s = time.perf_counter() - start
+        memory_mb = index_memory_bytes(index) / 1e6
+
+        if index_type.startswith("ivf"):
+            settings = [(f"nprobe={n}", {"nprobe": n}) for n in args.nprobe]
+        elif index_type == "hnsw":
+            settings = [(f"efSearch={e}", {"ef_search": e}) for e in args.ef_search]
+        else:
+            settings = [("exact", {})]
+
+        for label, knobs in settings:
+            apply_search_params(index, **knobs)
+            found, latencies = search_all(index, queries, args.k)
+            if truth is None:
+                truth = found
+            print(f"{index_type:<10}{label:<16}{recall_at_k(found, truth):>10.3f}"
+                  f"{np.percentile(latencies, 50):>9.3f}{np.percentile(latencies, 95):>9.3f}"
+                  f"{build_s:>9.2f}{memory_mb:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Local stand-ins for the chatbot's upstream APIs
+-----------------------------------------------
+One FastAPI app that imitates, on a single port:
+  Groq (OpenAI-compatible)  POST /openai/v1/chat/completions  (plain, streaming, tool calls)
+  Tavily                    POST /tavily/search
+  GitHub code search        GET  /github/search/code
+  Open-Meteo forecast       GET  /open-meteo/v1/forecast
+  Open-Meteo geocoding      GET  /geocoding/v1/search
+
+Each service has a log-normal latency (median ms, sigma) and an error rate
+(errors return 500, or 429 with Retry-After for the LLM). Streaming responses
+also pace tokens with --token-ms.
+
+Run from the repo root, then start the bot with the printed environment:
+    python -m benchmarks.fake_services --port 9100 --latency llm=400:0.5 tavily=800 --error-rate llm=0.01
+    eval "$(python -m benchmarks.fake_services --port 9100 --print-env)"
+    uvicorn bot:app --port 8000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Default (median ms, sigma) per service
+DEFAULT_LATENCY = {
+    "llm": (350.0, 0.4),
+    "tavily": (700.0, 0.5),
+    "github": (400.0, 0.5),
+    "weather": (150.0, 0.3),
+    "geocode": (120.0, 0.3),
+}
+DEFAULT_ERROR_RATE = {name: 0.0 for name in DEFAULT_LATENCY}
+
+# Tool name → intent label, for answering the classify-mode routing prompt
+CLASSIFY_LABELS = {
+    "get_weather": "Weather",
+    "web_search": "Tavily",
+    "github_code_search": "GitHub",
+    "log_analytics": "Analytics",
+    "search_logs": "RAG",
+}
+
+FAKE_ANSWER = (
+    "Based on the logs, ServiceA reported intermittent database timeouts between 08:41 and 08:43. "
+    "Most affected requests completed after a retry; no data loss was recorded."
+)
+
+
+def parse_overrides(items: list, cast) -> dict:
+    """['llm=400:0.5', 'tavily=800'] → {'llm': cast('400:0.5'), ...}"""
+    out = {}
+    for item in items or []:
+        name, _, value = item.partition("=")
+        if name not in DEFAULT_LATENCY:
+            raise SystemExit(f"Unknown service '{name}', expected one of {list(DEFAULT_LATENCY)}")
+        out[name] = cast(value)
+    return out
+
+
+def _latency(value: str) -> tuple:
+    median, _, sigma = value.partition(":")
+    return float(median), float(sigma) if sigma else None
+
+
+def create_app(latency: dict = None, error_rate: dict = None, token_ms: float = 5.0, seed: int = None) -> FastAPI:
+    latency = {
+        name: (median, DEFAULT_LATENCY[name][1] if sigma is None else sigma)
+        for name, (median, sigma) in {**DEFAULT_LATENCY, **(latency or {})}.items()
+    }
+    error_rate = {**DEFAULT_ERROR_RATE, **(error_rate or {})}
+    rng = random.Random(seed)
+    stats = {name: {"requests": 0, "errors": 0} for name in DEFAULT_LATENCY}
+    app = FastAPI(title="Fake upstream services")
+
+    async def simulate(service: str):
+        """Sleep for a sampled latency; return an error response or None."""
+        stats[service]["requests"] += 1
+        median, sigma = latency[service]
+        await asyncio.sleep(rng.lognormvariate(0, sigma) * median / 1000)
+        if rng.random() < error_rate[service]:
+            stats[service]["errors"] += 1
+            if service == "llm":
+                return JSONResponse(status_code=429, content={"error": {"message": "rate limited"}},
+                                    headers={"Retry-After": "1"})
+            return JSONResponse(status_code=500, content={"error": f"fake {service} failure"})
+        return None
+
+    # ------------------------------------------------------------------
+    # Groq / OpenAI chat completions
+    # ------------------------------------------------------------------
+    def tool_call_for(prompt: str) -> tuple:
+        text = prompt.lower()
+        if "weather" in text or "temperature" in text:
+            return "get_weather", {"city": "Chennai"}
+        if "code" in text or "script" in text or "github" in text:
+            return "github_code_search", {"query": prompt[:60], "language": "python"}
+        if "how many" in text or "p95" in text or "average" in text:
+            return "log_analytics", {"question": prompt}
+        if "log" in text or "request" in text:
+            return "search_logs", {"query": prompt}
+        return "web_search", {"query": prompt[:80]}
+
+    def completion_answer(body: dict) -> str:
+        prompt = body["messages"][-1]["content"]
+        if "Return only the category name" in prompt:
+            query = prompt.split("User Query:")[-1].split("Return only")[0].strip()
+            return CLASSIFY_LABELS[tool_call_for(query)[0]]
+        return FAKE_ANSWER
+
+    def usage(prompt_text: str, completion_text: str) -> dict:
+        prompt_tokens = len(prompt_text) // 4
+        completion_tokens = len(completion_text) // 4
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        error = await simulate("llm")
+        if error is not None:
+            return error
+
+        created = int(time.time())
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        prompt_text = " ".join(m.get("content") or "" for m in body["messages"])
+
+        if body.get("tools"):
+            name, args = tool_call_for(body["messages"][-1]["content"])
+            message = {"role": "assistant", "content": None, "tool_calls": [{
+                "id": f"call_{uuid.uuid4().hex[:8]}", "type": "function",
+                "function": {"name": name, "arguments": json.dumps(args)},
+            }]}
+            return {"id": completion_id, "object": "chat.completion", "created": created, "model": body["model"],
+                    "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls"}],
+                    "usage": usage(prompt_text, json.dumps(args))}
+
+        answer = completion_answer(body)
+        if not body.get("stream"):
+            return {"id": completion_id, "object": "chat.completion", "created": created, "model": body["model"],
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": answer},
+                                 "finish_reason": "stop"}],
+                    "usage": usage(prompt_text, answer)}
+
+        async def stream():
+            base = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": body["model"]}
+            for word in answer.split(" "):
+                chunk = {**base, "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(token_ms / 1000)
+            final = {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                     "x_groq": {"id": completion_id, "usage": usage(prompt_text, answer)}}
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    # ------------------------------------------------------------------
+    # Tools
+    # ------------------------------------------------------------------
+    @app.post("/tavily/search")
+    async def tavily_search(request: Request):
+        body = await request.json()
+        error = await simulate("tavily")
+        if error is not None:
+            return error
+        results = [{"title": f"Result {i} for {body.get('query', '')}", "url": f"https://example.com/{i}",
+                    "content": "Fake search snippet. " * 8} for i in range(1, body.get("max_results", 3) + 1)]
+        return {"query": body.get("query"), "results": results}
+
+    @app.get("/github/search/code")
+    async def github_code_search(q: str = "", per_page: int = 3):
+        error = await simulate("github")
+        if error is not None:
+            return error
+        items = [{"path": f"src/example_{i}.py", "html_url": f"https://github.com/example/repo/blob/main/{i}.py",
+                  "repository": {"full_name": "example/repo"}} for i in range(per_page)]
+        return {"total_count": per_page, "items": items}
+
+    @app.get("/open-meteo/v1/forecast")
+    async def forecast(latitude: float = 0.0, longitude: float = 0.0):
+        error = await simulate("weather")
+        if error is not None:
+            return error
+        return {"latitude": latitude, "longitude": longitude,
+                "current_weather": {"temperature": round(20 + rng.random() * 15, 1),
+                                    "windspeed": round(rng.random() * 20, 1)}}
+
+    @app.get("/geocoding/v1/search")
+    async def geocode(name: str = ""):
+        error = await simulate("geocode")
+        if error is not None:
+            return error
+        return {"results": [{"name": name.title(), "country": "India", "latitude": 13.08, "longitude": 80.27}]}
+
+    @app.get("/stats")
+    def service_stats():
+        return stats
+
+    return app
+
+
+def env_for(base_url: str) -> dict:
+    """Environment that points bot.py at the fake services."""
+    return {
+        "GROQ_BASE_URL": base_url,
+        "GROQ_API_KEY": "fake-key",
+        "TAVILY_API_KEY": "fake-key",
+        "TAVILY_URL": f"{base_url}/tavily/search",
+        "GITHUB_CODE_SEARCH_URL": f"{base_url}/github/search/code",
+        "OPEN_METEO_URL": f"{base_url}/open-meteo/v1/forecast",
+        "OPEN_METEO_GEOCODING_URL": f"{base_url}/geocoding/v1/search",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", nargs="*", metavar="SERVICE=MEDIAN_MS[:SIGMA]",
+                        help=f"services: {', '.join(DEFAULT_LATENCY)}")
+    parser.add_argument("--error-rate", nargs="*", metavar="SERVICE=RATE")
+    parser.add_argument("--token-ms", type=float, default=5.0, help="delay between streamed tokens")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--print-env", action="store_true", help="print export lines for bot.py and exit")
+    args = parser.parse_args()
+
+    if args.print_env:
+        for key, value in env_for(f"http://{args.host}:{args.port}").items():
+            print(f"export {key}={value}")
+        return
+
+    import uvicorn
+    app = create_app(parse_overrides(args.latency, _latency), parse_overrides(args.error_rate, float),
+                     args.token_ms, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
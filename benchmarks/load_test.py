@@ -0,0 +1,213 @@
+"""
+/chat load driver
+-----------------
+Replays a query mix against a running bot.py at fixed concurrency and reports
+throughput (QPS), end-to-end latency (p50/p95/p99), status codes and a
+per-stage breakdown. Stage means come from the bot's /metrics histograms
+(scraped before and after the run), or from the `done` event timings with
+--stream, which also reports time to first token.
+
+Typical offline run (see benchmarks/fake_services.py):
+    python -m benchmarks.fake_services --port 9100 &
+    eval "$(python -m benchmarks.fake_services --port 9100 --print-env)" && uvicorn bot:app --port 8000 &
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --concurrency 16 --requests 500 --out run.json
+    python -m benchmarks.load_test ... --compare run.json    # deltas against a previous run
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from collections import Counter, defaultdict
+
+import httpx
+import numpy as np
+
+# Mix across routes; the repeats make some answer-cache hits, as in real traffic
+DEFAULT_QUERIES = [
+    "show the error logs for ServiceA",
+    "what errors did User17 encounter",
+    "find the log entry for request id 6743",
+    "which requests took the longest time",
+    "summarize the warning logs for ServiceB",
+    "how many errors in ServiceA today",
+    "p95 TimeTaken per service",
+    "what is the weather in Chennai",
+    "latest news about kubernetes",
+    "sample python code for retry with exponential backoff",
+]
+
+# Histograms whose per-label means make up the stage breakdown
+STAGE_METRICS = (
+    "chatbot_node_latency_seconds",
+    "chatbot_tool_latency_seconds",
+    "chatbot_retriever_latency_seconds",
+    "chatbot_llm_latency_seconds",
+)
+_SAMPLE_RE = re.compile(r"^(\w+)_(sum|count)\{([^}]*)\} ([0-9.eE+-]+)$")
+
+
+def scrape_stage_totals(text: str) -> dict:
+    """{(metric, labels): [sum_seconds, count]} from a Prometheus text page."""
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for line in text.splitlines():
+        match = _SAMPLE_RE.match(line)
+        if match and match.group(1) in STAGE_METRICS:
+            metric, kind, labels, value = match.groups()
+            totals[(metric, labels)][0 if kind == "sum" else 1] += float(value)
+    return totals
+
+
+def stage_breakdown(before: dict, after: dict) -> dict:
+    """Mean ms per stage over the run (after - before)."""
+    out = {}
+    for key, (total, count) in after.items():
+        prev_total, prev_count = before.get(key, (0.0, 0.0))
+        calls = count - prev_count
+        if calls > 0:
+            metric, labels = key
+            name = metric.replace("chatbot_", "").replace("_latency_seconds", "")
+            out[f"{name}{{{labels}}}"] = {"calls": int(calls), "mean_ms": round((total - prev_total) / calls * 1000, 2)}
+    return out
+
+
+async def run_load(url: str, queries: list, concurrency: int, total: int, stream: bool, timeout: float, seed: int):
+    rng = random.Random(seed)
+    plan = [rng.choice(queries) for _ in range(total)]
+    latencies, ttfts, statuses = [], [], Counter()
+    stage_ms = defaultdict(list)
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout) as client:
+        async def one(query: str):
+            start = time.perf_counter()
+            try:
+                if stream:
+                    first = None
+                    async with client.stream("GET", "/chat/stream", params={"query": query}) as resp:
+                        event = None
+                        async for line in resp.aiter_lines():
+                            if line.startswith("event: "):
+                                event = line[7:]
+                            elif line.startswith("data: "):
+                                if event == "token" and first is None:
+                                    first = time.perf_counter()
+                                elif event == "done":
+                                    for stage, ms in json.loads(line[6:]).get("timings", {}).items():
+                                        stage_ms[stage].append(ms)
+                                elif event == "error":
+                                    status = json.loads(line[6:]).get("status", "stream_error")
+                                    statuses[status] += 1
+                                    return
+                    if first is not None:
+                        ttfts.append((first - start) * 1000)
+                    statuses[resp.status_code] += 1
+                else:
+                    resp = await client.get("/chat", params={"query": query})
+                    statuses[resp.status_code] += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+
+        queue = asyncio.Queue()
+        for query in plan:
+            queue.put_nowait(query)
+
+        async def worker():
+            while not queue.empty():
+                await one(queue.get_nowait())
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    return elapsed, latencies, ttfts, statuses, stage_ms
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    arr = np.asarray(values)
+    return {f"p{p}": round(float(np.percentile(arr, p)), 2) for p in (50, 95, 99)} | {"mean": round(float(arr.mean()), 2)}
+
+
+def print_report(report: dict, previous: dict = None):
+    def delta(key, sub=None):
+        if not previous:
+            return ""
+        old = previous.get(key, {}) if sub else previous.get(key)
+        new = report[key][sub] if sub else report[key]
+        old = old.get(sub) if sub else old
+        return f"  ({(new - old) / old:+.1%})" if old else ""
+
+    print(f"\n{report['requests']} requests, concurrency {report['concurrency']}, "
+          f"{'stream' if report['stream'] else 'chat'} mode, {report['elapsed_s']:.2f}s")
+    print(f"QPS: {report['qps']:.2f}{delta('qps')}")
+    for p in ("p50", "p95", "p99"):
+        if p in report["latency_ms"]:
+            print(f"latency {p}: {report['latency_ms'][p]:.1f} ms{delta('latency_ms', p)}")
+    if report["ttft_ms"]:
+        print(f"time to first token p50/p95: {report['ttft_ms']['p50']:.1f} / {report['ttft_ms']['p95']:.1f} ms")
+    print(f"status codes: {report['statuses']}")
+
+    print("\nstage breakdown (mean ms):")
+    for stage, info in sorted(report["stages"].items()):
+        print(f"  {stage:<60}{info['mean_ms']:>10.2f}  calls={info['calls']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--queries", help="file with one query per line (default: built-in mix)")
+    parser.add_argument("--stream", action="store_true", help="use /chat/stream and report time to first token")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write the report as JSON")
+    parser.add_argument("--compare", help="previous JSON report to show deltas against")
+    args = parser.parse_args()
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    before = scrape_stage_totals(httpx.get(f"{args.url}/metrics", timeout=10).text)
+    elapsed, latencies, ttfts, statuses, stage_ms = asyncio.run(
+        run_load(args.url, queries, args.concurrency, args.requests, args.stream, args.timeout, args.seed)
+    )
+    after = scrape_stage_totals(httpx.get(f"{args.url}/metrics", timeout=10).text)
+
+    stages = stage_breakdown(before, after)
+    if args.stream:
+        stages.update({f"timings[{k}]": {"calls": len(v), "mean_ms": round(float(np.mean(v)), 2)}
+                       for k, v in stage_ms.items()})
+
+    report = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "stream": args.stream,
+        "elapsed_s": round(elapsed, 3),
+        "qps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": percentiles(latencies),
+        "ttft_ms": percentiles(ttfts),
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "stages": stages,
+    }
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+    print_report(report, previous)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
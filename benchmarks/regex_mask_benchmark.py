@@ -0,0 +1,78 @@
+"""
+Regex masking micro-benchmark
+-----------------------------
+Compares the legacy per-pattern masking loop (search + sub for each of the five
+patterns) with RegexMaskEngine (one combined scan per cell, priority-ordered
+masking only where it matches), per cell and in bulk, on the raw log export.
+
+Run from the repo root:
+    python -m benchmarks.regex_mask_benchmark [--repeat 3]
+"""
+
+import argparse
+import re
+import time
+import pandas as pd
+
+from config.path_config import RAW_FILES
+from src.regex_masker import RegexMaskEngine, REGEX_PATTERNS
+
+
+def legacy_regex_mask(text: str, patterns: dict) -> str:
+    """The pre-engine implementation of PIIMasker.regex_mask."""
+    masked_text = text
+    for pii_type, pattern in patterns.items():
+        if pattern.search(masked_text):
+            masked_text = pattern.sub(f"[{pii_type.upper()}_MASKED]", masked_text)
+    return masked_text
+
+
+def load_cells(path: str) -> list:
+    df = pd.read_csv(path)
+    return [str(v) for col in df.columns for v in df[col].tolist()]
+
+
+def timed(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", default=RAW_FILES["logdata"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cells = load_cells(args.file)
+    total_mb = sum(len(c) for c in cells) / 1e6
+    legacy_patterns = {
+        name: re.compile(p.replace("(?i:", "(?:"), re.IGNORECASE if name == "pan" else 0)
+        for name, p in REGEX_PATTERNS.items()
+    }
+    engine = RegexMaskEngine()
+
+    runs = {
+        "legacy per-cell": lambda: [legacy_regex_mask(c, legacy_patterns) for c in cells],
+        "engine per-cell": lambda: [engine.mask(c) for c in cells],
+        "engine bulk": lambda: engine.mask_many(cells),
+    }
+
+    print(f"{len(cells):,} cells, {total_mb:.2f} MB from {args.file}\n")
+    print(f"{'implementation':<18}{'seconds':>10}{'cells/s':>14}{'MB/s':>10}")
+    baseline = None
+    for name, fn in runs.items():
+        seconds, output = timed(fn, args.repeat)
+        if baseline is None:
+            baseline = output
+        print(f"{name:<18}{seconds:>10.4f}{len(cells) / seconds:>14,.0f}{total_mb / seconds:>10.2f}")
+        mismatches = sum(a != b for a, b in zip(baseline, output))
+        if mismatches:
+            print(f"  ⚠️ {mismatches} cells differ from the legacy output")
+
+
+if __name__ == "__main__":
+    main()
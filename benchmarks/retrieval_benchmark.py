@@ -0,0 +1,228 @@
+"""
+RAG retrieval benchmark
+-----------------------
+Builds the retriever the way Rag_pipeline does, for every combination of
+embedding model and chunking setting, and evaluates it on labelled queries
+generated from artifacts/FINAL_DATA:
+  request_id     "find the log entry for request id 6743"   → rows with that RequestID
+  service_level  "ERROR logs from ServiceA"                  → rows with that service and level
+  message        "File I/O for User17 on ServiceA"            → rows with that message, user and service
+
+Per (model, chunking, retriever mode, k) it reports recall@k, MRR, query
+embedding and search latency (p50/p95), build time, peak RSS and on-disk
+index size. Each build runs in its own subprocess so peak RSS is per setting,
+and uses a fresh embedding cache so build time includes encoding.
+
+Run from the repo root:
+    python -m benchmarks.retrieval_benchmark --chunking 1000:200 200:50 100:20 --k 3 5 10
+    python -m benchmarks.retrieval_benchmark --models sentence-transformers/all-MiniLM-L6-v2 \\
+        sentence-transformers/paraphrase-MiniLM-L3-v2 --max-rows 3000 --queries 150
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from src.Rag_pipeline import load_masked_rows, chunk_rows, EMBEDDING_MODEL, CHUNK_SIZE, CHUNK_OVERLAP
+from src.embedding_cache import CachedEmbeddings
+from src.ann_index import INDEX_TYPE, make_vector_store
+from src.hybrid_retriever import HybridRetriever, build_lexical_index, TOP_K_RETRIEVAL
+from src.metadata_filter import MetadataIndex
+
+QUERY_KINDS = ("request_id", "service_level", "message")
+
+
+# --------------------------------------------------------------------------
+# Labelled queries
+# --------------------------------------------------------------------------
+def row_fields(text: str) -> dict:
+    return dict(part.split(": ", 1) for part in text.split(" | ") if ": " in part)
+
+
+def make_labelled_queries(rows, n: int, seed: int = 42) -> list:
+    """(kind, query, relevant row IDs) spread evenly over QUERY_KINDS."""
+    groups = defaultdict(set)
+    for row_id, text, _ in rows:
+        f = row_fields(text)
+        groups[("request_id", f.get("RequestID"))].add(row_id)
+        groups[("service_level", f.get("Service"), f.get("LogLevel"))].add(row_id)
+        groups[("message", f.get("Message"), f.get("User"), f.get("Service"))].add(row_id)
+
+    rng = random.Random(seed)
+    queries = []
+    for i, (_, text, _) in enumerate(rng.sample(rows, min(n, len(rows)))):
+        f = row_fields(text)
+        kind = QUERY_KINDS[i % len(QUERY_KINDS)]
+        if kind == "request_id":
+            query, key = f"find the log entry for request id {f.get('RequestID')}", (kind, f.get("RequestID"))
+        elif kind == "service_level":
+            query = f"{f.get('LogLevel')} logs from {f.get('Service')}"
+            key = (kind, f.get("Service"), f.get("LogLevel"))
+        else:
+            query = f"{f.get('Message')} for {f.get('User')} on {f.get('Service')}"
+            key = (kind, f.get("Message"), f.get("User"), f.get("Service"))
+        queries.append((kind, query, groups[key]))
+    return queries
+
+
+def score(ranked_rows: list, relevant: set, k: int) -> tuple:
+    """(recall@k, reciprocal rank); recall is capped by k for large relevant sets."""
+    top = ranked_rows[:k]
+    recall = len(set(top) & relevant) / min(k, len(relevant))
+    rank = next((i for i, row_id in enumerate(top, 1) if row_id in relevant), None)
+    return recall, (1.0 / rank if rank else 0.0)
+
+
+# --------------------------------------------------------------------------
+# One build + evaluation (runs in a subprocess)
+# --------------------------------------------------------------------------
+def folder_bytes(folder: str) -> int:
+    return sum(os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder))
+
+
+def run_setting(config: dict) -> list:
+    """Build the retriever for one (model, chunking) setting and evaluate it for every k."""
+    rows = load_masked_rows()
+    if config["max_rows"]:
+        rows = random.Random(config["seed"]).sample(rows, min(config["max_rows"], len(rows)))
+    queries = make_labelled_queries(rows, config["queries"], config["seed"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        embeddings = CachedEmbeddings(model_name=config["model"], cache_path=os.path.join(tmp, "cache.sqlite"))
+
+        start = time.perf_counter()
+        splitter = RecursiveCharacterTextSplitter(chunk_size=config["chunk_size"],
+                                                  chunk_overlap=config["chunk_overlap"])
+        texts, metadatas, ids = chunk_rows(rows, splitter)
+        vectors = embeddings.embed_documents(texts)
+        vectorstore = make_vector_store(embeddings, vectors, texts, metadatas, ids, index_type=config["index_type"])
+        lexical = build_lexical_index(vectorstore)
+        metadata = MetadataIndex(vectorstore)
+        build_s = time.perf_counter() - start
+
+        index_dir = os.path.join(tmp, "index")
+        vectorstore.save_local(index_dir)
+        lexical.save(index_dir)
+        disk_mb = folder_bytes(index_dir) / 1e6
+
+        # Query embedding latency is the same for every mode and k
+        query_vectors, embed_ms = [], []
+        for _, query, _ in queries:
+            start = time.perf_counter()
+            query_vectors.append(embeddings.embed_query(query))
+            embed_ms.append((time.perf_counter() - start) * 1000)
+
+        results = []
+        for mode in config["modes"]:
+            for k in config["ks"]:
+                if mode == "hybrid":
+                    retriever = HybridRetriever(vectorstore, lexical, metadata, k=k)
+                else:
+                    retriever = HybridRetriever(vectorstore, k=k, fetch_k=k)
+
+                per_kind, search_ms = defaultdict(list), []
+                for (kind, query, relevant), vector in zip(queries, query_vectors):
+                    start = time.perf_counter()
+                    docs = retriever.invoke(query, vector)
+                    search_ms.append((time.perf_counter() - start) * 1000)
+                    # Chunks of one row count once, at their best rank
+                    ranked_rows = list(dict.fromkeys(doc.metadata["row_id"] for doc in docs))
+                    per_kind[kind].append(score(ranked_rows, relevant, k))
+
+                scores = [s for kind_scores in per_kind.values() for s in kind_scores]
+                results.append({
+                    "mode": mode, "k": k,
+                    "recall": float(np.mean([r for r, _ in scores])),
+                    "mrr": float(np.mean([rr for _, rr in scores])),
+                    "recall_by_kind": {kind: float(np.mean([r for r, _ in s])) for kind, s in per_kind.items()},
+                    "embed_p50_ms": float(np.percentile(embed_ms, 50)),
+                    "search_p50_ms": float(np.percentile(search_ms, 50)),
+                    "search_p95_ms": float(np.percentile(search_ms, 95)),
+                })
+
+    # ru_maxrss is in KB on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    for result in results:
+        result.update(chunks=len(texts), build_s=build_s, disk_mb=disk_mb, peak_rss_mb=peak_rss_mb)
+    return results
+
+
+def run_in_subprocess(config: dict) -> list:
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.retrieval_benchmark", "--worker", json.dumps(config)],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Benchmark worker failed for {config['model']} "
+                           f"{config['chunk_size']}:{config['chunk_overlap']}:\n{proc.stderr[-2000:]}")
+    # The result is the last stdout line; anything before it is library output
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def parse_chunking(value: str) -> tuple:
+    size, _, overlap = value.partition(":")
+    return int(size), int(overlap or 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=[EMBEDDING_MODEL])
+    parser.add_argument("--chunking", nargs="+", type=parse_chunking, default=[(CHUNK_SIZE, CHUNK_OVERLAP)],
+                        metavar="SIZE:OVERLAP")
+    parser.add_argument("--k", type=int, nargs="+", default=[TOP_K_RETRIEVAL, 5, 10])
+    parser.add_argument("--modes", nargs="+", choices=["vector", "hybrid"], default=["vector", "hybrid"])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--max-rows", type=int, default=None, help="index a random sample of rows")
+    parser.add_argument("--index-type", default=INDEX_TYPE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="also write all results as JSON")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_setting(json.loads(args.worker))))
+        return
+
+    header = (f"{'model':<32}{'chunking':>10}{'chunks':>8}{'mode':>8}{'k':>4}{'recall@k':>10}{'MRR':>7}"
+              f"{'embed p50':>11}{'search p50':>12}{'search p95':>12}{'build s':>9}{'RSS MB':>9}{'disk MB':>9}")
+    print(header)
+    print("-" * len(header))
+
+    all_results = []
+    for model in args.models:
+        for chunk_size, chunk_overlap in args.chunking:
+            config = {
+                "model": model, "chunk_size": chunk_size, "chunk_overlap": chunk_overlap,
+                "ks": args.k, "modes": args.modes, "queries": args.queries, "max_rows": args.max_rows,
+                "index_type": args.index_type, "seed": args.seed,
+            }
+            for r in run_in_subprocess(config):
+                all_results.append({**config, **r})
+                print(f"{model.split('/')[-1][:31]:<32}{f'{chunk_size}:{chunk_overlap}':>10}{r['chunks']:>8}"
+                      f"{r['mode']:>8}{r['k']:>4}{r['recall']:>10.3f}{r['mrr']:>7.3f}"
+                      f"{r['embed_p50_ms']:>11.2f}{r['search_p50_ms']:>12.3f}{r['search_p95_ms']:>12.3f}"
+                      f"{r['build_s']:>9.1f}{r['peak_rss_mb']:>9.0f}{r['disk_mb']:>9.1f}")
+
+    print("\nrecall@k by query kind:")
+    for r in all_results:
+        kinds = "  ".join(f"{kind}={value:.3f}" for kind, value in r["recall_by_kind"].items())
+        print(f"  {r['model'].split('/')[-1]} {r['chunk_size']}:{r['chunk_overlap']} {r['mode']} k={r['k']}: {kinds}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(all_results, f, indent=2)
+        print(f"\nResults written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,52 @@
+import os
+import json
 import time
 import uuid
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Query, Request
-from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from starlette.background import BackgroundTask
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from src.chatbot import get_answer_async   
-from src.logger import get_logger          
+from src import chatbot
+from src.chatbot import answer_async, admit_stream, stream_answer_async, answer_cache, feedback_store
+from src.feedback_store import UnknownAnswerError
+from src.MCP_tools import close_http_client, tool_cache
+from src.admission import OverloadedError, DeadlineExceeded, admission_snapshot
+from src.metrics import HTTP_LATENCY
+from src.logger import get_logger, set_request_id, reset_request_id
 load_dotenv()
 
 logger = get_logger(__name__)
 
+# Load models in the background and serve /health immediately (readiness via /ready)
+BACKGROUND_STARTUP = os.getenv("BACKGROUND_STARTUP", "false").lower() in ("1", "true", "yes")
+
+# -------------------------------------------------------------------
+# ✅ Lifespan: load + warm up heavy resources once, release on shutdown
+# -------------------------------------------------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup_task = chatbot.startup_task()
+    await feedback_store.start()
+    if not BACKGROUND_STARTUP:
+        await startup_task
+    logger.info(f"🚦 Startup timings (ms): {chatbot.startup_state['timings']}")
+    yield
+    if not startup_task.done():
+        await startup_task
+    await feedback_store.close()
+    await close_http_client()
+
+
 app = FastAPI(
     title="Log Summarization & Insights Chatbot",
     version="1.0",
-    description="Production-ready FastAPI service for System Engineer chatbot (LangGraph + MCP + RAG)."
+    description="Production-ready FastAPI service for System Engineer chatbot (LangGraph + MCP + RAG).",
+    lifespan=lifespan,
 )
 
 # -------------------------------------------------------------------
@@ -32,21 +65,35 @@ app.add_middleware(
 # -------------------------------------------------------------------
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    request_id = str(uuid.uuid4())
+    # Honour an upstream request ID (load balancer, CLI) so logs can be joined across hops;
+    # every log line written while handling the request carries it (src.logger)
+    request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
+    token = set_request_id(request_id)
     start_time = time.time()
 
-    logger.info(f"➡️ [{request_id}] {request.method} {request.url}")
+    logger.info(f"➡️ {request.method} {request.url}")
 
     try:
         response = await call_next(request)
 
+        duration = round(time.time() - start_time, 3)
+        logger.info(f"✅ Completed in {duration}s (status={response.status_code})")
+
     except Exception as exc:
-        logger.error(f"❌ [{request_id}] Exception during request: {exc}")
+        logger.error(f"❌ Exception during request: {exc}")
         raise exc
 
-    duration = round(time.time() - start_time, 3)
-    logger.info(f"✅ [{request_id}] Completed in {duration}s (status={response.status_code})")
+    finally:
+        reset_request_id(token)
 
+    # Label by route template (not raw URL) to keep series cardinality bounded;
+    # for /chat/stream this is time until the stream starts
+    route = request.scope.get("route")
+    HTTP_LATENCY.labels(
+        method=request.method, path=getattr(route, "path", "unmatched"), status=response.status_code
+    ).observe(time.time() - start_time)
+
+    response.headers["X-Request-ID"] = request_id
     return response
 
 # -------------------------------------------------------------------
@@ -63,14 +110,114 @@ def root():
 @app.get("/chat")
 async def chat(query: str = Query(..., description="User query to chatbot")):
     try:
-        response = await get_answer_async(query)
+        answer = await answer_async(query)
         logger.info(f"✅ Query processed successfully for: {query[:50]}")
-        return {"query": query, "response": response}
-    
+        return {"query": query, "response": answer["result"], "answer_id": answer["answer_id"]}
+
+    except (OverloadedError, DeadlineExceeded):
+        # Turned into 429/503/504 by the handlers below
+        raise
     except Exception as e:
         logger.error(f"❌ Error processing query: {e}")
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+# -------------------------------------------------------------------
+# ✅ Streaming Chat Endpoint (Server-Sent Events)
+# -------------------------------------------------------------------
+@app.get("/chat/stream")
+async def chat_stream(query: str = Query(..., description="User query to chatbot")):
+    """
+    Stream the answer as SSE: one `meta` event (route/source), `token` events
+    as the LLM produces text, then a `done` event with per-stage timings and
+    the answer ID.
+    """
+    # Admit before the 200 goes out, so shedding is a real 429/503 with Retry-After
+    admission = await admit_stream()
+
+    async def event_source():
+        async for event, data in stream_answer_async(query, admission):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        logger.info(f"✅ Streamed response for: {query[:50]}")
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Frees the slot if the stream never started (normally a no-op by now)
+        background=BackgroundTask(admission.aclose),
+    )
+
+# -------------------------------------------------------------------
+# ✅ Feedback Endpoint
+# -------------------------------------------------------------------
+class FeedbackRequest(BaseModel):
+    answer_id: str
+    rating: int = Field(..., ge=1, le=5)
+    comment: str = Field("", max_length=2000)
+
+
+@app.post("/feedback", status_code=202)
+async def submit_feedback(feedback: FeedbackRequest):
+    """Rate an answer by the answer_id returned from /chat; written to disk in batches."""
+    try:
+        feedback_store.record(feedback.answer_id, feedback.rating, feedback.comment)
+    except UnknownAnswerError:
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired answer_id"})
+    return {"status": "accepted"}
+
+
+@app.get("/feedback/stats")
+def feedback_stats():
+    """Ratings recorded, written and pending in the feedback buffer."""
+    return feedback_store.snapshot()
+
+# -------------------------------------------------------------------
+# ✅ Routing Stats Endpoint
+# -------------------------------------------------------------------
+@app.get("/router/stats")
+def router_stats():
+    """Embedding vs LLM routing decisions since startup."""
+    if chatbot.router is None:
+        return JSONResponse(status_code=503, content={"error": "Router not loaded yet"})
+    return chatbot.router.routing_stats()
+
+# -------------------------------------------------------------------
+# ✅ Answer Cache Stats Endpoint
+# -------------------------------------------------------------------
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters and size of the answer and tool-result caches."""
+    return {"answers": answer_cache.snapshot(), "tools": tool_cache.snapshot()}
+
+# -------------------------------------------------------------------
+# ✅ RAG Context Budget Stats Endpoint
+# -------------------------------------------------------------------
+@app.get("/context/stats")
+def context_stats():
+    """Chunks deduplicated and prompt tokens saved by the context budgeter."""
+    if chatbot.context_budgeter is None:
+        return {"enabled": False}
+    return {"enabled": True, **chatbot.context_budgeter.snapshot()}
+
+# -------------------------------------------------------------------
+# ✅ Admission Control Stats Endpoint
+# -------------------------------------------------------------------
+@app.get("/admission/stats")
+def admission_stats():
+    """In-flight calls, queue depth and shed counts per downstream limiter, plus query batching."""
+    batchers = {"query_embedding": chatbot.query_embedder.snapshot()}
+    if getattr(chatbot.retriever, "batcher", None) is not None:
+        batchers["retrieval"] = chatbot.retriever.batcher.snapshot()
+    return {**admission_snapshot(), "batchers": batchers}
+
+# -------------------------------------------------------------------
+# ✅ Prometheus Metrics Endpoint
+# -------------------------------------------------------------------
+@app.get("/metrics")
+def metrics():
+    """Latency histograms, error/route/token counters and admission gauges."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 # -------------------------------------------------------------------
 # ✅ Health Check Endpoint
 # -------------------------------------------------------------------
@@ -80,6 +227,41 @@ def health_check():
     logger.info("Health check OK.")
     return {"status": "ok", "service": "chatbot-api"}
 
+# -------------------------------------------------------------------
+# ✅ Readiness Probe
+# -------------------------------------------------------------------
+@app.get("/ready")
+def readiness_check():
+    """Passes only once the retriever and LLM client are loaded and warmed up."""
+    state = chatbot.startup_state
+    body = {
+        "ready": chatbot.is_ready(),
+        "retriever": chatbot.retriever is not None,
+        "llm_client": chatbot.client is not None,
+        "warmed": state["warmed"],
+        "errors": state["errors"],
+        "timings_ms": state["timings"],
+    }
+    return JSONResponse(status_code=200 if body["ready"] else 503, content=body)
+
+# -------------------------------------------------------------------
+# ✅ Load Shedding / Deadline Handlers
+# -------------------------------------------------------------------
+@app.exception_handler(OverloadedError)
+async def overloaded_handler(request: Request, exc: OverloadedError):
+    logger.warning(f"🚧 Rejected {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"error": str(exc), "resource": exc.resource},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_handler(request: Request, exc: DeadlineExceeded):
+    logger.warning(f"⏰ {request.url.path}: {exc}")
+    return JSONResponse(status_code=504, content={"error": str(exc)})
+
 # -------------------------------------------------------------------
 # ✅ Global Exception Handler 
 # -------------------------------------------------------------------
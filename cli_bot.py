@@ -4,8 +4,12 @@ Log Summarization & Insights Bot CLI
 ------------------------------------
 A lightweight command-line client that connects to your Cloud Run FastAPI service.
 URL: https://bot-650010057363.asia-south1.run.app
+
+Run with --feedback (or CLI_FEEDBACK=true) to rate each answer; ratings are
+sent to POST /feedback.
 """
 
+import argparse
 import requests
 import time
 import sys
@@ -17,15 +21,40 @@ import os
 BASE_URL = "https://bot-650010057363.asia-south1.run.app"
 AUTO_CLOSE_TIMEOUT = 240     # auto-close after 4 minutes
 QUIT_WORDS = {"exit", "quit", "bye", "close", "end"}
+ASK_FEEDBACK = os.getenv("CLI_FEEDBACK", "false").lower() in ("1", "true", "yes")
 
 
 # HEADERS = {"x-api-key": API_KEY}
 HEADERS = {}
 
+# -------------------------------
+# FEEDBACK (opt-in)
+# -------------------------------
+def collect_feedback(answer_id: str):
+    """Ask for a 1-5 rating and optional comment; Enter skips."""
+    rating = input("Rate the answer (1-5, Enter to skip): ").strip()
+    if not rating:
+        return
+    if rating not in {"1", "2", "3", "4", "5"}:
+        print("Skipped: rating must be 1-5.\n")
+        return
+    comment = input("Optional comment: ").strip()
+    try:
+        res = requests.post(
+            f"{BASE_URL}/feedback",
+            json={"answer_id": answer_id, "rating": int(rating), "comment": comment},
+            headers=HEADERS,
+            timeout=10,
+        )
+        print("🗳️ Thanks for the feedback!\n" if res.status_code == 202 else f"❌ Feedback not saved ({res.status_code})\n")
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Network error: {e}\n")
+
+
 # -------------------------------
 # MAIN CHAT LOOP
 # -------------------------------
-def main():
+def main(ask_feedback: bool = ASK_FEEDBACK):
     print("=" * 70)
     print("🤖  Log Summarization & Insights Bot (Cloud Run Edition)")
     print("Connected to:", BASE_URL)
@@ -64,6 +93,8 @@ def main():
                     data = res.json()
                     response = data.get("response", "No response received.")
                     print(f"Bot: {response}\n")
+                    if ask_feedback and data.get("answer_id"):
+                        collect_feedback(data["answer_id"])
 
                 else:
                     print(f"❌ Server returned {res.status_code}: {res.text}\n")
@@ -82,4 +113,6 @@ def main():
 # ENTRY POINT
 # -------------------------------
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Log Summarization & Insights Bot CLI")
+    parser.add_argument("--feedback", action="store_true", default=ASK_FEEDBACK, help="Rate each answer")
+    main(ask_feedback=parser.parse_args().feedback)
@@ -1,13 +1,223 @@
 import requests
+import httpx
+import asyncio
 import os
 import sys
+import time
+from collections import OrderedDict
 from dotenv import load_dotenv
+from src.admission import limiters, OverloadedError
+from src.metrics import TOOL_LATENCY, track
 from src.logger import get_logger
 from src.custom_exception import CustomException
 
 load_dotenv()
 logger = get_logger(__name__)
 
+# Endpoints can be pointed at local stand-ins (see benchmarks/fake_services.py);
+# the Groq client reads GROQ_BASE_URL the same way.
+TAVILY_URL = os.getenv("TAVILY_URL", "https://api.tavily.com/search")
+GITHUB_CODE_SEARCH_URL = os.getenv("GITHUB_CODE_SEARCH_URL", "https://api.github.com/search/code")
+OPEN_METEO_URL = os.getenv("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+OPEN_METEO_GEOCODING_URL = os.getenv("OPEN_METEO_GEOCODING_URL", "https://geocoding-api.open-meteo.com/v1/search")
+
+# Per-tool request timeouts (seconds); concurrency limits live in src.admission
+TOOL_TIMEOUTS = {"tavily": 15.0, "github": 10.0, "weather": 10.0}
+
+# Seconds a tool result stays cached
+TOOL_CACHE_TTLS = {"weather": 600, "tavily": 1800, "github": 3600, "geocode": 7 * 24 * 3600}
+TOOL_CACHE_MAX_ENTRIES = 1024
+
+# -----------------------------------------------------------------------------
+# 🔌 Shared async HTTP client (keep-alive connection pool)
+# -----------------------------------------------------------------------------
+_http_client = None
+_http_client_loop = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the pooled AsyncClient for the running event loop.
+    Pools are bound to a loop, so a new one is created if the loop changed
+    (e.g. successive asyncio.run calls from get_answer).
+    """
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client_loop is not loop or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=30.0),
+            timeout=httpx.Timeout(15.0),
+        )
+        _http_client_loop = loop
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared client (call on application shutdown)."""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
+
+# -----------------------------------------------------------------------------
+# 🗃️ Tool result cache with single-flight request coalescing
+# -----------------------------------------------------------------------------
+class _FlightAbandoned(Exception):
+    """The caller leading an in-flight fetch was cancelled before it finished."""
+
+
+class ToolResultCache:
+    """
+    TTL + LRU cache for tool results.
+    Concurrent calls with the same key share one in-flight upstream request.
+    Failures are not cached; they propagate to every waiter of that flight.
+    If the leading caller is cancelled, the waiters retry the fetch.
+    """
+
+    def __init__(self, ttls: dict, max_entries: int = TOOL_CACHE_MAX_ENTRIES):
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._loop = None
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+    def peek(self, tool: str, key):
+        """Return a fresh cached value or None, without calling upstream."""
+        entry = self._entries.get((tool, key))
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._entries[(tool, key)]
+            return None
+        self._entries.move_to_end((tool, key))
+        return value
+
+    def put(self, tool: str, key, value, ttl: float = None):
+        ttl = self.ttls.get(tool) if ttl is None else ttl
+        if not ttl:
+            return
+        self._entries[(tool, key)] = (time.time() + ttl, value)
+        self._entries.move_to_end((tool, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def get_or_call(self, tool: str, key, fetch, ttl: float = None):
+        """Cached value for (tool, key), else await fetch() once for all concurrent callers."""
+        value = self.peek(tool, key)
+        if value is not None:
+            self.stats["hits"] += 1
+            return value
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._inflight = {}
+            self._loop = loop
+
+        while True:
+            flight = self._inflight.get((tool, key))
+            if flight is None:
+                break
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(flight)
+            except _FlightAbandoned:
+                # The leader was cancelled (its deadline, client gone), not us: retry,
+                # becoming the new leader unless another follower already did
+                continue
+
+        self.stats["misses"] += 1
+        flight = loop.create_future()
+        self._inflight[(tool, key)] = flight
+        try:
+            value = await fetch()
+            self.put(tool, key, value, ttl)
+            flight.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            # Never cancel the shared future: followers would see a CancelledError
+            # nobody asked for. They get _FlightAbandoned and retry instead.
+            flight.set_exception(_FlightAbandoned())
+            flight.exception()
+            raise
+        except Exception as e:
+            flight.set_exception(e)
+            flight.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            self._inflight.pop((tool, key), None)
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "size": len(self._entries), "inflight": len(self._inflight)}
+
+
+tool_cache = ToolResultCache(TOOL_CACHE_TTLS)
+
+
+def cache_key(text: str) -> str:
+    """Case/whitespace-insensitive key for free-text tool arguments."""
+    return " ".join(text.lower().split())
+
+
+# -----------------------------------------------------------------------------
+# 🧾 Response formatting (shared by sync and async tools)
+# -----------------------------------------------------------------------------
+def _format_tavily(query: str, data: dict, max_results: int) -> str:
+    results = data.get("results", [])
+    if not results:
+        return f"No results found for '{query}'."
+
+    output_lines = []
+    for i, item in enumerate(results[:max_results], start=1):
+        title = item.get("title", "Untitled")
+        content = item.get("content", "")
+        url_link = item.get("url", "")
+        output_lines.append(f"{i}. **{title}**\n{content}\n🔗 {url_link}")
+    return "\n\n".join(output_lines)
+
+
+def _format_github(query: str, data: dict) -> str:
+    results = data.get("items", [])
+    if not results:
+        return f"No code found for query '{query}'."
+
+    output_lines = []
+    for item in results:
+        repo = item["repository"]["full_name"]
+        path = item["path"]
+        html_url = item["html_url"]
+        output_lines.append(f"📂 {repo}/{path}\n🔗 {html_url}")
+    return "\n\n".join(output_lines)
+
+
+def _format_weather(data: dict) -> str:
+    current = data.get("current_weather")
+    if not current:
+        return "Weather data not available."
+
+    temp = current.get("temperature")
+    wind = current.get("windspeed")
+    return f"Temperature: {temp}°C, Windspeed: {wind} km/h"
+
+
+def _tavily_payload(query: str, max_results: int) -> dict:
+    TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+    if not TAVILY_API_KEY:
+        raise CustomException("TAVILY_API_KEY missing from environment variables", None)
+    return {"api_key": TAVILY_API_KEY, "query": query, "max_results": max_results}
+
+
+def _github_headers() -> dict:
+    GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+    headers = {"Accept": "application/vnd.github.v3+json"}
+    if GITHUB_TOKEN:
+        headers["Authorization"] = f"token {GITHUB_TOKEN}"
+    return headers
+
+
 # -----------------------------------------------------------------------------
 # 🔍 1. Tavily Search Summary
 # -----------------------------------------------------------------------------
@@ -19,34 +229,12 @@ def tavily_search_summary(query: str, max_results: int = 3) -> str:
     try:
         logger.info(f"🔎 Tavily Search for query: {query}")
 
-        TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-        if not TAVILY_API_KEY:
-            raise CustomException("TAVILY_API_KEY missing from environment variables", None)
-
-        url = "https://api.tavily.com/search"
+        payload = _tavily_payload(query, max_results)
         headers = {"Content-Type": "application/json"}
-        payload = {
-            "api_key": TAVILY_API_KEY,
-            "query": query,
-            "max_results": max_results
-        }
 
-        resp = requests.post(url, json=payload, headers=headers, timeout=15)
+        resp = requests.post(TAVILY_URL, json=payload, headers=headers, timeout=TOOL_TIMEOUTS["tavily"])
         resp.raise_for_status()
-        data = resp.json()
-
-        results = data.get("results", [])
-        if not results:
-            return f"No results found for '{query}'."
-
-        output_lines = []
-        for i, item in enumerate(results[:max_results], start=1):
-            title = item.get("title", "Untitled")
-            content = item.get("content", "")
-            url_link = item.get("url", "")
-            output_lines.append(f"{i}. **{title}**\n{content}\n🔗 {url_link}")
-
-        summary = "\n\n".join(output_lines)
+        summary = _format_tavily(query, resp.json(), max_results)
         logger.info("✅ Tavily Search completed successfully.")
         return summary
 
@@ -66,30 +254,14 @@ def search_github_code(query: str, language: str = "python", per_page: int = 3)
     try:
         logger.info(f"Searching GitHub code for query: {query}")
 
-        GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-        headers = {"Accept": "application/vnd.github.v3+json"}
-        if GITHUB_TOKEN:
-            headers["Authorization"] = f"token {GITHUB_TOKEN}"
-
-        url = "https://api.github.com/search/code"
         params = {"q": f"{query} language:{language}", "per_page": per_page}
 
-        resp = requests.get(url, headers=headers, params=params, timeout=10)
+        resp = requests.get(GITHUB_CODE_SEARCH_URL, headers=_github_headers(), params=params, timeout=TOOL_TIMEOUTS["github"])
         resp.raise_for_status()
-        results = resp.json().get("items", [])
-
-        if not results:
-            return f"No code found for query '{query}'."
-
-        output_lines = []
-        for item in results:
-            repo = item["repository"]["full_name"]
-            path = item["path"]
-            html_url = item["html_url"]
-            output_lines.append(f"📂 {repo}/{path}\n🔗 {html_url}")
+        summary = _format_github(query, resp.json())
 
         logger.info("✅ GitHub code search completed successfully.")
-        return "\n\n".join(output_lines)
+        return summary
 
     except Exception as e:
         logger.error(f"GitHub code search error for '{query}': {e}")
@@ -103,21 +275,130 @@ def get_weather(lat: float, lon: float) -> str:
     """Fetch current weather from Open-Meteo API."""
     try:
         logger.info(f"Fetching weather for lat={lat}, lon={lon}")
-        url = (
-            f"https://api.open-meteo.com/v1/forecast?"
-            f"latitude={lat}&longitude={lon}&current_weather=true"
-        )
-        resp = requests.get(url, timeout=10)
+        params = {"latitude": lat, "longitude": lon, "current_weather": "true"}
+        resp = requests.get(OPEN_METEO_URL, params=params, timeout=TOOL_TIMEOUTS["weather"])
         resp.raise_for_status()
+        return _format_weather(resp.json())
+
+    except Exception as e:
+        logger.error(f"Weather fetch error at lat={lat}, lon={lon}: {e}")
+        raise CustomException(f"Weather fetch error for lat={lat}, lon={lon}", sys)
+
+
+# -----------------------------------------------------------------------------
+# ⚡ Async variants (shared pool, per-tool timeout + concurrency limit)
+# -----------------------------------------------------------------------------
+async def tavily_search_summary_async(query: str, max_results: int = 3) -> str:
+    """Non-blocking tavily_search_summary (cached, coalesced) for use inside the event loop."""
+    return await tool_cache.get_or_call(
+        "tavily", (cache_key(query), max_results), lambda: _fetch_tavily(query, max_results)
+    )
+
+
+async def search_github_code_async(query: str, language: str = "python", per_page: int = 3) -> str:
+    """Non-blocking search_github_code (cached, coalesced) for use inside the event loop."""
+    return await tool_cache.get_or_call(
+        "github", (cache_key(query), language, per_page), lambda: _fetch_github(query, language, per_page)
+    )
 
-        data = resp.json().get("current_weather")
-        if not data:
-            return "Weather data not available."
 
-        temp = data.get("temperature")
-        wind = data.get("windspeed")
-        return f"Temperature: {temp}°C, Windspeed: {wind} km/h"
+async def get_weather_async(lat: float, lon: float) -> str:
+    """Non-blocking get_weather (cached, coalesced) for use inside the event loop."""
+    return await tool_cache.get_or_call("weather", (round(lat, 2), round(lon, 2)), lambda: _fetch_weather(lat, lon))
 
+
+async def geocode_city_async(city: str):
+    """
+    (latitude, longitude, display name) for a city via Open-Meteo geocoding,
+    or None when no place matches. Found places are cached for a week.
+    """
+    return await tool_cache.get_or_call("geocode", cache_key(city), lambda: _fetch_geocode(city))
+
+
+async def _fetch_tavily(query: str, max_results: int) -> str:
+    try:
+        logger.info(f"🔎 Tavily Search (async) for query: {query}")
+        payload = _tavily_payload(query, max_results)
+
+        async with limiters["tavily"].slot():
+            with track(TOOL_LATENCY, "tavily", tool="tavily"):
+                resp = await get_http_client().post(TAVILY_URL, json=payload, timeout=TOOL_TIMEOUTS["tavily"])
+                resp.raise_for_status()
+
+        summary = _format_tavily(query, resp.json(), max_results)
+        logger.info("✅ Tavily Search completed successfully.")
+        return summary
+
+    except OverloadedError:
+        raise
+    except Exception as e:
+        logger.error(f"Tavily search error for '{query}': {e}")
+        raise CustomException(f"Tavily search error for query '{query}'", e)
+
+
+async def _fetch_github(query: str, language: str, per_page: int) -> str:
+    try:
+        logger.info(f"Searching GitHub code (async) for query: {query}")
+        params = {"q": f"{query} language:{language}", "per_page": per_page}
+
+        async with limiters["github"].slot():
+            with track(TOOL_LATENCY, "github", tool="github"):
+                resp = await get_http_client().get(
+                    GITHUB_CODE_SEARCH_URL, headers=_github_headers(), params=params, timeout=TOOL_TIMEOUTS["github"]
+                )
+                resp.raise_for_status()
+
+        summary = _format_github(query, resp.json())
+        logger.info("✅ GitHub code search completed successfully.")
+        return summary
+
+    except OverloadedError:
+        raise
+    except Exception as e:
+        logger.error(f"GitHub code search error for '{query}': {e}")
+        raise CustomException(f"GitHub code search error for query '{query}'", e)
+
+
+async def _fetch_weather(lat: float, lon: float) -> str:
+    try:
+        logger.info(f"Fetching weather (async) for lat={lat}, lon={lon}")
+        params = {"latitude": lat, "longitude": lon, "current_weather": "true"}
+
+        async with limiters["weather"].slot():
+            with track(TOOL_LATENCY, "weather", tool="weather"):
+                resp = await get_http_client().get(OPEN_METEO_URL, params=params, timeout=TOOL_TIMEOUTS["weather"])
+                resp.raise_for_status()
+
+        return _format_weather(resp.json())
+
+    except OverloadedError:
+        raise
     except Exception as e:
         logger.error(f"Weather fetch error at lat={lat}, lon={lon}: {e}")
-        raise CustomException(f"Weather fetch error for lat={lat}, lon={lon}", sys)
+        raise CustomException(f"Weather fetch error for lat={lat}, lon={lon}", e)
+
+
+async def _fetch_geocode(city: str):
+    try:
+        logger.info(f"Geocoding city (async): {city}")
+        params = {"name": city, "count": 1, "language": "en", "format": "json"}
+
+        async with limiters["weather"].slot():
+            with track(TOOL_LATENCY, "geocode", tool="geocode"):
+                resp = await get_http_client().get(
+                    OPEN_METEO_GEOCODING_URL, params=params, timeout=TOOL_TIMEOUTS["weather"]
+                )
+                resp.raise_for_status()
+
+        results = resp.json().get("results") or []
+        if not results:
+            return None
+        place = results[0]
+        name = ", ".join(part for part in (place.get("name"), place.get("country")) if part)
+        return place["latitude"], place["longitude"], name
+
+    except OverloadedError:
+        raise
+    except Exception as e:
+        logger.error(f"Geocoding error for '{city}': {e}")
+        raise CustomException(f"Geocoding error for city '{city}'", e)
@@ -1,16 +1,111 @@
-import re
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
 from dotenv import load_dotenv
 from presidio_analyzer import AnalyzerEngine
 from presidio_anonymizer import AnonymizerEngine
-from presidio_anonymizer.entities import OperatorConfig
+from src.regex_masker import RegexMaskEngine
 from src.logger import get_logger
 from src.custom_exception import CustomException
 
 load_dotenv()
 logger = get_logger(__name__)
 
+PRESIDIO_CHUNK_SIZE = 20000      # chars per analyzer call (well under spaCy max_length)
+PRESIDIO_CHUNK_OVERLAP = 500     # context shared by neighbouring chunks
+PRESIDIO_SCORE_THRESHOLD = float(os.getenv("PRESIDIO_SCORE_THRESHOLD", "0.5"))
+# Entity types never masked: timestamps and client IPs are structured log fields the
+# row IDs, analytics, time filters and IP lookups depend on
+PRESIDIO_SKIP_ENTITIES = {
+    e.strip() for e in os.getenv("PRESIDIO_SKIP_ENTITIES", "DATE_TIME,IP_ADDRESS").split(",") if e.strip()
+}
+
+
+# =======================================================
+# Boundary-safe chunking + deterministic entity merging
+# =======================================================
+def split_on_boundaries(text: str, chunk_size: int = PRESIDIO_CHUNK_SIZE,
+                        overlap: int = PRESIDIO_CHUNK_OVERLAP) -> list:
+    """
+    Split text into windows for the analyzer.
+    Each window "owns" [own_start, own_end) and is padded with `overlap` chars of
+    context on both sides, so an entity crossing a cut is still seen whole.
+    Cuts prefer a newline, then a sentence end, then whitespace.
+    Returns a list of (window_start, window_text, own_start, own_end) in absolute offsets.
+    """
+    windows = []
+    start, n = 0, len(text)
+    while start < n:
+        end = min(start + chunk_size, n)
+        if end < n:
+            floor = start + chunk_size // 2
+            for sep in ("\n", ". ", " "):
+                cut = text.rfind(sep, floor, end)
+                if cut != -1:
+                    end = cut + len(sep)
+                    break
+        win_start = max(0, start - overlap)
+        win_end = min(n, end + overlap)
+        windows.append((win_start, text[win_start:win_end], start, end))
+        start = end
+    return windows
+
+
+def resolve_overlaps(entities: list) -> list:
+    """
+    Pick a non-overlapping set of (entity_type, start, end, score) spans.
+    Higher score wins, then longer span, then earlier start, then type name,
+    so the result does not depend on worker scheduling.
+    """
+    ranked = sorted(set(entities), key=lambda e: (-e[3], -(e[2] - e[1]), e[1], e[0]))
+    chosen = []
+    for ent in ranked:
+        if all(ent[2] <= c[1] or ent[1] >= c[2] for c in chosen):
+            chosen.append(ent)
+    return sorted(chosen, key=lambda e: e[1])
+
+
+def apply_placeholders(text: str, entities: list) -> str:
+    """Replace non-overlapping spans (sorted by start) with [TYPE_MASKED]."""
+    parts, pos = [], 0
+    for entity_type, start, end, _ in entities:
+        parts.append(text[pos:start])
+        parts.append(f"[{entity_type}_MASKED]")
+        pos = end
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def analyze_window(analyzer, window_start: int, window_text: str, own_start: int, own_end: int) -> list:
+    """Run the analyzer on one window and keep entities that start in its owned range."""
+    results = analyzer.analyze(text=window_text, entities=None, language="en",
+                               score_threshold=PRESIDIO_SCORE_THRESHOLD)
+    entities = []
+    for res in results:
+        if res.entity_type in PRESIDIO_SKIP_ENTITIES:
+            continue
+        start = res.start + window_start
+        if own_start <= start < own_end:
+            entities.append((res.entity_type, start, res.end + window_start, float(res.score)))
+    return entities
+
+
+# =======================================================
+# Process-pool workers (one AnalyzerEngine per process)
+# =======================================================
+_worker_analyzer = None
+
+
+def _init_presidio_worker():
+    global _worker_analyzer
+    _worker_analyzer = AnalyzerEngine()
+
+
+def _analyze_task(task: tuple) -> tuple:
+    text_idx, window_start, window_text, own_start, own_end = task
+    return text_idx, analyze_window(_worker_analyzer, window_start, window_text, own_start, own_end)
+
 
 class PIIMasker:
     """
@@ -26,14 +121,9 @@ class PIIMasker:
             self.analyzer = AnalyzerEngine()
             self.anonymizer = AnonymizerEngine()
 
-            # Step 2 Precompile regex patterns (fast lookup)
-            self.regex_patterns = {
-                "email": re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,6}\b"),
-                "phone": re.compile(r"(?:\+91[\-\s]?|91[\-\s]?)?[6-9]\d{9}\b"),
-                "card": re.compile(r"\b(?:\d[ -]*?){13,16}\b"),
-                "aadhaar": re.compile(r"\b\d{4}\s\d{4}\s\d{4}\b"),
-                "pan": re.compile(r"\b[A-Z]{5}[0-9]{4}[A-Z]{1}\b", re.IGNORECASE),
-            }
+            # Step 2 Compile regex patterns into one single-pass engine
+            self.regex_engine = RegexMaskEngine()
+            self.regex_patterns = self.regex_engine.compiled
 
         except Exception as e:
             logger.error(f"Error initializing PIIMasker: {e}")
@@ -41,66 +131,120 @@ class PIIMasker:
 
     # ===================================================
     def regex_mask(self, text: str) -> str:
-        """Mask structured patterns using regex."""
+        """Mask structured patterns using regex (see RegexMaskEngine)."""
         try:
-            masked_text = text
-            for pii_type, pattern in self.regex_patterns.items():
-                if pattern.search(masked_text):
-                    masked_text = pattern.sub(f"[{pii_type.upper()}_MASKED]", masked_text)
-            return masked_text
+            return self.regex_engine.mask(text)
         except Exception as e:
             logger.error(f"Regex masking error: {e}")
             raise CustomException("Regex masking failed", e)
 
     # ===================================================
-    def presidio_mask(self, text: str, chunk_size: int = 50000) -> str:
+    def regex_mask_many(self, texts):
+        """Bulk regex masking for a pandas Series or list of strings."""
+        try:
+            return self.regex_engine.mask_many(texts)
+        except Exception as e:
+            logger.error(f"Bulk regex masking error: {e}")
+            raise CustomException("Bulk regex masking failed", e)
+
+    # ===================================================
+    def presidio_mask(self, text: str, chunk_size: int = PRESIDIO_CHUNK_SIZE,
+                      overlap: int = PRESIDIO_CHUNK_OVERLAP) -> str:
         """
         Use Presidio NLP engine to detect & anonymize contextual PII in safe chunks.
-        Avoids spaCy's max_length limit by splitting long inputs.
+        Avoids spaCy's max_length limit by splitting long inputs on line/sentence
+        boundaries with overlap, so entities are never cut in half.
         """
         try:
             if not text:
                 return text
 
-            masked_parts = []
-            for i in range(0, len(text), chunk_size):
-                part = text[i:i + chunk_size]
+            entities = []
+            for window in split_on_boundaries(text, chunk_size, overlap):
+                entities.extend(analyze_window(self.analyzer, *window))
 
-                results = self.analyzer.analyze(
-                    text=part,
-                    entities=None,       # Detect all supported types
-                    language="en"
-                )
+            return apply_placeholders(text, resolve_overlaps(entities))
 
-                if not results:
-                    masked_parts.append(part)
-                    continue
+        except Exception as e:
+            logger.error(f"Presidio masking error: {e}")
+            raise CustomException("Presidio masking failed", e)
 
-                # Replace all detected PII with placeholders
-                operators = {
-                  res.entity_type: OperatorConfig("replace", {"new_value": f"[{res.entity_type}_MASKED]"})
-                  for res in results
-                }
+    # ===================================================
+    @staticmethod
+    def presidio_workers(max_workers: int = None) -> int:
+        """Worker count for a Presidio pool (all cores unless given)."""
+        return max_workers or os.cpu_count() or 1
+
+    # ===================================================
+    @staticmethod
+    def presidio_pool(max_workers: int = None) -> ProcessPoolExecutor:
+        """
+        Process pool whose workers each load AnalyzerEngine/spaCy once.
+        Use as a context manager and pass it to presidio_mask_parallel (with the
+        same max_workers) to reuse the loaded models across many calls.
+        """
+        return ProcessPoolExecutor(max_workers=PIIMasker.presidio_workers(max_workers),
+                                   initializer=_init_presidio_worker)
 
-                anonymized = self.anonymizer.anonymize(
-                    text=part,
-                    analyzer_results=results,
-                    operators=operators
-                )
+    # ===================================================
+    def presidio_mask_parallel(self, texts, max_workers: int = None, pool: ProcessPoolExecutor = None,
+                               chunk_size: int = PRESIDIO_CHUNK_SIZE,
+                               overlap: int = PRESIDIO_CHUNK_OVERLAP):
+        """
+        Presidio masking fanned out over a process pool (all cores by default).
+        Each worker loads AnalyzerEngine/spaCy once; windows from every text are
+        analyzed in parallel and merged deterministically per text.
+        Accepts a string, a list of strings or a pandas Series (same type returned).
+        When passing `pool`, pass the max_workers it was created with; it sizes
+        the batches sent to each worker.
+        """
+        try:
+            single = isinstance(texts, str)
+            values = [texts] if single else [str(t) for t in texts]
 
-                masked_parts.append(anonymized.text)
+            # Identical values (common in log columns) are analyzed once
+            unique = list(dict.fromkeys(v for v in values if v))
+            tasks = [
+                (idx, *window)
+                for idx, text in enumerate(unique)
+                for window in split_on_boundaries(text, chunk_size, overlap)
+            ]
 
-            return " ".join(masked_parts)
+            entities = [[] for _ in unique]
+            if tasks:
+                own_pool = pool is None
+                workers = self.presidio_workers(max_workers)
+                pool = pool or self.presidio_pool(workers)
+                logger.info(f"Presidio: {len(tasks)} windows from {len(unique)} texts on {workers} workers")
+                try:
+                    batch = max(1, len(tasks) // (workers * 8))
+                    for text_idx, found in pool.map(_analyze_task, tasks, chunksize=batch):
+                        entities[text_idx].extend(found)
+                finally:
+                    if own_pool:
+                        pool.shutdown()
+
+            masked = {
+                text: apply_placeholders(text, resolve_overlaps(found))
+                for text, found in zip(unique, entities)
+            }
+            result = [masked.get(v, v) for v in values]
+
+            if single:
+                return result[0]
+            if isinstance(texts, pd.Series):
+                return pd.Series(result, index=texts.index, name=texts.name)
+            return result
 
         except Exception as e:
-            logger.error(f"Presidio masking error: {e}")
-            raise CustomException("Presidio masking failed", e)
+            logger.error(f"Parallel Presidio masking error: {e}")
+            raise CustomException("Parallel Presidio masking failed", e)
 
     # ===================================================
-    def mask_text(self, text: str) -> str:
+    def mask_text(self, text: str, use_presidio: bool = False) -> str:
         """
         Apply both Regex and Presidio masking for complete protection.
-        Regex first → Presidio second.
+        Regex first → Presidio second (only when use_presidio is set).
         """
         try:
             if not text:
@@ -108,10 +252,27 @@ class PIIMasker:
 
             logger.info("Starting hybrid PII masking...")
             text = self.regex_mask(text)
-            #text = self.presidio_mask(text)
+            if use_presidio:
+                text = self.presidio_mask(text)
             logger.info("Hybrid PII masking completed.")
             return text
 
         except Exception as e:
             logger.error(f"Hybrid masking error: {e}")
             raise CustomException("Hybrid PII masking failed", e)
+
+    # ===================================================
+    def mask_many(self, texts, use_presidio: bool = False, max_workers: int = None,
+                  pool: ProcessPoolExecutor = None):
+        """
+        Bulk version of mask_text for a pandas Series or list of strings.
+        Avoids per-cell call and logging overhead; Presidio runs on a process pool.
+        """
+        try:
+            masked = self.regex_mask_many(texts)
+            if use_presidio:
+                masked = self.presidio_mask_parallel(masked, max_workers=max_workers, pool=pool)
+            return masked
+        except Exception as e:
+            logger.error(f"Bulk hybrid masking error: {e}")
+            raise CustomException("Bulk PII masking failed", e)
@@ -1,12 +1,17 @@
 import os
+import argparse
 import pandas as pd
+from datetime import datetime, timedelta
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.embeddings import OpenAIEmbeddings
 from langchain.vectorstores import FAISS
 from src.logger import get_logger
 from src.custom_exception import CustomException
 from dotenv import load_dotenv
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from src.embedding_cache import CachedEmbeddings
+from src.ann_index import INDEX_TYPE, make_vector_store, index_kind, supports_removal
+from src.hybrid_retriever import HybridRetriever, build_lexical_index
+from src.metadata_filter import MetadataIndex
 
 logger = get_logger(__name__)
 load_dotenv()
@@ -16,51 +21,189 @@ FINAL_DATA = os.path.join("artifacts", "FINAL_DATA")
 VECTOR_DB_DIR = os.path.join("artifacts", "VECTOR_DB")
 os.makedirs(VECTOR_DB_DIR, exist_ok=True)
 
-
-def load_masked_csvs():
-    """Load all masked CSVs from FINAL_DATA as row-wise text."""
-    docs = []
-    for file in os.listdir(FINAL_DATA):
-        if file.endswith(".csv"):
-            path = os.path.join(FINAL_DATA, file)
-            df = pd.read_csv(path)
-
-            # Convert each row into a string (row-aware retrieval)
-            for _, row in df.iterrows():
-                row_text = " | ".join([f"{col}: {str(val)}" for col, val in row.items()])
-                docs.append(row_text)
-    return docs
-
-
-def build_retriever():
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# Drop rows older than this many days on every update (None keeps everything)
+RETENTION_DAYS = int(os.getenv("RAG_RETENTION_DAYS")) if os.getenv("RAG_RETENTION_DAYS") else None
+
+
+def make_row_id(row, fallback: str) -> str:
+    """Stable row ID: RequestID + Timestamp when present, else file:index."""
+    if "RequestID" in row and "Timestamp" in row:
+        return f"{row['RequestID']}:{row['Timestamp']}"
+    return fallback
+
+
+def load_masked_rows():
+    """
+    Load masked CSV rows with stable IDs and metadata.
+    Returns a list of (row_id, row_text, metadata); duplicate IDs keep the first row.
+    """
+    rows, seen = [], set()
+    for file in sorted(os.listdir(FINAL_DATA)):
+        if not file.endswith(".csv"):
+            continue
+        df = pd.read_csv(os.path.join(FINAL_DATA, file))
+        for idx, row in df.iterrows():
+            row_id = make_row_id(row, f"{file}:{idx}")
+            if row_id in seen:
+                continue
+            seen.add(row_id)
+            row_text = " | ".join([f"{col}: {str(val)}" for col, val in row.items()])
+            metadata = {"row_id": row_id, "source_file": file}
+            if "Timestamp" in row:
+                metadata["timestamp"] = str(row["Timestamp"])
+            # Typed filter fields (see MetadataIndex)
+            if "Service" in row:
+                metadata["service"] = str(row["Service"])
+            if "LogLevel" in row:
+                metadata["level"] = str(row["LogLevel"]).upper()
+            rows.append((row_id, row_text, metadata))
+    return rows
+
+
+def chunk_rows(rows, splitter):
+    """Split rows into chunks; chunk IDs are row_id, row_id#1, row_id#2 ..."""
+    texts, metadatas, ids = [], [], []
+    for row_id, row_text, metadata in rows:
+        for i, chunk in enumerate(splitter.split_text(row_text)):
+            texts.append(chunk)
+            metadatas.append(dict(metadata))
+            ids.append(row_id if i == 0 else f"{row_id}#{i}")
+    return texts, metadatas, ids
+
+
+def stored_documents(vectorstore) -> dict:
+    """docstore ID → Document for every vector in the store."""
+    return {doc_id: vectorstore.docstore.search(doc_id) for doc_id in vectorstore.index_to_docstore_id.values()}
+
+
+def delete_rows(vectorstore, row_ids):
+    """
+    Delete every chunk belonging to the given row IDs.
+    Returns (vectorstore, chunks removed). Flat indexes are edited in place;
+    ANN indexes are rebuilt from the remaining chunks (embeddings come from the
+    embedding cache, so nothing is re-encoded).
+    """
+    row_ids = set(row_ids)
+    stored = stored_documents(vectorstore)
+    doc_ids = [doc_id for doc_id, doc in stored.items() if doc.metadata.get("row_id") in row_ids]
+    if not doc_ids:
+        return vectorstore, 0
+
+    if supports_removal(vectorstore.index):
+        vectorstore.delete(doc_ids)
+        return vectorstore, len(doc_ids)
+
+    removed = set(doc_ids)
+    keep = [(doc_id, doc) for doc_id, doc in stored.items() if doc_id not in removed]
+    texts = [doc.page_content for _, doc in keep]
+    vectors = vectorstore.embedding_function.embed_documents(texts)
+    rebuilt = make_vector_store(
+        vectorstore.embedding_function, vectors, texts,
+        [doc.metadata for _, doc in keep], [doc_id for doc_id, _ in keep],
+        index_type=index_kind(vectorstore.index),
+    )
+    return rebuilt, len(doc_ids)
+
+
+def expired_row_ids(vectorstore, retention_days: int, now: datetime = None) -> set:
+    """Row IDs whose timestamp is older than the retention window."""
+    cutoff = (now or datetime.now()) - timedelta(days=retention_days)
+    expired = set()
+    for doc in stored_documents(vectorstore).values():
+        ts = doc.metadata.get("timestamp")
+        if ts and pd.to_datetime(ts, errors="coerce") < cutoff:
+            expired.add(doc.metadata["row_id"])
+    return expired
+
+
+def load_vector_store(embeddings):
+    """Load the saved store, or None if missing or built without row IDs."""
+    if not os.path.exists(os.path.join(VECTOR_DB_DIR, "index.faiss")):
+        return None
+    vectorstore = FAISS.load_local(VECTOR_DB_DIR, embeddings, allow_dangerous_deserialization=True)
+    if any("row_id" not in doc.metadata for doc in stored_documents(vectorstore).values()):
+        logger.info("Existing vector store has no row IDs; rebuilding from scratch.")
+        return None
+    if index_kind(vectorstore.index) != INDEX_TYPE:
+        logger.info(f"Index type changed ({index_kind(vectorstore.index)} → {INDEX_TYPE}); rebuilding.")
+        return None
+    return vectorstore
+
+
+def build_retriever(full_rebuild: bool = False, retention_days: int = RETENTION_DAYS,
+                    delete_row_ids=None, prune_missing: bool = False, now: datetime = None):
+    """
+    Create or incrementally update the FAISS store in VECTOR_DB_DIR.
+    Only rows whose ID is not yet stored are embedded and appended; explicitly
+    deleted rows, rows outside the retention window and (with prune_missing)
+    rows no longer present in FINAL_DATA are removed in place.
+    """
     try:
         logger.info("🚀 Starting RAG pipeline: chunking + embedding + retriever")
 
-        # Step 1: Load masked CSVs
-        all_texts = load_masked_csvs()
+        # Step 1: Load masked rows with stable IDs
+        rows = load_masked_rows()
+
+        # Step 2: Load the existing store (unless rebuilding)
+        # Unchanged chunks are served from the content-addressed embedding cache
+        embeddings = CachedEmbeddings(model_name=EMBEDDING_MODEL)
+        vectorstore = None if full_rebuild else load_vector_store(embeddings)
+
+        # Step 3: Deletions + retention on the existing store
+        if vectorstore is not None:
+            to_delete = set(delete_row_ids or [])
+            if retention_days is not None:
+                to_delete |= expired_row_ids(vectorstore, retention_days, now)
+            if prune_missing:
+                current = {r[0] for r in rows}
+                to_delete |= {
+                    doc.metadata["row_id"] for doc in stored_documents(vectorstore).values()
+                    if doc.metadata["row_id"] not in current
+                }
+            if to_delete:
+                vectorstore, removed = delete_rows(vectorstore, to_delete)
+                logger.info(f"🗑️ Removed {removed} chunks ({len(to_delete)} rows)")
+            stored_rows = {doc.metadata["row_id"] for doc in stored_documents(vectorstore).values()}
+        else:
+            to_delete, stored_rows = set(delete_row_ids or []), set()
+
+        # Step 4: Only new rows (never re-add deleted or expired ones)
+        if retention_days is not None:
+            cutoff = (now or datetime.now()) - timedelta(days=retention_days)
+            rows = [
+                r for r in rows
+                if "timestamp" not in r[2] or not pd.to_datetime(r[2]["timestamp"], errors="coerce") < cutoff
+            ]
+        new_rows = [r for r in rows if r[0] not in stored_rows and r[0] not in to_delete]
 
-        # Step 2: Chunk data
         splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP
         )
-        chunks = []
-        for text in all_texts:
-            chunks.extend(splitter.split_text(text))
-
-        logger.info(f"Total chunks created: {len(chunks)}")
-
-        # Step 3: Convert chunks into embeddings
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        
-        # Step 4: Store in FAISS vector DB
-        vectorstore = FAISS.from_texts(chunks, embeddings)
-
-        # Save locally
+        texts, metadatas, ids = chunk_rows(new_rows, splitter)
+        logger.info(f"New rows: {len(new_rows)}, chunks to embed: {len(texts)}")
+
+        # Step 5: Embed the delta and store in FAISS vector DB
+        if vectorstore is None:
+            if not texts:
+                raise ValueError("No rows to index")
+            vectors = embeddings.embed_documents(texts)
+            vectorstore = make_vector_store(embeddings, vectors, texts, metadatas, ids, index_type=INDEX_TYPE)
+        elif texts:
+            vectorstore.add_texts(texts, metadatas=metadatas, ids=ids)
+
+        # Save locally, with the BM25 index over the same chunks next to it
         vectorstore.save_local(VECTOR_DB_DIR)
-        logger.info("✅ Retriever (FAISS) built and saved successfully.")
+        lexical = build_lexical_index(vectorstore)
+        lexical.save(VECTOR_DB_DIR)
+        logger.info(f"✅ Retriever (FAISS) saved successfully ({vectorstore.index.ntotal} vectors, "
+                    f"embedding cache hit rate {embeddings.hit_rate():.1%}).")
 
-        return vectorstore.as_retriever()
+        return HybridRetriever(vectorstore, lexical, MetadataIndex(vectorstore))
 
     except Exception as e:
         logger.error(f"❌ Error in RAG pipeline: {e}")
@@ -68,5 +211,16 @@ def build_retriever():
 
 
 if __name__ == "__main__":
-    retriever = build_retriever()
-  
+    parser = argparse.ArgumentParser(description="Build or incrementally update the FAISS vector store.")
+    parser.add_argument("--full-rebuild", action="store_true", help="Re-embed every row from scratch")
+    parser.add_argument("--retention-days", type=int, default=RETENTION_DAYS, help="Drop rows older than N days")
+    parser.add_argument("--delete", nargs="*", default=None, metavar="ROW_ID", help="Row IDs to delete")
+    parser.add_argument("--prune-missing", action="store_true", help="Delete rows no longer in FINAL_DATA")
+    args = parser.parse_args()
+
+    retriever = build_retriever(
+        full_rebuild=args.full_rebuild,
+        retention_days=args.retention_days,
+        delete_row_ids=args.delete,
+        prune_missing=args.prune_missing,
+    )
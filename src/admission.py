@@ -0,0 +1,211 @@
+import os
+import math
+import time
+import asyncio
+import contextvars
+from collections import deque
+from contextlib import asynccontextmanager
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+# --------------------------------------------------------------------------
+# Limits: (max concurrent calls, max waiting callers) per downstream.
+# "chat" is the front door: whole requests in flight.
+# Override with ADMISSION_<NAME>_CONCURRENCY / ADMISSION_<NAME>_QUEUE.
+# --------------------------------------------------------------------------
+DEFAULT_LIMITS = {
+    "chat": (32, 64),
+    "llm": (8, 32),
+    "retriever": (32, 64),   # callers; the work itself is micro-batched (src.query_batcher)
+    "tavily": (4, 16),
+    "github": (2, 8),
+    "weather": (8, 16),
+}
+QUEUE_TIMEOUT_S = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_S", "5"))
+REQUEST_DEADLINE_S = float(os.getenv("REQUEST_DEADLINE_S", "30"))
+
+
+class OverloadedError(Exception):
+    """A limiter's wait queue is full (or the wait timed out)."""
+
+    def __init__(self, resource: str, retry_after: int):
+        super().__init__(f"{resource} is overloaded, retry in {retry_after}s")
+        self.resource = resource
+        self.retry_after = retry_after
+        # Too many requests at the front door → 429; a saturated dependency → 503
+        self.status_code = 429 if resource == "chat" else 503
+
+
+class DeadlineExceeded(Exception):
+    """The per-request deadline expired; the rest of the graph was cancelled."""
+
+
+class Limiter:
+    """
+    Concurrency limit with a bounded FIFO wait queue.
+    Callers beyond `concurrency` wait; callers beyond `max_queue` waiters (or
+    waiting longer than `queue_timeout`) are rejected at once with
+    OverloadedError, carrying a Retry-After estimate from recent hold times.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, queue_timeout: float = QUEUE_TIMEOUT_S):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters = deque()
+        self._loop = None
+        self._avg_hold_s = 0.0
+        self.stats = {"admitted": 0, "queued": 0, "shed": 0, "queue_timeouts": 0, "peak_queue": 0}
+
+    def _bind_loop(self):
+        # Waiters are futures of one event loop; reset if a new loop took over
+        # (e.g. successive asyncio.run calls from get_answer)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self.active = 0
+            self._waiters.clear()
+        return loop
+
+    def retry_after(self) -> int:
+        backlog = len(self._waiters) + 1
+        return max(1, math.ceil(backlog * self._avg_hold_s / self.concurrency))
+
+    def _shed(self, reason: str):
+        self.stats[reason] += 1
+        retry_after = self.retry_after()
+        logger.warning(f"🚧 Shedding {self.name} call ({reason}, active={self.active}, "
+                       f"queued={len(self._waiters)}, retry_after={retry_after}s)")
+        return OverloadedError(self.name, retry_after)
+
+    async def acquire(self):
+        loop = self._bind_loop()
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            self.stats["admitted"] += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._shed("shed")
+
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        self.stats["queued"] += 1
+        self.stats["peak_queue"] = max(self.stats["peak_queue"], len(self._waiters))
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up: pass it on
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(e, TimeoutError):
+                raise self._shed("queue_timeouts") from None
+            raise
+        self.stats["admitted"] += 1
+
+    def release(self):
+        # Hand the slot straight to the next live waiter; `active` is unchanged
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _record_hold(self, start: float):
+        self._avg_hold_s = 0.8 * self._avg_hold_s + 0.2 * (time.perf_counter() - start)
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record_hold(start)
+            self.release()
+
+    async def run_in_thread(self, fn, *args):
+        """
+        Run a blocking call on a worker thread inside a slot.
+        Cancelling the caller (deadline, disconnect) cannot stop the thread, so
+        the slot is released when the thread returns, not when the caller gives up.
+        """
+        await self.acquire()
+        start = time.perf_counter()
+        call = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+
+        def _done(task):
+            self._record_hold(start)
+            self.release()
+            if not task.cancelled():
+                task.exception()  # retrieved, even when nobody awaits it any more
+
+        call.add_done_callback(_done)
+        return await asyncio.shield(call)
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "active": self.active,
+            "queue_depth": len(self._waiters),
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "avg_hold_ms": round(self._avg_hold_s * 1000, 2),
+        }
+
+
+def _limits_from_env(name: str, concurrency: int, max_queue: int) -> tuple:
+    prefix = f"ADMISSION_{name.upper()}"
+    return (int(os.getenv(f"{prefix}_CONCURRENCY", concurrency)), int(os.getenv(f"{prefix}_QUEUE", max_queue)))
+
+
+# Monotonic time at which the current request's deadline expires (set by request_deadline)
+deadline_at_var = contextvars.ContextVar("deadline_at", default=None)
+
+limiters = {name: Limiter(name, *_limits_from_env(name, *limits)) for name, limits in DEFAULT_LIMITS.items()}
+deadline_stats = {"deadline_exceeded": 0}
+
+
+def admission_snapshot() -> dict:
+    """Queue depth, in-flight calls and shed counts per limiter."""
+    return {
+        "request_deadline_s": REQUEST_DEADLINE_S,
+        **deadline_stats,
+        "limiters": {name: limiter.snapshot() for name, limiter in limiters.items()},
+    }
+
+
+def deadline_exceeded(seconds: float) -> DeadlineExceeded:
+    """Count and log an expired deadline; returns the exception to raise."""
+    deadline_stats["deadline_exceeded"] += 1
+    logger.warning(f"⏰ Request deadline of {seconds:g}s exceeded")
+    return DeadlineExceeded(f"Request exceeded its {seconds:g}s deadline")
+
+
+def time_remaining():
+    """Seconds left before the current request's deadline, or None outside one."""
+    deadline_at = deadline_at_var.get()
+    if deadline_at is None:
+        return None
+    return max(deadline_at - time.perf_counter(), 0.0)
+
+
+@asynccontextmanager
+async def request_deadline(seconds: float = REQUEST_DEADLINE_S):
+    """Cancel the enclosed work after `seconds`, raising DeadlineExceeded."""
+    token = deadline_at_var.set(time.perf_counter() + seconds)
+    try:
+        async with asyncio.timeout(seconds):
+            yield
+    except TimeoutError:
+        raise deadline_exceeded(seconds) from None
+    finally:
+        deadline_at_var.reset(token)
@@ -0,0 +1,133 @@
+import os
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+# --------------------------------------------------------------------------
+# Index configuration (build-time and search-time knobs)
+# --------------------------------------------------------------------------
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat").lower()
+
+INDEX_PARAMS = {
+    "nlist": int(os.getenv("FAISS_IVF_NLIST", "256")),          # IVF coarse clusters
+    "pq_m": int(os.getenv("FAISS_PQ_M", "48")),                 # PQ sub-quantizers (must divide dim)
+    "pq_nbits": int(os.getenv("FAISS_PQ_NBITS", "8")),          # bits per PQ code
+    "hnsw_m": int(os.getenv("FAISS_HNSW_M", "32")),             # HNSW graph degree
+    "ef_construction": int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", "200")),
+}
+
+SEARCH_PARAMS = {
+    "nprobe": int(os.getenv("FAISS_IVF_NPROBE", "16")),         # IVF clusters visited per query
+    "ef_search": int(os.getenv("FAISS_HNSW_EF_SEARCH", "64")),  # HNSW candidate list size
+}
+
+
+def build_index(vectors: np.ndarray, index_type: str = INDEX_TYPE, **params) -> faiss.Index:
+    """
+    Train (if needed) and fill a FAISS index of the requested type (L2 metric).
+    IVF list counts and PQ code sizes are clamped to what the corpus can train.
+    """
+    try:
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+
+        p = {**INDEX_PARAMS, **params}
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        n, dim = vectors.shape
+
+        if index_type == "flat":
+            index = faiss.IndexFlatL2(dim)
+        elif index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, p["hnsw_m"])
+            index.hnsw.efConstruction = p["ef_construction"]
+        else:
+            # FAISS wants ~39 training points per list
+            nlist = max(1, min(p["nlist"], n // 39))
+            quantizer = faiss.IndexFlatL2(dim)
+            if index_type == "ivf_flat":
+                index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+            else:
+                if dim % p["pq_m"]:
+                    raise ValueError(f"pq_m={p['pq_m']} must divide the embedding dimension {dim}")
+                nbits = min(p["pq_nbits"], max(1, int(np.log2(max(n, 2)))))
+                index = faiss.IndexIVFPQ(quantizer, dim, nlist, p["pq_m"], nbits)
+            index.train(vectors)
+
+        index.add(vectors)
+        apply_search_params(index)
+        logger.info(f"🧱 Built {index_type} index with {index.ntotal} vectors")
+        return index
+
+    except Exception as e:
+        logger.error(f"Index build failed: {e}")
+        raise CustomException("FAISS index build failed", e)
+
+
+def index_kind(index) -> str:
+    """Map a FAISS index object back to its INDEX_TYPES name."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSWFlat):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    return "flat"
+
+
+def supports_removal(index) -> bool:
+    """
+    Only flat indexes compact their positions on remove_ids, which is what the
+    LangChain FAISS docstore mapping assumes; other types are rebuilt instead.
+    """
+    return index_kind(index) == "flat"
+
+
+def apply_search_params(index, nprobe: int = None, ef_search: int = None):
+    """Set query-time knobs (nprobe for IVF, efSearch for HNSW)."""
+    kind = index_kind(index)
+    if kind in ("ivf_flat", "ivf_pq"):
+        faiss.extract_index_ivf(index).nprobe = nprobe or SEARCH_PARAMS["nprobe"]
+    elif kind == "hnsw":
+        faiss.downcast_index(index).hnsw.efSearch = ef_search or SEARCH_PARAMS["ef_search"]
+
+
+def index_memory_bytes(index) -> int:
+    """Serialized size of the index, a close proxy for its resident memory."""
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def make_vector_store(embeddings, vectors, texts: list, metadatas: list, ids: list,
+                      index_type: str = INDEX_TYPE, **params) -> FAISS:
+    """LangChain FAISS store backed by an index of the configured type."""
+    index = build_index(np.asarray(vectors, dtype=np.float32), index_type, **params)
+    docstore = InMemoryDocstore({
+        doc_id: Document(page_content=text, metadata=meta)
+        for doc_id, text, meta in zip(ids, texts, metadatas)
+    })
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
+
+
+def filtered_search_params(index, selector):
+    """
+    SearchParameters restricting a search to `selector`, carrying over the
+    index's current nprobe / efSearch (FAISS resets them otherwise).
+    """
+    kind = index_kind(index)
+    if kind in ("ivf_flat", "ivf_pq"):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=faiss.extract_index_ivf(index).nprobe)
+    if kind == "hnsw":
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=faiss.downcast_index(index).hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
@@ -0,0 +1,226 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+# --------------------------------------------------------------------------
+# Defaults
+# --------------------------------------------------------------------------
+VECTOR_DB_DIR = os.path.join("artifacts", "VECTOR_DB")
+
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512"))
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+
+# Seconds an answer stays valid, per source. Sources not listed are never cached.
+# RAG answers additionally expire as soon as the FAISS index on disk changes.
+SOURCE_TTLS = {
+    "Weather": 300,
+    "Tavily": 3600,
+    "GitHub": 3600,
+    "Analytics": 600,
+    "RAG": 24 * 3600,
+}
+
+# Log levels as users write them → canonical level
+LEVEL_WORDS = {
+    "error": "ERROR", "errors": "ERROR",
+    "warning": "WARNING", "warnings": "WARNING", "warn": "WARNING",
+    "debug": "DEBUG",
+    "info": "INFO",
+    "fatal": "FATAL",
+}
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+# IPv4 addresses stay whole; everything else splits into word tokens
+_TOKEN_RE = re.compile(r"\d{1,3}(?:\.\d{1,3}){3}|\w+")
+_SERVICE_TOKEN_RE = re.compile(r"^service\w+$")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = _PUNCT_RE.sub(" ", query.lower())
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def entity_tokens(query: str) -> frozenset:
+    """
+    Tokens a semantic hit must share with the cached query: service names,
+    log levels (canonical, so "errors" == "error") and anything with a digit
+    (request IDs, users, IPs, time windows). Embeddings barely move when only
+    these change, e.g. "errors in ServiceA" vs "errors in ServiceB".
+    """
+    entities = set()
+    for token in _TOKEN_RE.findall(query.lower()):
+        if token in LEVEL_WORDS:
+            entities.add(LEVEL_WORDS[token])
+        elif _SERVICE_TOKEN_RE.match(token) or any(ch.isdigit() for ch in token):
+            entities.add(token)
+    return frozenset(entities)
+
+
+def index_version(index_dir: str = VECTOR_DB_DIR) -> float:
+    """Latest modification time of the files in the vector store folder."""
+    try:
+        return max(
+            (entry.stat().st_mtime for entry in os.scandir(index_dir) if entry.is_file()),
+            default=0.0,
+        )
+    except FileNotFoundError:
+        return 0.0
+
+
+class SemanticAnswerCache:
+    """
+    Bounded LRU cache for final chatbot answers.
+    - Exact lookup on the normalized query text
+    - Nearest-neighbour lookup on query embeddings above a similarity threshold,
+      accepted only when both queries name the same entities (see entity_tokens)
+    - Per-source TTLs; RAG entries are dropped when the FAISS index is rebuilt
+    """
+
+    def __init__(self, max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+                 similarity_threshold: float = ANSWER_CACHE_SIMILARITY,
+                 ttls: dict = None, index_dir: str = VECTOR_DB_DIR):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.ttls = dict(SOURCE_TTLS if ttls is None else ttls)
+        self.index_dir = index_dir
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._matrix_keys = []
+        self._matrix_dirty = True
+
+        self.stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+            "entity_mismatches": 0,
+        }
+
+    # ----------------------------------------------------------------------
+    def _is_stale(self, entry: dict, now: float) -> bool:
+        if entry["expires_at"] <= now:
+            self.stats["expirations"] += 1
+            return True
+        if entry["source"] == "RAG" and entry["index_version"] != index_version(self.index_dir):
+            self.stats["invalidations"] += 1
+            return True
+        return False
+
+    def _drop(self, key: str):
+        self._entries.pop(key, None)
+        self._matrix_dirty = True
+
+    def _rebuild_matrix(self):
+        keys = [k for k, e in self._entries.items() if e["vector"] is not None]
+        self._matrix_keys = keys
+        self._matrix = np.stack([self._entries[k]["vector"] for k in keys]) if keys else None
+        self._matrix_dirty = False
+
+    # ----------------------------------------------------------------------
+    def get(self, query: str):
+        """Exact lookup on the normalized query. Returns the entry or None."""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_stale(entry, now):
+                self._drop(key)
+                entry = None
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.stats["exact_hits"] += 1
+            return entry
+
+    def get_similar(self, query: str, query_vector):
+        """
+        Nearest cached query by cosine similarity whose entity tokens match
+        `query`'s. Counts a miss when nothing qualifies.
+        """
+        now = time.time()
+        entities = entity_tokens(query)
+        with self._lock:
+            if query_vector is not None and self._entries:
+                if self._matrix_dirty:
+                    self._rebuild_matrix()
+                if self._matrix is not None:
+                    vec = self._unit(query_vector)
+                    sims = self._matrix @ vec
+                    for idx in np.argsort(-sims):
+                        if sims[idx] < self.similarity_threshold:
+                            break
+                        key = self._matrix_keys[idx]
+                        entry = self._entries.get(key)
+                        if entry is None:
+                            continue
+                        if self._is_stale(entry, now):
+                            self._drop(key)
+                            continue
+                        if entry["entities"] != entities:
+                            self.stats["entity_mismatches"] += 1
+                            continue
+                        self._entries.move_to_end(key)
+                        self.stats["semantic_hits"] += 1
+                        logger.info(f"🎯 Semantic cache hit (similarity={float(sims[idx]):.4f})")
+                        return entry
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, query: str, result: str, source: str, query_vector=None):
+        """Store an answer if its source is cacheable."""
+        ttl = self.ttls.get(source)
+        if not ttl or not result:
+            return
+        key = normalize_query(query)
+        entry = {
+            "result": result,
+            "source": source,
+            "expires_at": time.time() + ttl,
+            "index_version": index_version(self.index_dir) if source == "RAG" else None,
+            "vector": self._unit(query_vector) if query_vector is not None else None,
+            "entities": entity_tokens(query),
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+            self._matrix_dirty = True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix_dirty = True
+
+    def snapshot(self) -> dict:
+        """Counters plus current size, for monitoring."""
+        with self._lock:
+            hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+            lookups = hits + self.stats["misses"]
+            return {
+                **self.stats,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+    @staticmethod
+    def _unit(vector):
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
@@ -1,18 +1,44 @@
 import os
-import csv
 import time
 import re
 import asyncio
+import threading
+import contextvars
 import numpy as np
-from datetime import datetime
+from contextlib import AsyncExitStack
 
 from groq import Groq
 from sklearn.metrics.pairwise import cosine_similarity
-from langgraph.graph import StateGraph
+from langgraph.graph import StateGraph, END
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import HuggingFaceEmbeddings
 
-from src.MCP_tools import tavily_search_summary, search_github_code, get_weather
+from src.MCP_tools import (
+    tavily_search_summary_async,
+    search_github_code_async,
+    get_weather_async,
+    geocode_city_async,
+    tool_cache,
+    cache_key,
+    TOOL_CACHE_TTLS,
+)
+from src.answer_cache import SemanticAnswerCache
+from src.feedback_store import FeedbackStore
+from src.context_budget import ContextBudgeter, CONTEXT_BUDGET_ENABLED, CONTEXT_FETCH_K
+from src.ann_index import apply_search_params, index_kind
+from src.log_analytics import LogAnalyticsEngine
+from src.admission import (
+    REQUEST_DEADLINE_S, limiters, request_deadline, deadline_exceeded, deadline_at_var, time_remaining,
+    OverloadedError, DeadlineExceeded,
+)
+from src.hybrid_retriever import HybridRetriever, InvertedIndex, build_lexical_index
+from src.metadata_filter import MetadataIndex
+from src.query_batcher import MicroBatcher
+from src.tool_schemas import TOOL_SCHEMAS, parse_tool_call
+from src.metrics import (
+    NODE_LATENCY, RETRIEVER_LATENCY, LLM_LATENCY, track, record_error, record_route, record_llm_usage,
+    record_context,
+)
 from src.logger import get_logger
 from src.custom_exception import CustomException
 
@@ -25,58 +51,335 @@ logger = get_logger(__name__)
 # Paths and constants
 # --------------------------------------------------------------------------
 VECTOR_DB_DIR = os.path.join("artifacts", "VECTOR_DB")
-FEEDBACK_PATH = os.path.join("artifacts", "feedback_log.csv")
 os.makedirs("artifacts", exist_ok=True)
 
-INTENT_CONFIDENCE_THRESHOLD = 0.5
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.5"))
+# "classify": embedding classifier with LLM fallback (tool arguments not extracted)
+# "tools": one function-calling request picks the tool and its arguments
+ROUTER_MODE = os.getenv("ROUTER_MODE", "classify").lower()
+# Pass tool output through the LLM for phrasing ("false" returns it raw)
+REFINE_TOOL_RESULTS = os.getenv("REFINE_TOOL_RESULTS", "true").lower() in ("1", "true", "yes")
+DEFAULT_COORDS = (12.97, 77.59)  # Bangalore, when no location is given
+# Start RAG retrieval alongside intent classification; kept if the route is RAG
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "true").lower() in ("1", "true", "yes")
 TOP_K_RETRIEVAL = 3
+REFINE_CACHE_TTLS = {**TOOL_CACHE_TTLS, "analytics": 3600}
 GROQ_MODEL = "llama-3.3-70b-versatile"
+INTENTS = ["Weather", "Tavily", "GitHub", "Analytics", "RAG"]
+
+# Exemplar queries per intent. Their embeddings are computed once at startup
+# and every incoming query is scored against them locally; only queries whose
+# best score falls under INTENT_CONFIDENCE_THRESHOLD are sent to the LLM.
+INTENT_EXEMPLARS = {
+    "Weather": [
+        "what is the weather today",
+        "current temperature in the city",
+        "will it rain tomorrow",
+        "how hot is it outside",
+        "weather forecast for bangalore",
+        "what is the wind speed right now",
+    ],
+    "Tavily": [
+        "who is the CEO of the company",
+        "latest news about artificial intelligence",
+        "what is kubernetes",
+        "explain the history of the internet",
+        "search the web for cloud run pricing",
+        "what happened in the world today",
+    ],
+    "GitHub": [
+        "show me a python script to parse json",
+        "github repository for fastapi examples",
+        "code example for reading a csv file",
+        "sample code for retry with exponential backoff",
+        "find a repo that implements a rate limiter",
+        "how to write a python function to sort a list",
+    ],
+    "Analytics": [
+        "how many errors in ServiceA",
+        "how many ERRORs did ServiceA log today",
+        "p95 TimeTaken per service",
+        "average response time for ServiceB",
+        "count of warnings by service",
+        "error trend over the last hour",
+        "which service has the most fatal logs",
+        "median time taken by log level",
+    ],
+    "RAG": [
+        "show the error logs for ServiceA",
+        "show the warning logs for ServiceB",
+        "which requests took the longest time",
+        "what errors did User17 encounter",
+        "summarize the log data",
+        "find the log entry for request id 6743",
+        "what is our internal policy on incident response",
+    ],
+}
 
 # --------------------------------------------------------------------------
-# Embeddings and retriever
+# Heavy resources — populated by load_resources(), not at import time
 # --------------------------------------------------------------------------
-try:
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    vectorstore = FAISS.load_local(VECTOR_DB_DIR, embeddings, allow_dangerous_deserialization=True)
-    retriever = vectorstore.as_retriever(search_kwargs={"k": TOP_K_RETRIEVAL})
-    logger.info("✅ FAISS retriever loaded successfully.")
-except Exception as e:
-    logger.error(f"❌ Failed to load FAISS retriever: {e}")
-    retriever = None
-
-# --------------------------------------------------------------------------
-# Groq client (optional)
-# --------------------------------------------------------------------------
-try:
-    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-    logger.info("✅ Groq client initialized.")
-except Exception as e:
-    logger.error(f"❌ Groq init failed: {e}")
-    client = None
+embeddings = None
+vectorstore = None
+retriever = None
+client = None
+router = None
+analytics = None
 
 # --------------------------------------------------------------------------
 # Latency helper
 # --------------------------------------------------------------------------
-async def measure_latency(coro, label: str, *args, **kwargs):
+async def measure_latency(coro, label: str, *args, timings: dict = None, **kwargs):
     start = time.perf_counter()
     result = await coro(*args, **kwargs)
     ms = round((time.perf_counter() - start) * 1000, 2)
     logger.info(f"⏱️ {label} completed in {ms} ms")
+    if timings is not None:
+        timings[label] = ms
     return result
+
+
+def record_timing(state: dict, label: str, start: float):
+    """Store elapsed ms since `start` under state['timings'][label]."""
+    state.setdefault("timings", {})[label] = round((time.perf_counter() - start) * 1000, 2)
+
+# --------------------------------------------------------------------------
+# Query embedding, micro-batched across concurrent requests
+# --------------------------------------------------------------------------
+# embed_documents encodes the whole batch in one call; for MiniLM it returns
+# the same vectors as embed_query
+query_embedder = MicroBatcher("query_embedding", lambda texts: embeddings.embed_documents(texts))
+
+
+async def embed_query_async(query: str):
+    with track(RETRIEVER_LATENCY, "retriever", stage="embed"):
+        return await query_embedder.submit(query)
+
+# --------------------------------------------------------------------------
+# Streaming helpers
+# --------------------------------------------------------------------------
+def emit(state: dict, event: str, data):
+    """Push an event to the stream consumer, if this run is being streamed."""
+    queue = state.get("stream_queue")
+    if queue is not None:
+        queue.put_nowait((event, data))
+
+
+def emit_route_metadata(state: dict):
+    emit(state, "meta", {
+        "source": state.get("source"),
+        "intent": state.get("intent"),
+        "route_method": state.get("route_method"),
+        "route_confidence": state.get("route_confidence"),
+    })
+
+
+# --------------------------------------------------------------------------
+# Groq calls
+# --------------------------------------------------------------------------
+def llm_timeout() -> dict:
+    """Groq request timeout from the time left on the request's deadline (client default outside one)."""
+    remaining = time_remaining()
+    return {} if remaining is None else {"timeout": max(remaining, 1.0)}
+
+
+async def generate(prompt: str, max_tokens: int, state: dict, purpose: str = "answer") -> str:
+    """
+    Groq completion for the answer-producing calls.
+    When the run is streamed, tokens are requested with stream=True and pushed
+    to the consumer as they arrive; the full text is returned either way.
+    `purpose` labels the call's latency and token metrics.
+    """
+    queue = state.get("stream_queue")
+    if queue is None:
+        def _call_groq():
+            with track(LLM_LATENCY, "llm", model=GROQ_MODEL, purpose=purpose):
+                return client.chat.completions.create(
+                    model=GROQ_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0,
+                    max_tokens=max_tokens,
+                    **llm_timeout(),
+                )
+
+        resp = await limiters["llm"].run_in_thread(_call_groq)
+        record_llm_usage(GROQ_MODEL, purpose, getattr(resp, "usage", None))
+        return resp.choices[0].message.content.strip()
+
+    loop = asyncio.get_running_loop()
+
+    def _stream_groq():
+        parts, usage = [], None
+        with track(LLM_LATENCY, "llm", model=GROQ_MODEL, purpose=purpose):
+            stream = client.chat.completions.create(
+                model=GROQ_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0,
+                max_tokens=max_tokens,
+                stream=True,
+                **llm_timeout(),
+            )
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    loop.call_soon_threadsafe(queue.put_nowait, ("token", delta))
+                # Groq reports usage on the final chunk under x_groq
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+        return "".join(parts), usage
+
+    text, usage = await limiters["llm"].run_in_thread(_stream_groq)
+    record_llm_usage(GROQ_MODEL, purpose, usage)
+    state["streamed"] = True
+    return text.strip()
 # --------------------------------------------------------------------------
-# 🚀 LLM-Only Semantic Router 
+# 🚀 Embedding Router with LLM fallback
 # --------------------------------------------------------------------------
 class SemanticRouter:
-    def __init__(self, _embeddings, _retriever):
+    def __init__(self, _embeddings, _retriever, _analytics=None):
         self.embeddings = _embeddings
         self.retriever = _retriever
-        logger.info("✅ Router initialized: LLM-only intent classification mode")
+        self.analytics = _analytics
+        self.exemplar_vectors = None
+        self.exemplar_intents = []
+        self.stats = {"embedding": 0, "llm_fallback": 0, "embedding_unavailable": 0, "llm_unavailable": 0, "tool_call": 0}
+        self.confidence_total = 0.0
+        self.speculation_stats = {"started": 0, "hits": 0, "misses": 0, "saved_ms": 0.0}
+
+        if self.embeddings is not None:
+            try:
+                texts = []
+                for intent, examples in INTENT_EXEMPLARS.items():
+                    texts.extend(examples)
+                    self.exemplar_intents.extend([intent] * len(examples))
+                self.exemplar_vectors = np.array(self.embeddings.embed_documents(texts), dtype=np.float32)
+                logger.info(f"✅ Router initialized: embedding mode ({len(texts)} exemplars, threshold={INTENT_CONFIDENCE_THRESHOLD})")
+            except Exception as e:
+                logger.error(f"❌ Exemplar embedding failed, using LLM-only routing: {e}")
+                self.exemplar_vectors = None
+        else:
+            logger.info("✅ Router initialized: LLM-only intent classification mode")
+
+    # ----------------------------------------------------------------------
+    # ⚡ Step 1a: Local embedding classifier (no network round-trip)
+    # ----------------------------------------------------------------------
+    def score_intents(self, query_vector) -> dict:
+        """Best cosine similarity of the query against each intent's exemplars."""
+        sims = cosine_similarity(np.asarray(query_vector, dtype=np.float32).reshape(1, -1), self.exemplar_vectors)[0]
+        scores = {}
+        for intent, sim in zip(self.exemplar_intents, sims):
+            if sim > scores.get(intent, -1.0):
+                scores[intent] = float(sim)
+        return scores
+
+    async def embedding_guess(self, query: str, query_vector=None) -> tuple:
+        """Best (intent, confidence) from the exemplar embeddings."""
+        if query_vector is None:
+            async with limiters["retriever"].slot():
+                query_vector = await embed_query_async(query)
+        scores = self.score_intents(query_vector)
+        best_intent = max(scores, key=scores.get)
+        return best_intent, round(scores[best_intent], 4)
+
+    async def classify_intent(self, query: str, query_vector=None) -> tuple:
+        """
+        Classify with exemplar embeddings; fall back to the LLM only when the
+        top score is under INTENT_CONFIDENCE_THRESHOLD.
+        Returns (intent, confidence, method).
+        """
+        if self.exemplar_vectors is None:
+            # No exemplar embeddings (model failed to load): every query goes to the LLM
+            self.stats["embedding_unavailable"] += 1
+            return await self.classify_intent_with_llm(query), None, "llm"
+
+        best_intent, confidence = await self.embedding_guess(query, query_vector)
+
+        if confidence >= INTENT_CONFIDENCE_THRESHOLD:
+            self.stats["embedding"] += 1
+            self.confidence_total += confidence
+            logger.info(f"⚡ Embedding classified → {best_intent} (confidence={confidence})")
+            return best_intent, confidence, "embedding"
+
+        self.stats["llm_fallback"] += 1
+        logger.info(f"🤔 Low confidence ({confidence} for {best_intent}); asking LLM")
+        return await self.classify_intent_with_llm(query), confidence, "llm"
+
+    def routing_stats(self) -> dict:
+        """Routing decision counters, e.g. to see how many LLM calls were saved."""
+        total = sum(self.stats.values())
+        embedding_hits = self.stats["embedding"]
+        return {
+            **self.stats,
+            "total": total,
+            "llm_calls_saved": embedding_hits,
+            "embedding_hit_rate": round(embedding_hits / total, 4) if total else 0.0,
+            "avg_embedding_confidence": round(self.confidence_total / embedding_hits, 4) if embedding_hits else None,
+            "threshold": INTENT_CONFIDENCE_THRESHOLD,
+            "mode": ROUTER_MODE,
+            "speculation": self.speculation_snapshot(),
+        }
+
+    def speculation_snapshot(self) -> dict:
+        """Speculative retrieval hit rate and latency it took off the critical path."""
+        spec = self.speculation_stats
+        decided = spec["hits"] + spec["misses"]
+        return {
+            "enabled": SPECULATIVE_RETRIEVAL,
+            **spec,
+            "saved_ms": round(spec["saved_ms"], 2),
+            "hit_rate": round(spec["hits"] / decided, 4) if decided else 0.0,
+            "avg_saved_ms_per_hit": round(spec["saved_ms"] / spec["hits"], 2) if spec["hits"] else 0.0,
+        }
 
     # ----------------------------------------------------------------------
-    # 🧠 Step 1: LLM decides which tool to use
+    # 🔮 Speculative retrieval (runs while the intent is being classified)
+    # ----------------------------------------------------------------------
+    async def _retrieve(self, query: str, query_vector=None, timing: dict = None) -> list:
+        if timing is not None:
+            timing["start"] = time.perf_counter()
+        async with limiters["retriever"].slot():
+            with track(RETRIEVER_LATENCY, "retriever", stage="retrieve"):
+                docs = await self.retriever.ainvoke(query, query_vector)
+        if timing is not None:
+            timing["end"] = time.perf_counter()
+        return docs
+
+    def _start_speculation(self, state: dict):
+        """
+        Launch retrieval as a task. When classification finishes without
+        yielding (confident embedding match on a precomputed vector) the task
+        has not run yet, so cancelling it on a non-RAG route costs nothing.
+        """
+        if not SPECULATIVE_RETRIEVAL or self.retriever is None:
+            return None
+        timing = {}
+        task = asyncio.create_task(self._retrieve(state["query"], state.get("query_vector"), timing))
+        self.speculation_stats["started"] += 1
+        return task, timing
+
+    async def _use_speculation(self, speculation, classified_at: float) -> list:
+        task, timing = speculation
+        docs = await task
+        # Overlap between retrieval and classification = time saved
+        if timing.get("start") is not None:
+            overlap = min(timing["end"], classified_at) - timing["start"]
+            self.speculation_stats["saved_ms"] += max(0.0, overlap) * 1000
+        self.speculation_stats["hits"] += 1
+        return docs
+
+    def _discard_speculation(self, speculation):
+        task, _ = speculation
+        if task.done():
+            if not task.cancelled():
+                task.exception()  # mark as retrieved; the error is irrelevant now
+        else:
+            task.cancel()
+
+    # ----------------------------------------------------------------------
+    # 🧠 Step 1b: LLM decides which tool to use (low-confidence fallback)
     # ----------------------------------------------------------------------
     async def classify_intent_with_llm(self, query: str) -> str:
-        """Always classify using LLM — no embedding scoring."""
+        """Classify using the LLM — used when embedding confidence is low."""
         if not client:
             logger.warning("⚠️ Groq client missing; fallback to RAG.")
             return "RAG"
@@ -85,29 +388,33 @@ class SemanticRouter:
             prompt = (
                 "You are an intelligent routing assistant.\n"
                 "Classify the user's query into exactly ONE category from this list:\n"
-                "[Weather, Tavily, GitHub, RAG].\n\n"
+                "[Weather, Tavily, GitHub, Analytics, RAG].\n\n"
                 "Rules:\n"
                 "- Use 'Weather' for temperature, rain, or city climate queries.\n"
                 "- Use 'Tavily' for general knowledge or web information.\n"
                 "- Use 'GitHub' for coding, repositories, or script examples.\n"
+                "- Use 'Analytics' for counts, percentiles, averages or trends over the logs.\n"
                 "- Use 'RAG' for internal policy, logs, or documentation queries.\n\n"
                 f"User Query: {query}\n\n"
                 "Return only the category name (no explanation)."
             )
 
             def _call_llm():
-                return client.chat.completions.create(
-                    model=GROQ_MODEL,
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0,
-                    max_tokens=20,
-                )
+                with track(LLM_LATENCY, "llm", model=GROQ_MODEL, purpose="classify"):
+                    return client.chat.completions.create(
+                        model=GROQ_MODEL,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=0,
+                        max_tokens=20,
+                        **llm_timeout(),
+                    )
 
-            resp = await asyncio.to_thread(_call_llm)
+            resp = await limiters["llm"].run_in_thread(_call_llm)
+            record_llm_usage(GROQ_MODEL, "classify", getattr(resp, "usage", None))
             answer = resp.choices[0].message.content.strip()
             logger.info(f"🧩 LLM classified → {answer}")
 
-            if answer not in ["Weather", "Tavily", "GitHub", "RAG"]:
+            if answer not in INTENTS:
                 return "RAG"
             return answer
 
@@ -115,70 +422,198 @@ class SemanticRouter:
             logger.error(f"LLM classification failed: {e}")
             return "RAG"
 
+    # ----------------------------------------------------------------------
+    # 🛠️ Step 1c: Function calling — tool and arguments in one LLM request
+    # ----------------------------------------------------------------------
+    async def select_tool(self, query: str, query_vector=None) -> tuple:
+        """
+        ROUTER_MODE=tools. Confident embedding matches for RAG/Analytics need
+        no arguments and skip the LLM; everything else is a single
+        function-calling request. Returns (intent, confidence, method, tool_args).
+        """
+        confidence = None
+        if self.exemplar_vectors is not None:
+            best_intent, confidence = await self.embedding_guess(query, query_vector)
+            if confidence >= INTENT_CONFIDENCE_THRESHOLD and best_intent in ("RAG", "Analytics"):
+                self.stats["embedding"] += 1
+                self.confidence_total += confidence
+                return best_intent, confidence, "embedding", {}
+
+        if not client:
+            self.stats["llm_unavailable"] += 1
+            logger.warning("⚠️ Groq client missing; fallback to RAG.")
+            return "RAG", confidence, "llm", {}
+
+        try:
+            def _call_llm():
+                with track(LLM_LATENCY, "llm", model=GROQ_MODEL, purpose="tool_call"):
+                    return client.chat.completions.create(
+                        model=GROQ_MODEL,
+                        messages=[
+                            {"role": "system", "content": "You route questions from system engineers to exactly one tool."},
+                            {"role": "user", "content": query},
+                        ],
+                        tools=TOOL_SCHEMAS,
+                        tool_choice="required",
+                        temperature=0,
+                        max_tokens=100,
+                        **llm_timeout(),
+                    )
+
+            resp = await limiters["llm"].run_in_thread(_call_llm)
+            record_llm_usage(GROQ_MODEL, "tool_call", getattr(resp, "usage", None))
+            intent, tool_args = parse_tool_call(resp.choices[0].message)
+            self.stats["tool_call"] += 1
+            logger.info(f"🛠️ LLM tool call → {intent} {tool_args}")
+            return intent, confidence, "tool_call", tool_args
+
+        except Exception as e:
+            logger.error(f"LLM tool selection failed: {e}")
+            return "RAG", confidence, "llm", {}
+
+    async def weather_for(self, tool_args: dict) -> str:
+        """Weather for explicit coordinates, a geocoded city, or DEFAULT_COORDS."""
+        if tool_args.get("latitude") is not None and tool_args.get("longitude") is not None:
+            return await get_weather_async(float(tool_args["latitude"]), float(tool_args["longitude"]))
+        city = tool_args.get("city")
+        if not city:
+            return await get_weather_async(*DEFAULT_COORDS)
+        place = await geocode_city_async(city)
+        if place is None:
+            return f"Could not find a location named '{city}'."
+        lat, lon, name = place
+        return f"{name}: {await get_weather_async(lat, lon)}"
+
     # ----------------------------------------------------------------------
     # 🧭 Step 2: Route query → correct MCP tool → optional refinement
     # ----------------------------------------------------------------------
     async def route(self, state: dict) -> dict:
-        """Route query using only LLM classifier."""
+        """
+        Route query using the embedding classifier (LLM on low confidence), or
+        with one function-calling request when ROUTER_MODE=tools.
+        """
+        speculation = None
         try:
             query = state["query"]
 
-            # Use LLM for routing
-            best_intent = await self.classify_intent_with_llm(query)
-            logger.info(f"🧭 Routed → {best_intent}")
+            classify_start = time.perf_counter()
+            speculation = self._start_speculation(state)
+            if ROUTER_MODE == "tools":
+                best_intent, confidence, method, tool_args = await self.select_tool(query, state.get("query_vector"))
+            else:
+                best_intent, confidence, method = await self.classify_intent(query, state.get("query_vector"))
+                tool_args = {}
+            classified_at = time.perf_counter()
+            record_timing(state, "classify", classify_start)
+            state["intent"] = best_intent
+            state["route_confidence"] = confidence
+            state["route_method"] = method
+            state["tool_args"] = tool_args
+            record_route(best_intent, method)
+            logger.info(f"🧭 Routed → {best_intent} via {method}")
+
+            if best_intent == "Analytics" and self.analytics is None:
+                logger.warning("⚠️ Analytics engine missing; fallback to RAG.")
+                best_intent = "RAG"
+
+            # The tool call may rewrite the question into search terms; the
+            # speculative retrieval used the original question
+            search_query = tool_args.get("query") or query
+            if speculation is not None and (best_intent != "RAG" or search_query != query):
+                self._discard_speculation(speculation)
+                self.speculation_stats["misses"] += 1
+                speculation = None
 
             raw_result = None
+            tool_start = time.perf_counter()
 
             # Execute the corresponding tool
             if best_intent == "Weather":
-                raw_result = get_weather(12.97, 77.59)
+                raw_result = await self.weather_for(tool_args)
                 state["source"] = "Weather"
 
             elif best_intent == "Tavily":
-                raw_result = tavily_search_summary(query)
+                raw_result = await tavily_search_summary_async(tool_args.get("query") or query)
                 state["source"] = "Tavily"
 
             elif best_intent == "GitHub":
-                raw_result = search_github_code(query)
+                raw_result = await search_github_code_async(
+                    tool_args.get("query") or query, language=tool_args.get("language") or "python"
+                )
                 state["source"] = "GitHub"
 
+            elif best_intent == "Analytics":
+                # Exact aggregates from the columnar engine (milliseconds, no I/O)
+                raw_result = self.analytics.answer(tool_args.get("question") or query)
+                state["source"] = "Analytics"
+
             elif best_intent == "RAG":
                 if self.retriever:
-                    docs = await asyncio.to_thread(self.retriever.invoke, query)
-                    context = "\n".join([d.page_content for d in docs])
+                    if speculation is not None:
+                        docs = await self._use_speculation(speculation, classified_at)
+                        speculation = None
+                    elif search_query != query:
+                        docs = await self._retrieve(search_query)
+                    else:
+                        docs = await self._retrieve(query, state.get("query_vector"))
+                    if context_budgeter is not None:
+                        context, report = context_budgeter.assemble(search_query, docs)
+                        state["context_stats"] = report
+                        record_context(report)
+                        logger.info(f"✂️ Context: {report['selected']}/{report['candidates']} chunks, "
+                                    f"{report['context_tokens']} tokens ({report['tokens_saved']} saved)")
+                    else:
+                        context = "\n".join([d.page_content for d in docs])
                     state["context"] = context
                     state["source"] = "RAG"
+                    record_timing(state, "retrieval", tool_start)
                 else:
                     state["result"] = "Retriever not available."
                     state["source"] = "Error"
+                emit_route_metadata(state)
                 return state
             else:
                 state["result"] = "No valid route found."
                 state["source"] = "Unknown"
+                emit_route_metadata(state)
                 return state
 
+            record_timing(state, "tool", tool_start)
+            emit_route_metadata(state)
+
             # Optional LLM refinement (clarify response)
-            if client and raw_result and state["source"] in ["Weather", "Tavily", "GitHub"]:
+            refine = REFINE_TOOL_RESULTS and client and raw_result
+            if refine and state["source"] in ["Weather", "Tavily", "GitHub", "Analytics"]:
                 try:
-                    prompt = (
-                        "You are a helpful assistant. Improve clarity and tone of the result.\n\n"
-                        f"User Query: {query}\n"
-                        f"Tool Output: {raw_result}\n\n"
-                        "Refined Answer:"
-                    )
-
-                    def _call_refine():
-                        return client.chat.completions.create(
-                            model=GROQ_MODEL,
-                            messages=[{"role": "user", "content": prompt}],
-                            temperature=0,
-                            max_tokens=250,
+                    if state["source"] == "Analytics":
+                        prompt = (
+                            "You are an AI assistant for system engineers.\n"
+                            "Phrase the exact log statistics below as a short answer. "
+                            "Do not change, round or invent any numbers.\n\n"
+                            f"User Query: {query}\n"
+                            f"Statistics: {raw_result}\n\n"
+                            "Answer:"
+                        )
+                    else:
+                        prompt = (
+                            "You are a helpful assistant. Improve clarity and tone of the result.\n\n"
+                            f"User Query: {query}\n"
+                            f"Tool Output: {raw_result}\n\n"
+                            "Refined Answer:"
                         )
 
-                    resp = await asyncio.to_thread(_call_refine)
-                    state["result"] = resp.choices[0].message.content.strip()
+                    # Same tool output for the same question → reuse the refined answer
+                    refine_start = time.perf_counter()
+                    state["result"] = await tool_cache.get_or_call(
+                        "refine",
+                        (state["source"], cache_key(query), raw_result),
+                        lambda: generate(prompt, 250, state, purpose="refine"),
+                        ttl=REFINE_CACHE_TTLS[state["source"].lower()],
+                    )
+                    record_timing(state, "refine", refine_start)
                     logger.info(f"✨ LLM refinement applied for {state['source']}")
                 except Exception as e:
+                    record_error("refine", e)
                     logger.error(f"LLM refinement failed: {e}")
                     state["result"] = raw_result
             else:
@@ -186,82 +621,177 @@ class SemanticRouter:
 
             return state
 
+        except OverloadedError:
+            raise
         except Exception as e:
+            record_error("router", e)
             logger.error(f"Router error: {e}")
             state["result"] = f"Router error: {e}"
             state["source"] = "Router Error"
             return state
-
-router = SemanticRouter(embeddings, retriever)
+        finally:
+            # Route failed or was cancelled (deadline) before using the speculation
+            if speculation is not None:
+                self._discard_speculation(speculation)
 
 # --------------------------------------------------------------------------
-# LangGraph Nodes
+# 🚦 Resource lifecycle: load once, warm up, report readiness
 # --------------------------------------------------------------------------
-async def router_node(state):
-    return await measure_latency(router.route, "Router", state)
+startup_state = {"loaded": False, "warmed": False, "errors": {}, "timings": {}}
+_load_lock = threading.Lock()
+_startup_task = None
 
-async def rag_llm_node(state):
-    """RAG → LLM generation."""
+
+def _timed_phase(label: str, fn):
+    start = time.perf_counter()
     try:
-        if state.get("source") != "RAG":
-            return state
+        return fn()
+    finally:
+        ms = round((time.perf_counter() - start) * 1000, 2)
+        startup_state["timings"][label] = ms
+        logger.info(f"🚦 Startup phase '{label}' took {ms} ms")
 
-        if not client:
-            state["result"] = "LLM not available."
-            return state
 
-        context = state.get("context", "")
-        prompt = (
-            "You are an AI assistant for system engineers.\n"
-            "Use the context below to answer accurately.\n\n"
-            f"Context:\n{context}\n\n"
-            f"Question: {state['query']}\n"
-            "Answer:"
-        )
+def load_resources() -> dict:
+    """Load embeddings, FAISS store, Groq client and router once (thread-safe)."""
+    global embeddings, vectorstore, retriever, client, router, analytics
 
-        def _call_groq():
-            return client.chat.completions.create(
-                model=GROQ_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0,
-                max_tokens=350,
+    with _load_lock:
+        if startup_state["loaded"]:
+            return startup_state
+
+        try:
+            embeddings = _timed_phase(
+                "embeddings", lambda: HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+            )
+            vectorstore = _timed_phase(
+                "vector_store",
+                lambda: FAISS.load_local(VECTOR_DB_DIR, embeddings, allow_dangerous_deserialization=True),
             )
+            apply_search_params(vectorstore.index)
+            # Older vector stores have no saved lexical index: build it from the docstore
+            lexical = _timed_phase(
+                "lexical_index",
+                lambda: InvertedIndex.load(VECTOR_DB_DIR) or build_lexical_index(vectorstore),
+            )
+            metadata = _timed_phase("metadata_index", lambda: MetadataIndex(vectorstore))
+            # Over-fetch when the context budgeter trims the candidates afterwards
+            retriever = HybridRetriever(vectorstore, lexical, metadata,
+                                        k=CONTEXT_FETCH_K if CONTEXT_BUDGET_ENABLED else TOP_K_RETRIEVAL)
+            logger.info(f"✅ Hybrid retriever loaded successfully ({index_kind(vectorstore.index)} index "
+                        f"+ BM25 + metadata filters).")
+        except Exception as e:
+            logger.error(f"❌ Failed to load FAISS retriever: {e}")
+            startup_state["errors"]["retriever"] = str(e)
+            retriever = None
+
+        try:
+            client = _timed_phase("groq_client", lambda: Groq(api_key=os.getenv("GROQ_API_KEY")))
+            logger.info("✅ Groq client initialized.")
+        except Exception as e:
+            logger.error(f"❌ Groq init failed: {e}")
+            startup_state["errors"]["groq_client"] = str(e)
+            client = None
+
+        try:
+            analytics = _timed_phase("analytics", LogAnalyticsEngine)
+        except Exception as e:
+            logger.error(f"❌ Analytics engine unavailable: {e}")
+            startup_state["errors"]["analytics"] = str(e)
+            analytics = None
+
+        router = _timed_phase("router", lambda: SemanticRouter(embeddings, retriever, analytics))
+        startup_state["loaded"] = True
+        return startup_state
 
-        resp = await measure_latency(asyncio.to_thread, "Groq LLM", _call_groq)
-        state["result"] = resp.choices[0].message.content.strip()
-        return state
-    except Exception as e:
-        logger.error(f"❌ RAG LLM error: {e}")
-        state["result"] = f"LLM error: {e}"
-        return state
 
+def warm_up(query: str = "how many errors in ServiceA"):
+    """Prime the embedding model and FAISS index with one query (no LLM call)."""
+    def _run():
+        if embeddings is not None:
+            embeddings.embed_query(query)
+        if retriever is not None:
+            retriever.invoke(query)
 
-async def feedback_node(state):
-    """Collect feedback."""
     try:
-        logger.info(f"📘 Source: {state.get('source')}")
-        print(f"\nAssistant: {state.get('result')}\n")
-        rating = input("Rate the answer (1-5): ").strip()
-        comment = input("Optional comment: ").strip()
-
-        is_new = not os.path.exists(FEEDBACK_PATH)
-        with open(FEEDBACK_PATH, "a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            if is_new:
-                writer.writerow(["timestamp", "source", "rating", "comment", "query"])
-            writer.writerow([
-                datetime.now().isoformat(),
-                state.get("source"),
-                rating,
-                comment,
-                state.get("query")
-            ])
-
-        logger.info("🗳️ Feedback saved.")
-        return state
+        _timed_phase("warm_up", _run)
+        startup_state["warmed"] = True
     except Exception as e:
-        logger.error(f"❌ Feedback error: {e}")
-        return state
+        logger.error(f"❌ Warm-up failed: {e}")
+        startup_state["errors"]["warm_up"] = str(e)
+
+
+def startup() -> dict:
+    """Full startup lifecycle: load resources, then warm up."""
+    _timed_phase("total", lambda: (load_resources(), warm_up()))
+    return startup_state
+
+
+def is_ready() -> bool:
+    """True once the retriever and LLM client are loaded and warmed up."""
+    return startup_state["warmed"] and retriever is not None and client is not None
+
+
+def startup_task() -> asyncio.Task:
+    """
+    The one startup() run for this event loop, started on first call (by the
+    lifespan, or lazily by the first request). Later callers get the same task.
+    """
+    global _startup_task
+    loop = asyncio.get_running_loop()
+    if _startup_task is None or _startup_task.get_loop() is not loop:
+        _startup_task = loop.create_task(asyncio.to_thread(startup))
+    return _startup_task
+
+
+async def ensure_resources():
+    """Wait for the shared startup task (background load, or lazy first use)."""
+    if startup_state["loaded"] and startup_state["warmed"]:
+        return
+    task = startup_task()
+    if not task.done():
+        # Shielded: a request that gives up (deadline, disconnect) must not cancel startup
+        await asyncio.shield(task)
+
+# --------------------------------------------------------------------------
+# LangGraph Nodes
+# --------------------------------------------------------------------------
+async def router_node(state):
+    with track(NODE_LATENCY, "node", node="Router"):
+        return await measure_latency(router.route, "Router", state, timings=state.setdefault("timings", {}))
+
+async def rag_llm_node(state):
+    """RAG → LLM generation."""
+    with track(NODE_LATENCY, "node", node="RAG_LLM"):
+        try:
+            if state.get("source") != "RAG":
+                return state
+
+            if not client:
+                state["result"] = "LLM not available."
+                return state
+
+            context = state.get("context", "")
+            prompt = (
+                "You are an AI assistant for system engineers.\n"
+                "Use the context below to answer accurately.\n\n"
+                f"Context:\n{context}\n\n"
+                f"Question: {state['query']}\n"
+                "Answer:"
+            )
+
+            state["result"] = await measure_latency(
+                generate, "Groq LLM", prompt, 350, state, purpose="rag", timings=state.setdefault("timings", {})
+            )
+            return state
+        except OverloadedError:
+            raise
+        except Exception as e:
+            record_error("rag_llm", e)
+            logger.error(f"❌ RAG LLM error: {e}")
+            state["result"] = f"LLM error: {e}"
+            return state
+
 
 # --------------------------------------------------------------------------
 # LangGraph Workflow
@@ -269,31 +799,179 @@ async def feedback_node(state):
 workflow = StateGraph(dict)
 workflow.add_node("Router", router_node)
 workflow.add_node("RAG_LLM", rag_llm_node)
-workflow.add_node("Feedback", feedback_node)
 
 workflow.set_entry_point("Router")
 
 workflow.add_conditional_edges(
     "Router",
-    lambda state: "RAG_LLM" if state.get("source") == "RAG" else "Feedback",
-    path_map={"RAG_LLM": "RAG_LLM", "Feedback": "Feedback"},
+    lambda state: "RAG_LLM" if state.get("source") == "RAG" else END,
+    path_map={"RAG_LLM": "RAG_LLM", END: END},
 )
-workflow.add_edge("RAG_LLM", "Feedback")
+workflow.add_edge("RAG_LLM", END)
 
 graph = workflow.compile()
 
 # --------------------------------------------------------------------------
 # Main
 # --------------------------------------------------------------------------
+answer_cache = SemanticAnswerCache()
+# Ratings arrive later via POST /feedback, keyed by the answer ID
+feedback_store = FeedbackStore()
+# Dedup + MMR + token budget between retrieval and generation (None: top-k joined as is)
+context_budgeter = ContextBudgeter() if CONTEXT_BUDGET_ENABLED else None
+
+UNCACHEABLE_PREFIXES = ("LLM error", "LLM not available", "Router error", "Retriever not available")
+
+
+async def lookup_cached_answer(query: str, timings: dict) -> tuple:
+    """
+    Exact then semantic answer-cache lookup.
+    Returns (cached_entry_or_None, query_vector); the query is embedded once and
+    the vector is reused for intent routing on a miss.
+    """
+    cached = answer_cache.get(query)
+    if cached:
+        logger.info(f"🎯 Answer cache hit ({cached['source']})")
+        return cached, None
+
+    query_vector = None
+    if embeddings is not None:
+        async with limiters["retriever"].slot():
+            query_vector = await measure_latency(embed_query_async, "embed", query, timings=timings)
+
+    return answer_cache.get_similar(query, query_vector), query_vector
+
+
+def store_answer(query: str, result_state: dict, query_vector=None):
+    result = result_state.get("result")
+    if isinstance(result, str) and not result.startswith(UNCACHEABLE_PREFIXES):
+        answer_cache.put(query, result, result_state.get("source"), query_vector)
+
+
+async def answer_async(query: str) -> dict:
+    """
+    Run one chatbot cycle for a given query (used in FastAPI or other apps).
+    Returns {"answer_id", "result", "source"}; the answer ID is what
+    POST /feedback rates. Raises OverloadedError when a limiter sheds the
+    request and DeadlineExceeded when it runs past REQUEST_DEADLINE_S.
+    """
+    try:
+        await ensure_resources()
+        async with limiters["chat"].slot(), request_deadline():
+            timings = {}
+            cached, query_vector = await lookup_cached_answer(query, timings)
+            if cached:
+                result_state = {"result": cached["result"], "source": cached["source"]}
+            else:
+                state = {"query": query, "query_vector": query_vector, "timings": timings}
+                result_state = await graph.ainvoke(state)
+                store_answer(query, result_state, query_vector)
+
+            source = result_state.get("source")
+            return {
+                "answer_id": feedback_store.register(query, source),
+                "result": result_state.get("result", "No response generated."),
+                "source": source,
+            }
+    except (OverloadedError, DeadlineExceeded):
+        raise
+    except Exception as e:
+        logger.error(f"❌ answer_async error: {e}")
+        return {"answer_id": None, "result": f"Error: {e}", "source": None}
+
+
 async def get_answer_async(query: str) -> str:
-    """Run one chatbot cycle for a given query (used in FastAPI or other apps)."""
+    """Answer text only (see answer_async)."""
+    return (await answer_async(query))["result"]
+
+
+async def admit_stream() -> AsyncExitStack:
+    """
+    Front-door admission for a streamed request, before any response is sent:
+    raises OverloadedError when the chat limiter sheds it. Pass the returned
+    stack to stream_answer_async, which releases the slot when the stream ends;
+    closing it again is a no-op.
+    """
+    await ensure_resources()
+    admission = AsyncExitStack()
+    await admission.enter_async_context(limiters["chat"].slot())
+    return admission
+
+
+async def stream_answer_async(query: str, admission: AsyncExitStack = None):
+    """
+    Run one chatbot cycle and yield (event, data) tuples as they happen:
+    - ("meta", {...})   route/source metadata, before any token
+    - ("token", str)    answer text as Groq produces it
+    - ("done", {...})   full result, per-stage timings (ms), RAG context stats and the answer ID
+    - ("error", {...})  failure; shed/deadline errors carry status and retry_after
+    `admission` is the slot taken by admit_stream; without it the slot is
+    acquired here and shedding is reported as an error event.
+    """
+    start = time.perf_counter()
+    timings = {}
     try:
-        state = {"query": query}
-        result_state = await graph.ainvoke(state)
-        return result_state.get("result", "No response generated.")
+        if admission is None:
+            admission = await admit_stream()
+        async with admission:
+            deadline = time.perf_counter() + REQUEST_DEADLINE_S
+            async with request_deadline():
+                cached, query_vector = await lookup_cached_answer(query, timings)
+            if cached:
+                yield "meta", {"source": cached["source"], "cached": True}
+                yield "token", cached["result"]
+                timings["total"] = round((time.perf_counter() - start) * 1000, 2)
+                yield "done", {"result": cached["result"], "source": cached["source"], "timings": timings,
+                               "answer_id": feedback_store.register(query, cached["source"])}
+                return
+
+            queue = asyncio.Queue()
+            state = {"query": query, "query_vector": query_vector, "timings": timings, "stream_queue": queue}
+
+            async def _run_graph():
+                try:
+                    return await graph.ainvoke(state)
+                finally:
+                    queue.put_nowait(None)
+
+            # The graph task runs outside request_deadline above; give its Groq calls the same deadline
+            context = contextvars.copy_context()
+            context.run(deadline_at_var.set, deadline)
+            task = asyncio.create_task(_run_graph(), context=context)
+            try:
+                while True:
+                    try:
+                        item = await asyncio.wait_for(queue.get(), max(deadline - time.perf_counter(), 0))
+                    except TimeoutError:
+                        raise deadline_exceeded(REQUEST_DEADLINE_S) from None
+                    if item is None:
+                        break
+                    yield item
+                result_state = await task
+            finally:
+                # Client went away mid-stream or the deadline passed: stop the rest of the graph
+                if not task.done():
+                    task.cancel()
+
+            result = result_state.get("result", "No response generated.")
+            if not result_state.get("streamed"):
+                # Tool output returned raw or an error message: send it in one piece
+                yield "token", result
+            store_answer(query, result_state, query_vector)
+
+            timings["total"] = round((time.perf_counter() - start) * 1000, 2)
+            source = result_state.get("source")
+            yield "done", {"result": result, "source": source, "timings": timings,
+                           "context": result_state.get("context_stats"),
+                           "answer_id": feedback_store.register(query, source)}
+
+    except OverloadedError as e:
+        yield "error", {"error": str(e), "status": e.status_code, "retry_after": e.retry_after}
+    except DeadlineExceeded as e:
+        yield "error", {"error": str(e), "status": 504}
     except Exception as e:
-        logger.error(f"❌ get_answer_async error: {e}")
-        return f"Error: {e}"
+        logger.error(f"❌ stream_answer_async error: {e}")
+        yield "error", {"error": str(e)}
 
 def get_answer(query: str) -> str:
     """Synchronous wrapper for get_answer_async."""
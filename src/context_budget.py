@@ -0,0 +1,203 @@
+import os
+import re
+from src.hybrid_retriever import tokenize, row_fields, field_key, NON_IDENTIFIER_FIELDS, TOP_K_RETRIEVAL
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+# --------------------------------------------------------------------------
+# Defaults
+# --------------------------------------------------------------------------
+CONTEXT_BUDGET_ENABLED = os.getenv("CONTEXT_BUDGET_ENABLED", "true").lower() in ("1", "true", "yes")
+# Candidates requested from the retriever before deduplication and MMR
+CONTEXT_FETCH_K = int(os.getenv("CONTEXT_FETCH_K", "12"))
+# About the size of the un-budgeted context: TOP_K_RETRIEVAL log rows of ~50 tokens
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "150"))
+CONTEXT_MAX_DOCS = int(os.getenv("CONTEXT_MAX_DOCS", str(TOP_K_RETRIEVAL)))
+# 1.0 = pure relevance order, lower values favour diversity
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))
+# Jaccard similarity of content tokens above which two chunks count as the same entry
+CONTEXT_NEAR_DUP_THRESHOLD = float(os.getenv("CONTEXT_NEAR_DUP_THRESHOLD", "0.9"))
+
+# No tokenizer for the Groq model is shipped; ~4 characters per token for English/log text
+CHARS_PER_TOKEN = 4
+# Shortest shared prefix/suffix treated as chunk overlap (RecursiveCharacterTextSplitter)
+MIN_CHUNK_OVERLAP = 20
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def is_noise_field(part: str) -> bool:
+    """A "Field: value" segment that differs between every row (CSV row index, timestamp)."""
+    fields = row_fields(part)
+    return bool(fields) and field_key(fields[0][0]) in NON_IDENTIFIER_FIELDS
+
+
+def content_signature(text: str) -> frozenset:
+    """
+    Content tokens of a chunk without the noise fields, so log rows that only
+    differ in row index and timestamp compare as equal. Request IDs, users,
+    IPs and durations are kept.
+    """
+    return frozenset(tokenize(" ".join(part for part in text.split(" | ") if not is_noise_field(part))))
+
+
+def distinguishing_fields(text: str, reference: str) -> str:
+    """"Field value" pairs of a row chunk that differ from `reference`, noise fields left out."""
+    reference_fields = dict(row_fields(reference))
+    return ", ".join(f"{field} {value}" for field, value in row_fields(text)
+                     if field_key(field) not in NON_IDENTIFIER_FIELDS and reference_fields.get(field) != value)
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def strip_overlap(previous: str, text: str, max_overlap: int = 400) -> str:
+    """Drop the prefix of `text` that repeats the end of `previous` (split-chunk overlap)."""
+    for size in range(min(len(previous), len(text), max_overlap), MIN_CHUNK_OVERLAP - 1, -1):
+        if previous.endswith(text[:size]):
+            return text[size:].lstrip()
+    return text
+
+
+def similar_note(timestamps: list, differences: list) -> str:
+    """
+    Annotation for a chunk standing in for folded near duplicates: their
+    count, time span and the fields in which each one differs.
+    """
+    note = f" [+{len(timestamps) - 1} similar entries"
+    known = sorted(t for t in timestamps if t)
+    if len(known) > 1:
+        note += f", {known[0]} to {known[-1]}"
+    differences = [d for d in differences if d]
+    if differences:
+        note += ": " + "; ".join(differences)
+    return note + "]"
+
+
+class ContextBudgeter:
+    """
+    Turns over-fetched retrieval results into the RAG prompt context:
+    1. exact duplicates (same normalized text) are dropped
+    2. near duplicates (same content apart from row index and timestamp) are
+       folded into the first occurrence, annotated with how many entries it
+       stands for and whatever fields of theirs differ
+    3. MMR (relevance = retrieval rank) picks relevant but mutually different
+       chunks until `token_budget` or `max_docs` is reached
+    Overlapping chunks of the same row are trimmed before packing.
+    """
+
+    def __init__(self, token_budget: int = CONTEXT_TOKEN_BUDGET, max_docs: int = CONTEXT_MAX_DOCS,
+                 mmr_lambda: float = CONTEXT_MMR_LAMBDA, near_dup_threshold: float = CONTEXT_NEAR_DUP_THRESHOLD):
+        self.token_budget = token_budget
+        self.max_docs = max_docs
+        self.mmr_lambda = mmr_lambda
+        self.near_dup_threshold = near_dup_threshold
+        self.stats = {
+            "requests": 0, "candidates": 0, "selected": 0, "exact_duplicates": 0, "near_duplicates": 0,
+            "candidate_tokens": 0, "baseline_tokens": 0, "context_tokens": 0, "tokens_saved": 0,
+        }
+
+    def _deduplicate(self, docs: list) -> tuple:
+        """
+        [(rank, doc, signature, timestamps, differences)] plus exact/near duplicate
+        counts; timestamps and differing fields cover the folded entries.
+        """
+        seen_text, kept = set(), []
+        exact = near = 0
+        for rank, doc in enumerate(docs):
+            normalized = _SPACE_RE.sub(" ", doc.page_content).strip().lower()
+            if normalized in seen_text:
+                exact += 1
+                continue
+            seen_text.add(normalized)
+
+            signature = content_signature(doc.page_content)
+            match = next((entry for entry in kept if jaccard(signature, entry[2]) >= self.near_dup_threshold), None)
+            timestamp = doc.metadata.get("timestamp")
+            if match is not None:
+                match[3].append(timestamp)
+                match[4].append(distinguishing_fields(doc.page_content, match[1].page_content))
+                near += 1
+                continue
+            kept.append([rank, doc, signature, [timestamp], []])
+        return kept, exact, near
+
+    def _mmr_order(self, entries: list) -> list:
+        """Entries in MMR selection order; relevance is the retrieval rank."""
+        n = len(entries)
+        relevance = {id(e): 1.0 - i / n for i, e in enumerate(entries)}
+        remaining, selected = list(entries), []
+        while remaining:
+            def score(entry):
+                redundancy = max((jaccard(entry[2], s[2]) for s in selected), default=0.0)
+                return self.mmr_lambda * relevance[id(entry)] - (1 - self.mmr_lambda) * redundancy
+            best = max(remaining, key=score)
+            selected.append(best)
+            remaining.remove(best)
+        return selected
+
+    def assemble(self, query: str, docs: list) -> tuple:
+        """
+        (context string, per-request report) for the retrieved `docs`.
+        Savings are measured against the un-budgeted context: the top
+        TOP_K_RETRIEVAL chunks joined as they come.
+        """
+        candidate_tokens = sum(estimate_tokens(d.page_content) for d in docs)
+        baseline_tokens = estimate_tokens("\n".join(d.page_content for d in docs[:TOP_K_RETRIEVAL]))
+        entries, exact, near = self._deduplicate(docs)
+
+        packed, used = [], 0
+        for rank, doc, _, timestamps, differences in self._mmr_order(entries):
+            if len(packed) >= self.max_docs:
+                break
+            text = doc.page_content
+            row_id = doc.metadata.get("row_id")
+            for _, other_doc, other_text in packed:
+                if row_id is not None and other_doc.metadata.get("row_id") == row_id:
+                    text = strip_overlap(other_text, text)
+            if len(timestamps) > 1:
+                text += similar_note(timestamps, differences)
+            tokens = estimate_tokens(text)
+            if used + tokens > self.token_budget:
+                if packed:
+                    continue  # a shorter chunk further down may still fit
+                text = text[:self.token_budget * CHARS_PER_TOKEN]
+                tokens = estimate_tokens(text)
+            packed.append((rank, doc, text))
+            used += tokens
+
+        # Present the chosen chunks in retrieval order
+        context = "\n".join(text for _, _, text in sorted(packed, key=lambda p: p[0]))
+        context_tokens = estimate_tokens(context)
+        report = {
+            "candidates": len(docs),
+            "selected": len(packed),
+            "exact_duplicates": exact,
+            "near_duplicates": near,
+            "candidate_tokens": candidate_tokens,
+            "baseline_tokens": baseline_tokens,
+            "context_tokens": context_tokens,
+            "tokens_saved": max(baseline_tokens - context_tokens, 0),
+        }
+        self.stats["requests"] += 1
+        for key, value in report.items():
+            self.stats[key] += value
+        return context, report
+
+    def snapshot(self) -> dict:
+        requests = self.stats["requests"]
+        return {
+            **self.stats,
+            "avg_tokens_saved": round(self.stats["tokens_saved"] / requests, 1) if requests else 0.0,
+            "token_budget": self.token_budget,
+            "max_docs": self.max_docs,
+            "mmr_lambda": self.mmr_lambda,
+        }
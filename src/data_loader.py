@@ -6,7 +6,80 @@ import pandas as pd
 
 logger = get_logger(__name__)
 
+# Rows per CSV chunk / lines per text chunk handed to the masking pipeline
+DEFAULT_CHUNKSIZE = 5000
+
+# File extension → reader. A reader takes (path, chunksize) and yields chunks:
+# DataFrames for tabular files, strings for text-like files.
+READERS = {}
+
+
+def register_reader(*extensions):
+    """Register a chunk reader for one or more file extensions."""
+    def decorator(func):
+        for ext in extensions:
+            READERS[ext.lower()] = func
+        return func
+    return decorator
+
+
+@register_reader(".csv")
+def read_csv_chunks(path: str, chunksize: int = DEFAULT_CHUNKSIZE):
+    """Yield DataFrame chunks of at most `chunksize` rows."""
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        yield chunk
+
+
+@register_reader(".txt", ".log")
+def read_text_chunks(path: str, chunksize: int = DEFAULT_CHUNKSIZE):
+    """Yield blocks of at most `chunksize` lines, streamed from disk."""
+    lines = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            lines.append(line)
+            if len(lines) >= chunksize:
+                yield "".join(lines)
+                lines = []
+    if lines:
+        yield "".join(lines)
+
+
+@register_reader(".pdf")
+def read_pdf_pages(path: str, chunksize: int = DEFAULT_CHUNKSIZE):
+    """Yield the extracted text of each PDF page."""
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(path)
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        if text:
+            yield text
+
+
+def iter_raw_files(raw_dir: str = RAW_DIR, chunksize: int = DEFAULT_CHUNKSIZE):
+    """
+    Lazily yield (file_name, chunk) for every supported file in raw_dir.
+    Only one chunk is held in memory at a time, whatever the export size.
+    """
+    try:
+        for file in sorted(os.listdir(raw_dir)):
+            reader = READERS.get(os.path.splitext(file)[1].lower())
+            if reader is None:
+                continue
+            path = os.path.join(raw_dir, file)
+            logger.info(f"Streaming {file} with {reader.__name__}")
+            for chunk in reader(path, chunksize):
+                yield file, chunk
+    except Exception as e:
+        logger.error(f"Error streaming raw files: {e}")
+        raise CustomException("Error while streaming raw files", e)
+
+
 def load_all_raw_files():
+    """
+    Load every raw CSV/TXT file fully into memory as (file_name, text).
+    Kept for small ad-hoc use; pipelines should use iter_raw_files.
+    """
     try:
         files = [f for f in os.listdir(RAW_DIR) if f.endswith(('.csv', '.txt'))]
         docs = []
@@ -0,0 +1,106 @@
+import os
+import sqlite3
+import hashlib
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+# --------------------------------------------------------------------------
+# Defaults
+# --------------------------------------------------------------------------
+EMBEDDING_CACHE_PATH = os.path.join("artifacts", "EMBEDDING_CACHE", "embeddings.sqlite")
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+# Encode on a multi-process pool (one worker per core) when at least this many
+# texts miss the cache; smaller deltas are not worth the pool start-up.
+EMBED_MULTI_PROCESS_MIN = int(os.getenv("EMBED_MULTI_PROCESS_MIN", "5000"))
+EMBED_MULTI_PROCESS = os.getenv("EMBED_MULTI_PROCESS", "true").lower() in ("1", "true", "yes")
+
+_SQLITE_BATCH = 500
+
+
+def content_key(model_name: str, text: str) -> str:
+    """Content address of one chunk under one embedding model."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    HuggingFace embeddings with batching and an on-disk content-addressed cache.
+    - Documents are looked up by sha256(model name + text); only misses are encoded
+    - Misses are encoded in `batch_size` batches, on all cores for large deltas
+    - Queries are never cached (they are embedded once per request anyway)
+    """
+
+    def __init__(self, model_name: str, batch_size: int = EMBED_BATCH_SIZE,
+                 multi_process: bool = EMBED_MULTI_PROCESS, cache_path: str = EMBEDDING_CACHE_PATH):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.multi_process = multi_process and (os.cpu_count() or 1) > 1
+        self.cache_path = cache_path
+        self._single = None
+        self._pool = None
+        self.stats = {"hits": 0, "misses": 0}
+
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.cache_path)
+
+    def _encoder(self, n_texts: int) -> HuggingFaceEmbeddings:
+        encode_kwargs = {"batch_size": self.batch_size}
+        if self.multi_process and n_texts >= EMBED_MULTI_PROCESS_MIN:
+            if self._pool is None:
+                self._pool = HuggingFaceEmbeddings(model_name=self.model_name, multi_process=True,
+                                                   encode_kwargs=encode_kwargs)
+            return self._pool
+        if self._single is None:
+            self._single = HuggingFaceEmbeddings(model_name=self.model_name, encode_kwargs=encode_kwargs)
+        return self._single
+
+    # ----------------------------------------------------------------------
+    def embed_documents(self, texts: list) -> list:
+        try:
+            keys = [content_key(self.model_name, t) for t in texts]
+            found = {}
+            with self._connect() as conn:
+                unique_keys = list(dict.fromkeys(keys))
+                for i in range(0, len(unique_keys), _SQLITE_BATCH):
+                    batch = unique_keys[i:i + _SQLITE_BATCH]
+                    marks = ",".join("?" * len(batch))
+                    for key, blob in conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", batch):
+                        found[key] = np.frombuffer(blob, dtype=np.float32)
+
+                missing = {k: t for k, t in zip(keys, texts) if k not in found}
+                if missing:
+                    vectors = self._encoder(len(missing)).embed_documents(list(missing.values()))
+                    rows = []
+                    for key, vec in zip(missing.keys(), vectors):
+                        arr = np.asarray(vec, dtype=np.float32)
+                        found[key] = arr
+                        rows.append((key, arr.tobytes()))
+                    conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+
+            hits = len(texts) - sum(1 for k in keys if k in missing)
+            self.stats["hits"] += hits
+            self.stats["misses"] += len(texts) - hits
+            if texts:
+                logger.info(f"🧮 Embedding cache: {hits}/{len(texts)} hits ({hits / len(texts):.1%}), "
+                            f"{len(missing)} encoded")
+            return [found[k].tolist() for k in keys]
+
+        except Exception as e:
+            logger.error(f"Cached embedding failed: {e}")
+            raise CustomException("Cached embedding failed", e)
+
+    def embed_query(self, text: str) -> list:
+        return self._encoder(1).embed_query(text)
+
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
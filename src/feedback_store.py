@@ -0,0 +1,167 @@
+import os
+import csv
+import uuid
+import sqlite3
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+# --------------------------------------------------------------------------
+# Defaults
+# --------------------------------------------------------------------------
+# .csv appends rows; .db/.sqlite writes to a `feedback` table
+FEEDBACK_PATH = os.getenv("FEEDBACK_PATH", os.path.join("artifacts", "feedback_log.csv"))
+FEEDBACK_FLUSH_SIZE = int(os.getenv("FEEDBACK_FLUSH_SIZE", "50"))
+FEEDBACK_FLUSH_INTERVAL_S = float(os.getenv("FEEDBACK_FLUSH_INTERVAL_S", "2"))
+# Pending ratings kept in memory if the disk falls behind; beyond this new ones are dropped
+FEEDBACK_MAX_BUFFER = int(os.getenv("FEEDBACK_MAX_BUFFER", "10000"))
+# Recent answers that can still be rated
+FEEDBACK_RECENT_ANSWERS = int(os.getenv("FEEDBACK_RECENT_ANSWERS", "10000"))
+
+FEEDBACK_FIELDS = ["timestamp", "source", "rating", "comment", "query", "answer_id"]
+
+
+class UnknownAnswerError(KeyError):
+    """The answer ID was never issued or has aged out of the recent-answers window."""
+
+
+class FeedbackStore:
+    """
+    Ratings collected off the request path.
+    - register() issues an answer ID and remembers (query, source) for it
+    - record() only appends to an in-memory buffer
+    - a background task flushes the buffer in batches (every `flush_interval_s`,
+      or as soon as `flush_size` ratings are pending) on a worker thread
+    """
+
+    def __init__(self, path: str = FEEDBACK_PATH, flush_size: int = FEEDBACK_FLUSH_SIZE,
+                 flush_interval_s: float = FEEDBACK_FLUSH_INTERVAL_S, max_buffer: int = FEEDBACK_MAX_BUFFER,
+                 recent_answers: int = FEEDBACK_RECENT_ANSWERS):
+        self.path = path
+        self.backend = "sqlite" if path.endswith((".db", ".sqlite")) else "csv"
+        self.flush_size = flush_size
+        self.flush_interval_s = flush_interval_s
+        self.max_buffer = max_buffer
+        self.recent_answers = recent_answers
+        self._answers = OrderedDict()
+        self._buffer = []
+        self._wakeup = None
+        self._task = None
+        self._stopping = False
+        self.stats = {"registered": 0, "recorded": 0, "written": 0, "flushes": 0, "dropped": 0, "errors": 0}
+
+    # ------------------------------------------------------------------
+    # Request path (no I/O)
+    # ------------------------------------------------------------------
+    def register(self, query: str, source: str) -> str:
+        answer_id = uuid.uuid4().hex
+        self._answers[answer_id] = (query, source)
+        while len(self._answers) > self.recent_answers:
+            self._answers.popitem(last=False)
+        self.stats["registered"] += 1
+        return answer_id
+
+    def record(self, answer_id: str, rating: int, comment: str = ""):
+        """Queue a rating for an issued answer ID; raises UnknownAnswerError otherwise."""
+        if answer_id not in self._answers:
+            raise UnknownAnswerError(answer_id)
+        if len(self._buffer) >= self.max_buffer:
+            self.stats["dropped"] += 1
+            logger.warning("Feedback buffer full; rating dropped.")
+            return
+        query, source = self._answers[answer_id]
+        self._buffer.append({
+            "timestamp": datetime.now().isoformat(),
+            "source": source,
+            "rating": rating,
+            "comment": comment,
+            "query": query,
+            "answer_id": answer_id,
+        })
+        self.stats["recorded"] += 1
+        if len(self._buffer) >= self.flush_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Background writer
+    # ------------------------------------------------------------------
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """
+        Stop the writer and flush whatever is still buffered. The writer is
+        woken and left to finish its current flush rather than cancelled,
+        which would drop a batch already handed to the worker thread.
+        """
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval_s)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        try:
+            await asyncio.to_thread(self._write, batch)
+            self.stats["written"] += len(batch)
+            self.stats["flushes"] += 1
+        except Exception as e:
+            # Keep the ratings for the next flush (bounded by max_buffer)
+            self.stats["errors"] += 1
+            self._buffer = (batch + self._buffer)[-self.max_buffer:]
+            logger.error(f"❌ Feedback flush failed ({len(batch)} ratings): {e}")
+
+    def _write(self, batch: list):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if self.backend == "sqlite":
+                self._write_sqlite(batch)
+            else:
+                self._write_csv(batch)
+        except Exception as e:
+            raise CustomException("Failed to write feedback", e)
+
+    def _write_csv(self, batch: list):
+        is_new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        fields = FEEDBACK_FIELDS
+        if not is_new:
+            # Older logs have no answer_id column; keep their layout
+            with open(self.path, newline="", encoding="utf-8") as f:
+                fields = next(csv.reader(f), FEEDBACK_FIELDS)
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            if is_new:
+                writer.writeheader()
+            writer.writerows(batch)
+
+    def _write_sqlite(self, batch: list):
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS feedback ({', '.join(FEEDBACK_FIELDS)})")
+            conn.executemany(
+                f"INSERT INTO feedback VALUES ({', '.join('?' * len(FEEDBACK_FIELDS))})",
+                [tuple(row[field] for field in FEEDBACK_FIELDS) for row in batch],
+            )
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "pending": len(self._buffer), "backend": self.backend, "path": self.path}
@@ -0,0 +1,294 @@
+import os
+import re
+import pickle
+import numpy as np
+from src.ann_index import filtered_search_params
+from src.query_batcher import MicroBatcher
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+LEXICAL_INDEX_FILE = "lexical_index.pkl"
+TOP_K_RETRIEVAL = 3
+FETCH_K = 20          # candidates taken from each retriever before fusion
+RRF_K = 60            # reciprocal-rank-fusion damping constant
+
+# IPv4 addresses stay whole; everything else splits into word tokens
+_TOKEN_RE = re.compile(r"\d{1,3}(?:\.\d{1,3}){3}|\w+")
+# Row fields whose values never identify a row for exact matching: the CSV's own
+# row index (6743 there is not request 6743) and timestamp fragments
+NON_IDENTIFIER_FIELDS = {"unnamed0", "timestamp"}
+# "Field: value" segment of a row chunk; pandas names unlabelled columns "Unnamed: N"
+_FIELD_RE = re.compile(r"^(Unnamed: \d+|[^:]+): (.*)$", re.S)
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def is_identifier(token: str) -> bool:
+    """Tokens like request IDs, user IDs and IPs: contain a digit, 3+ chars."""
+    return len(token) >= 3 and any(ch.isdigit() for ch in token)
+
+
+def field_key(field: str) -> str:
+    """Normalized field name: "RequestID" → "requestid", "Unnamed: 0" → "unnamed0"."""
+    return re.sub(r"\W", "", field.lower())
+
+
+def row_fields(text: str) -> list:
+    """(field, value) pairs of a row chunk ("Field: value | ..."); other text is skipped."""
+    pairs = []
+    for part in text.split(" | "):
+        match = _FIELD_RE.match(part.strip())
+        if match:
+            pairs.append(match.groups())
+    return pairs
+
+
+def field_identifiers(text: str) -> set:
+    """
+    Field-qualified identifier tokens of a row chunk,
+    e.g. {"requestid:6743", "user:user17"}; NON_IDENTIFIER_FIELDS are skipped.
+    """
+    keys = set()
+    for field, value in row_fields(text):
+        field = field_key(field)
+        if field in NON_IDENTIFIER_FIELDS:
+            continue
+        keys.update(f"{field}:{tok}" for tok in tokenize(value) if is_identifier(tok))
+    return keys
+
+
+class InvertedIndex:
+    """
+    BM25 inverted index over the same chunks as the FAISS store.
+    Postings are numpy arrays (doc positions + term frequencies), so scoring a
+    query is a handful of vectorized adds over the matching postings only.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids = []
+        self.postings = {}
+        self.doc_len = np.zeros(0, dtype=np.float32)
+        self.avgdl = 0.0
+        # "field:token" → doc positions, for exact identifier matches
+        self.field_postings = {}
+        self.identifier_fields = set()
+
+    def build(self, doc_ids: list, texts: list) -> "InvertedIndex":
+        postings, field_postings = {}, {}
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for pos, text in enumerate(texts):
+            for key in field_identifiers(text):
+                field_postings.setdefault(key, []).append(pos)
+            tokens = tokenize(text)
+            lengths[pos] = len(tokens)
+            counts = {}
+            for tok in tokens:
+                counts[tok] = counts.get(tok, 0) + 1
+            for tok, tf in counts.items():
+                postings.setdefault(tok, ([], []))
+                postings[tok][0].append(pos)
+                postings[tok][1].append(tf)
+
+        self.doc_ids = list(doc_ids)
+        self.postings = {
+            tok: (np.array(p, dtype=np.int32), np.array(tf, dtype=np.float32))
+            for tok, (p, tf) in postings.items()
+        }
+        self.field_postings = {key: np.array(p, dtype=np.int32) for key, p in field_postings.items()}
+        self.identifier_fields = {key.split(":", 1)[0] for key in self.field_postings}
+        self.doc_len = lengths
+        self.avgdl = float(lengths.mean()) if len(lengths) else 0.0
+        logger.info(f"🔤 Lexical index built: {len(self.doc_ids)} docs, {len(self.postings)} terms")
+        return self
+
+    # ----------------------------------------------------------------------
+    def search(self, query: str, k: int = FETCH_K, candidates: np.ndarray = None) -> list:
+        """
+        Top-k (doc_id, bm25_score). `candidates` optionally restricts scoring
+        to a boolean mask over documents.
+        """
+        n = len(self.doc_ids)
+        if n == 0:
+            return []
+        scores = np.zeros(n, dtype=np.float32)
+        matched = False
+        for tok in set(tokenize(query)):
+            posting = self.postings.get(tok)
+            if posting is None:
+                continue
+            matched = True
+            pos, tf = posting
+            idf = np.log(1.0 + (n - len(pos) + 0.5) / (len(pos) + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_len[pos] / self.avgdl)
+            scores[pos] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+        if not matched:
+            return []
+        if candidates is not None:
+            scores[~candidates] = 0.0
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.doc_ids[i], float(scores[i])) for i in top if scores[i] > 0]
+
+    def exact_matches(self, query: str, limit: int = TOP_K_RETRIEVAL, candidates: np.ndarray = None) -> list:
+        """
+        Doc IDs containing every identifier token of the query (request IDs,
+        user IDs, IPs) as the value of an identifier field, via posting-list
+        intersection. Empty if the query has no known identifiers or the
+        intersection is larger than `limit`.
+        """
+        lists = []
+        for tok in set(tokenize(query)):
+            if not is_identifier(tok):
+                continue
+            fields = [self.field_postings[f"{field}:{tok}"] for field in self.identifier_fields
+                      if f"{field}:{tok}" in self.field_postings]
+            if fields:
+                lists.append(np.unique(np.concatenate(fields)))
+        if not lists:
+            return []
+        hits = lists[0]
+        for other in lists[1:]:
+            hits = np.intersect1d(hits, other, assume_unique=True)
+        if candidates is not None:
+            hits = hits[candidates[hits]]
+        if len(hits) == 0 or len(hits) > limit:
+            return []
+        return [self.doc_ids[i] for i in hits]
+
+    # ----------------------------------------------------------------------
+    def save(self, folder: str):
+        with open(os.path.join(folder, LEXICAL_INDEX_FILE), "wb") as f:
+            pickle.dump(self.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, folder: str):
+        """Load a saved index, or None if the folder has none (or it predates field postings)."""
+        path = os.path.join(folder, LEXICAL_INDEX_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if "field_postings" not in state:
+            logger.info("Saved lexical index has no field postings; rebuilding.")
+            return None
+        index = cls()
+        index.__dict__.update(state)
+        return index
+
+
+def build_lexical_index(vectorstore) -> InvertedIndex:
+    """Inverted index over exactly the chunks stored in the FAISS store."""
+    doc_ids = list(vectorstore.index_to_docstore_id.values())
+    texts = [vectorstore.docstore.search(doc_id).page_content for doc_id in doc_ids]
+    return InvertedIndex().build(doc_ids, texts)
+
+
+def reciprocal_rank_fusion(rankings: list, rrf_k: int = RRF_K) -> list:
+    """Merge ranked doc-ID lists: score(d) = Σ 1 / (rrf_k + rank)."""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class HybridRetriever:
+    """
+    Lexical (BM25) + vector (FAISS) retrieval merged with reciprocal-rank fusion.
+    Rows matching every identifier in the query are returned first. Service,
+    level and time filters found in the query restrict both searches up front.
+    """
+
+    def __init__(self, vectorstore, lexical: InvertedIndex = None, metadata=None,
+                 k: int = TOP_K_RETRIEVAL, fetch_k: int = FETCH_K, rrf_k: int = RRF_K):
+        self.vectorstore = vectorstore
+        self.lexical = lexical
+        self.metadata = metadata
+        self.k = k
+        self.fetch_k = fetch_k
+        self.rrf_k = rrf_k
+        self.batcher = MicroBatcher("retrieval", self.invoke_batch)
+
+    def vector_search(self, query: str, k: int, query_vector=None, bitmap: np.ndarray = None) -> list:
+        """Top-k docstore IDs from FAISS (reuses a precomputed query vector)."""
+        if query_vector is None:
+            query_vector = self.vectorstore.embedding_function.embed_query(query)
+        return self.vector_search_batch([query_vector], k, [bitmap])[0]
+
+    def vector_search_batch(self, query_vectors: list, k: int, bitmaps: list) -> list:
+        """
+        Top-k docstore IDs for many queries. Unfiltered queries share one
+        batched index.search; filtered ones need their own selector each.
+        """
+        index = self.vectorstore.index
+        mapping = self.vectorstore.index_to_docstore_id
+        results = [None] * len(query_vectors)
+
+        unfiltered = [i for i, bitmap in enumerate(bitmaps) if bitmap is None]
+        if unfiltered:
+            vecs = np.asarray([query_vectors[i] for i in unfiltered], dtype=np.float32)
+            _, positions = index.search(vecs, k)
+            for i, row in zip(unfiltered, positions):
+                results[i] = row
+        for i, bitmap in enumerate(bitmaps):
+            if bitmap is not None:
+                vec = np.asarray(query_vectors[i], dtype=np.float32).reshape(1, -1)
+                params = filtered_search_params(index, self.metadata.selector(bitmap))
+                _, positions = index.search(vec, k, params=params)
+                results[i] = positions[0]
+
+        return [[mapping[p] for p in row if p != -1] for row in results]
+
+    def _filters(self, query: str) -> tuple:
+        """(packed bitmap, boolean mask) for the query's filters, or (None, None)."""
+        bitmap = self.metadata.select(query) if self.metadata is not None else None
+        if bitmap is not None and not bitmap.any():
+            logger.info("No rows match the query filters; searching unfiltered.")
+            bitmap = None
+        return bitmap, (self.metadata.to_mask(bitmap) if bitmap is not None else None)
+
+    def _fuse(self, query: str, vector_ids: list, mask: np.ndarray) -> list:
+        if self.lexical is None:
+            ranked = vector_ids
+        else:
+            lexical_ids = [doc_id for doc_id, _ in self.lexical.search(query, self.fetch_k, mask)]
+            exact = self.lexical.exact_matches(query, self.k, mask)
+            fused = reciprocal_rank_fusion([vector_ids, lexical_ids], self.rrf_k)
+            ranked = exact + [d for d in fused if d not in exact]
+        return [self.vectorstore.docstore.search(doc_id) for doc_id in ranked[:self.k]]
+
+    def invoke_batch(self, queries: list) -> list:
+        """
+        Retrieve for many (query, query_vector) pairs at once: missing vectors
+        are encoded in one embed_documents call and unfiltered searches run as
+        one batched FAISS search.
+        """
+        try:
+            texts = [query for query, _ in queries]
+            vectors = [vector for _, vector in queries]
+            missing = [i for i, vector in enumerate(vectors) if vector is None]
+            if missing:
+                encoded = self.vectorstore.embedding_function.embed_documents([texts[i] for i in missing])
+                for i, vector in zip(missing, encoded):
+                    vectors[i] = vector
+
+            filters = [self._filters(query) for query in texts]
+            vector_ids = self.vector_search_batch(vectors, self.fetch_k, [bitmap for bitmap, _ in filters])
+            return [self._fuse(query, ids, mask) for query, ids, (_, mask) in zip(texts, vector_ids, filters)]
+        except Exception as e:
+            logger.error(f"Hybrid retrieval failed: {e}")
+            raise CustomException("Hybrid retrieval failed", e)
+
+    def invoke(self, query: str, query_vector=None) -> list:
+        return self.invoke_batch([(query, query_vector)])[0]
+
+    async def ainvoke(self, query: str, query_vector=None) -> list:
+        """invoke() from the event loop, micro-batched with concurrent callers."""
+        return await self.batcher.submit((query, query_vector))
@@ -0,0 +1,241 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+MASKED_LOG_CSV = os.path.join("artifacts", "FINAL_DATA", "masked_logdata.csv")
+
+LEVEL_WORDS = {
+    "error": "ERROR", "errors": "ERROR",
+    "warning": "WARNING", "warnings": "WARNING", "warn": "WARNING",
+    "debug": "DEBUG",
+    "info": "INFO",
+    "fatal": "FATAL",
+}
+UNIT_TO_TIMEDELTA = {"minute": "min", "min": "min", "hour": "h", "hr": "h", "day": "D"}
+
+_PERCENTILE_RE = re.compile(r"\bp(\d{1,2}(?:\.\d+)?)\b|\b(\d{1,2}(?:\.\d+)?)(?:st|nd|rd|th)?\s*percentile")
+_LAST_N_RE = re.compile(r"\blast\s+(\d+)?\s*(minute|min|hour|hr|day)s?\b")
+_BUCKET_RE = re.compile(r"\bper\s+(minute|min|hour|hr|day)\b")
+_TIME_TAKEN_RE = r"([\d.]+)\s*(ms|s)?"
+
+
+class LogAnalyticsEngine:
+    """
+    In-memory columnar engine over the masked log CSV.
+    - Typed numpy columns: timestamp (sorted datetime64), level/service codes, TimeTaken in ms
+    - Precomputed rollups: service × level counts and sorted TimeTaken per service
+    - Exact counts, percentiles, group-bys and time-bucketed trends in milliseconds
+    Relative times ("today", "last hour") are anchored at the newest log entry.
+    """
+
+    def __init__(self, path: str = MASKED_LOG_CSV):
+        try:
+            df = pd.read_csv(path, usecols=["Timestamp", "LogLevel", "Service", "TimeTaken"])
+            df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
+            df = df.dropna(subset=["Timestamp"]).sort_values("Timestamp", kind="stable")
+
+            self.ts = df["Timestamp"].to_numpy(dtype="datetime64[ns]")
+            level = pd.Categorical(df["LogLevel"].astype(str).str.upper())
+            service = pd.Categorical(df["Service"].astype(str))
+            self.levels = list(level.categories)
+            self.services = list(service.categories)
+            self.level_codes = level.codes.astype(np.int16)
+            self.service_codes = service.codes.astype(np.int16)
+
+            parts = df["TimeTaken"].astype(str).str.extract(_TIME_TAKEN_RE)
+            value = pd.to_numeric(parts[0], errors="coerce")
+            self.time_ms = np.where(parts[1] == "s", value * 1000.0, value).astype(np.float64)
+
+            # Rollups for unfiltered-by-time questions
+            n_s, n_l = len(self.services), len(self.levels)
+            self.counts = np.bincount(
+                self.service_codes.astype(np.int64) * n_l + self.level_codes, minlength=n_s * n_l
+            ).reshape(n_s, n_l)
+            valid = ~np.isnan(self.time_ms)
+            self.sorted_time_by_service = {
+                s: np.sort(self.time_ms[valid & (self.service_codes == i)]) for i, s in enumerate(self.services)
+            }
+            self.sorted_time_all = np.sort(self.time_ms[valid])
+
+            self._service_lookup = {s.lower(): s for s in self.services}
+            logger.info(f"📊 Analytics engine loaded: {len(self.ts)} rows, "
+                        f"{n_s} services, {n_l} levels")
+        except Exception as e:
+            logger.error(f"Failed to load analytics engine: {e}")
+            raise CustomException("Analytics engine load failed", e)
+
+    # ----------------------------------------------------------------------
+    # Filtering
+    # ----------------------------------------------------------------------
+    @property
+    def latest(self) -> pd.Timestamp:
+        return pd.Timestamp(self.ts[-1])
+
+    def _row_range(self, start=None, end=None) -> slice:
+        lo = 0 if start is None else int(np.searchsorted(self.ts, np.datetime64(start), side="left"))
+        hi = len(self.ts) if end is None else int(np.searchsorted(self.ts, np.datetime64(end), side="right"))
+        return slice(lo, hi)
+
+    def _mask(self, rows: slice, services=None, levels=None) -> np.ndarray:
+        mask = np.ones(rows.stop - rows.start, dtype=bool)
+        if services:
+            codes = [self.services.index(s) for s in services]
+            mask &= np.isin(self.service_codes[rows], codes)
+        if levels:
+            codes = [self.levels.index(lv) for lv in levels if lv in self.levels]
+            mask &= np.isin(self.level_codes[rows], codes)
+        return mask
+
+    # ----------------------------------------------------------------------
+    # Aggregates
+    # ----------------------------------------------------------------------
+    def count(self, services=None, levels=None, start=None, end=None) -> int:
+        if start is None and end is None:
+            s_idx = [self.services.index(s) for s in services] if services else slice(None)
+            l_idx = [self.levels.index(lv) for lv in levels if lv in self.levels] if levels else slice(None)
+            return int(self.counts[s_idx][:, l_idx].sum())
+        rows = self._row_range(start, end)
+        return int(self._mask(rows, services, levels).sum())
+
+    def time_values(self, services=None, levels=None, start=None, end=None) -> np.ndarray:
+        """Sorted TimeTaken (ms) for the filter; uses the rollup when possible."""
+        if start is None and end is None and not levels:
+            if not services:
+                return self.sorted_time_all
+            if len(services) == 1:
+                return self.sorted_time_by_service[services[0]]
+        rows = self._row_range(start, end)
+        values = self.time_ms[rows][self._mask(rows, services, levels)]
+        return np.sort(values[~np.isnan(values)])
+
+    @staticmethod
+    def _stat(sorted_values: np.ndarray, metric: str, pct: float = None):
+        if sorted_values.size == 0:
+            return None
+        if metric == "percentile":
+            return float(np.percentile(sorted_values, pct))
+        if metric == "mean":
+            return float(sorted_values.mean())
+        if metric == "max":
+            return float(sorted_values[-1])
+        if metric == "min":
+            return float(sorted_values[0])
+        raise ValueError(f"Unknown metric {metric}")
+
+    def trend(self, bucket: str, services=None, levels=None, start=None, end=None) -> pd.Series:
+        rows = self._row_range(start, end)
+        ts = self.ts[rows][self._mask(rows, services, levels)]
+        if ts.size == 0:
+            return pd.Series(dtype=np.int64)
+        return pd.Series(1, index=pd.DatetimeIndex(ts)).resample(bucket).sum()
+
+    # ----------------------------------------------------------------------
+    # Question parsing
+    # ----------------------------------------------------------------------
+    def parse_question(self, question: str) -> dict:
+        q = question.lower()
+        spec = {"metric": "count", "percentile": None, "group_by": None,
+                "services": [], "levels": [], "start": None, "end": None, "bucket": None}
+
+        spec["services"] = [s for key, s in self._service_lookup.items() if re.search(rf"\b{re.escape(key)}\b", q)]
+        spec["levels"] = sorted({lv for word, lv in LEVEL_WORDS.items() if re.search(rf"\b{word}\b", q)})
+
+        pct = _PERCENTILE_RE.search(q)
+        if pct:
+            spec["metric"], spec["percentile"] = "percentile", float(pct.group(1) or pct.group(2))
+        elif "median" in q:
+            spec["metric"], spec["percentile"] = "percentile", 50.0
+        elif re.search(r"\b(average|avg|mean)\b", q):
+            spec["metric"] = "mean"
+        elif re.search(r"\b(max|maximum|slowest|longest)\b", q):
+            spec["metric"] = "max"
+        elif re.search(r"\b(min|minimum|fastest|shortest)\b", q):
+            spec["metric"] = "min"
+
+        bucket = _BUCKET_RE.search(q)
+        if re.search(r"\b(trend|over time|timeline|histogram)\b", q) or (bucket and spec["metric"] == "count"):
+            spec["metric"] = "trend"
+            spec["bucket"] = UNIT_TO_TIMEDELTA[bucket.group(1)] if bucket else "1min"
+
+        if re.search(r"\b(per|by|each|every|which)\s+service", q):
+            spec["group_by"] = "service"
+        elif re.search(r"\b(per|by|each|every|which)\s+(log\s*)?level", q):
+            spec["group_by"] = "level"
+
+        latest = self.latest
+        last = _LAST_N_RE.search(q)
+        if last:
+            amount = int(last.group(1) or 1)
+            spec["start"] = latest - pd.Timedelta(amount, UNIT_TO_TIMEDELTA[last.group(2)])
+        elif "today" in q:
+            spec["start"] = latest.normalize()
+        elif "yesterday" in q:
+            spec["start"] = latest.normalize() - pd.Timedelta(1, "D")
+            spec["end"] = latest.normalize() - pd.Timedelta(1, "ns")
+        return spec
+
+    # ----------------------------------------------------------------------
+    # Answering
+    # ----------------------------------------------------------------------
+    def answer(self, question: str) -> str:
+        """Exact answer to an aggregate question as plain text (for the LLM to phrase)."""
+        try:
+            spec = self.parse_question(question)
+            filters = dict(services=spec["services"] or None, levels=spec["levels"] or None,
+                           start=spec["start"], end=spec["end"])
+            scope = self._describe_scope(spec)
+
+            if spec["metric"] == "trend":
+                series = self.trend(spec["bucket"], **filters)
+                lines = [f"{ts:%Y-%m-%d %H:%M}: {int(n)}" for ts, n in series.items()]
+                return f"Log count per {spec['bucket']} for {scope}:\n" + ("\n".join(lines) or "no matching logs")
+
+            groups = self._groups(spec)
+            results = []
+            for label, group_filters in groups:
+                f = {**filters, **group_filters}
+                if spec["metric"] == "count":
+                    value = self.count(**f)
+                    results.append((label, f"{value}"))
+                else:
+                    value = self._stat(self.time_values(**f), spec["metric"], spec["percentile"])
+                    results.append((label, "n/a" if value is None else f"{value:.1f} ms"))
+
+            metric = self._describe_metric(spec)
+            if spec["group_by"]:
+                return f"{metric} by {spec['group_by']} for {scope}:\n" + "\n".join(f"- {k}: {v}" for k, v in results)
+            return f"{metric} for {scope}: {results[0][1]}"
+
+        except Exception as e:
+            logger.error(f"Analytics query failed for '{question}': {e}")
+            raise CustomException("Analytics query failed", e)
+
+    def _groups(self, spec: dict) -> list:
+        if spec["group_by"] == "service":
+            return [(s, {"services": [s]}) for s in (spec["services"] or self.services)]
+        if spec["group_by"] == "level":
+            return [(lv, {"levels": [lv]}) for lv in (spec["levels"] or self.levels)]
+        return [("all", {})]
+
+    @staticmethod
+    def _describe_metric(spec: dict) -> str:
+        if spec["metric"] == "count":
+            return "Log count"
+        if spec["metric"] == "percentile":
+            return f"p{spec['percentile']:g} TimeTaken"
+        return f"{spec['metric']} TimeTaken"
+
+    def _describe_scope(self, spec: dict) -> str:
+        parts = [
+            ", ".join(spec["levels"]) + " logs" if spec["levels"] else "all levels",
+            ", ".join(spec["services"]) if spec["services"] else "all services",
+        ]
+        start = spec["start"] or pd.Timestamp(self.ts[0])
+        end = spec["end"] or self.latest
+        parts.append(f"{start:%Y-%m-%d %H:%M:%S} → {end:%Y-%m-%d %H:%M:%S}")
+        return "; ".join(parts)
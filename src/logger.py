@@ -1,5 +1,13 @@
 import logging
+import logging.handlers
 import os
+import copy
+import json
+import zlib
+import queue
+import atexit
+import random
+import contextvars
 from datetime import datetime
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -8,14 +16,137 @@ os.makedirs(LOGS_DIR, exist_ok=True)
 
 LOG_FILE= os.path.join(LOGS_DIR,f"log_{datetime.now().strftime('%Y-%m-%d')}.log")
 
-logging.basicConfig(
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Records waiting for the writer thread; when full, new records are dropped (and counted)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fraction of requests whose DEBUG/INFO lines are kept (WARNING and above always are).
+# Applies once at least LOG_SAMPLE_MIN_QUEUE records are waiting (0 = always).
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+LOG_SAMPLE_MIN_QUEUE = int(os.getenv("LOG_SAMPLE_MIN_QUEUE", "0"))
+
+# Set per request by bot.py's middleware; copied into asyncio tasks and to_thread calls
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+log_stats = {"dropped": 0, "sampled_out": 0}
+
+
+def get_request_id():
+    return request_id_var.get()
+
+
+def set_request_id(request_id: str):
+    """Bind a request ID to the current context; returns a token for reset_request_id."""
+    return request_id_var.set(request_id)
+
+
+def reset_request_id(token):
+    request_id_var.reset(token)
+
+
+# --------------------------------------------------------------------------
+# Filters (run on the calling thread, before the record is queued)
+# --------------------------------------------------------------------------
+class RequestContextFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps DEBUG/INFO records for a LOG_SAMPLE_RATE fraction of requests.
+    The decision is per request ID, so a kept request keeps all its lines.
+    """
+
+    def __init__(self, log_queue: queue.Queue, rate: float = LOG_SAMPLE_RATE, min_queue: int = LOG_SAMPLE_MIN_QUEUE):
+        super().__init__()
+        self.log_queue = log_queue
+        self.rate = rate
+        self.min_queue = min_queue
+
+    def filter(self, record):
+        if self.rate >= 1.0 or record.levelno >= logging.WARNING:
+            return True
+        if self.log_queue.qsize() < self.min_queue:
+            return True
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            keep = zlib.crc32(request_id.encode()) % 10000 < self.rate * 10000
+        else:
+            keep = random.random() < self.rate
+        if not keep:
+            log_stats["sampled_out"] += 1
+        return keep
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the caller: drops the record when the queue is full."""
+
+    def prepare(self, record):
+        # Merge args and render the traceback here; keep the message itself free of it
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_stats["dropped"] += 1
+
+
+# --------------------------------------------------------------------------
+# JSON lines output (runs on the listener thread)
+# --------------------------------------------------------------------------
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _configure() -> logging.handlers.QueueListener:
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+
+    file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter())
+
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.addFilter(SamplingFilter(log_queue))
+
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+log_listener = _configure()
+
+
+def shutdown_logging():
+    """Write out what is still queued and stop the writer thread (safe to call twice)."""
+    if log_listener._thread is not None:
+        log_listener.stop()
+
+
+atexit.register(shutdown_logging)
 
-filename=LOG_FILE,
-format= '%(asctime)s-%(levelname)s-%(message)s',
-level=logging.INFO
-)
 
 def get_logger(name):
     logger=logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    return logger
\ No newline at end of file
+    logger.setLevel(LOG_LEVEL)
+    return logger
@@ -0,0 +1,128 @@
+import re
+import faiss
+import numpy as np
+import pandas as pd
+from src.log_analytics import LEVEL_WORDS, UNIT_TO_TIMEDELTA, _LAST_N_RE
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Fallback for stores ingested before service/level were kept as metadata
+_FIELD_RE = {
+    "service": re.compile(r"\bService: ([^|]+?)\s*(?:\||$)"),
+    "level": re.compile(r"\bLogLevel: ([^|]+?)\s*(?:\||$)"),
+    "timestamp": re.compile(r"\bTimestamp: ([^|]+?)\s*(?:\||$)"),
+}
+
+
+class MetadataIndex:
+    """
+    Structured filters over the chunks of the FAISS store, by index position.
+    - service / level: one packed bitmap per value (1 bit per vector)
+    - timestamp: positions sorted by time, range lookups via searchsorted
+    Query filters are parsed from the question; relative times ("last hour",
+    "today") are anchored at the newest log entry, like the analytics engine.
+    """
+
+    def __init__(self, vectorstore):
+        mapping = vectorstore.index_to_docstore_id
+        self.size = len(mapping)
+        values = {"service": {}, "level": {}}
+        raw_times = [None] * self.size
+
+        for pos, doc_id in mapping.items():
+            doc = vectorstore.docstore.search(doc_id)
+            for field in ("service", "level", "timestamp"):
+                value = doc.metadata.get(field)
+                if value is None:
+                    match = _FIELD_RE[field].search(doc.page_content)
+                    value = match.group(1) if match else None
+                if value is None:
+                    continue
+                if field == "timestamp":
+                    raw_times[pos] = value
+                else:
+                    key = value.upper() if field == "level" else value
+                    values[field].setdefault(key, []).append(pos)
+
+        self.bitmaps = {
+            field: {value: self._bitmap(positions) for value, positions in by_value.items()}
+            for field, by_value in values.items()
+        }
+        times = pd.to_datetime(pd.Series(raw_times, dtype=object), errors="coerce").to_numpy(dtype="datetime64[ns]")
+        valid = ~np.isnat(times)
+        self.time_order = np.flatnonzero(valid)[np.argsort(times[valid], kind="stable")]
+        self.sorted_times = times[self.time_order]
+        self._service_lookup = {s.lower(): s for s in self.bitmaps["service"]}
+        logger.info(f"🗂️ Metadata index built: {self.size} vectors, "
+                    f"{len(self.bitmaps['service'])} services, {len(self.bitmaps['level'])} levels")
+
+    def _bitmap(self, positions) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        mask[positions] = True
+        return np.packbits(mask, bitorder="little")
+
+    # ----------------------------------------------------------------------
+    def parse_filters(self, query: str) -> dict:
+        """Services, levels and time window mentioned in the query."""
+        q = query.lower()
+        filters = {
+            "services": [s for key, s in self._service_lookup.items() if re.search(rf"\b{re.escape(key)}\b", q)],
+            "levels": sorted({lv for word, lv in LEVEL_WORDS.items()
+                              if lv in self.bitmaps["level"] and re.search(rf"\b{word}\b", q)}),
+            "start": None,
+            "end": None,
+        }
+        if self.sorted_times.size:
+            latest = pd.Timestamp(self.sorted_times[-1])
+            last = _LAST_N_RE.search(q)
+            if last:
+                filters["start"] = latest - pd.Timedelta(int(last.group(1) or 1), UNIT_TO_TIMEDELTA[last.group(2)])
+            elif "today" in q:
+                filters["start"] = latest.normalize()
+            elif "yesterday" in q:
+                filters["start"] = latest.normalize() - pd.Timedelta(1, "D")
+                filters["end"] = latest.normalize() - pd.Timedelta(1, "ns")
+        return filters
+
+    def _union(self, field: str, values: list) -> np.ndarray:
+        bitmaps = [self.bitmaps[field][v] for v in values]
+        return np.bitwise_or.reduce(bitmaps) if len(bitmaps) > 1 else bitmaps[0]
+
+    def _time_bitmap(self, start, end) -> np.ndarray:
+        lo = 0 if start is None else int(np.searchsorted(self.sorted_times, np.datetime64(start), side="left"))
+        hi = len(self.sorted_times) if end is None else int(
+            np.searchsorted(self.sorted_times, np.datetime64(end), side="right"))
+        return self._bitmap(self.time_order[lo:hi])
+
+    def select(self, query: str):
+        """
+        Packed candidate bitmap for the filters in the query, or None when the
+        query has no filters. Filters on different fields are ANDed.
+        """
+        filters = self.parse_filters(query)
+        parts = []
+        if filters["services"]:
+            parts.append(self._union("service", filters["services"]))
+        if filters["levels"]:
+            parts.append(self._union("level", filters["levels"]))
+        if filters["start"] is not None or filters["end"] is not None:
+            parts.append(self._time_bitmap(filters["start"], filters["end"]))
+        if not parts:
+            return None
+        bitmap = np.bitwise_and.reduce(parts) if len(parts) > 1 else parts[0]
+        logger.info(f"🔎 Metadata filter {filters} → {self.count(bitmap)} of {self.size} candidates")
+        return bitmap
+
+    # ----------------------------------------------------------------------
+    @staticmethod
+    def count(bitmap: np.ndarray) -> int:
+        return int(np.unpackbits(bitmap).sum())
+
+    def to_mask(self, bitmap: np.ndarray) -> np.ndarray:
+        """Unpacked boolean mask over positions."""
+        return np.unpackbits(bitmap, count=self.size, bitorder="little").astype(bool)
+
+    def selector(self, bitmap: np.ndarray):
+        """FAISS IDSelector over the bitmap (the bitmap must outlive the search)."""
+        return faiss.IDSelectorBitmap(self.size, faiss.swig_ptr(bitmap))
@@ -0,0 +1,126 @@
+import time
+from contextlib import contextmanager
+from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
+from src.admission import limiters
+from src.logger import get_logger, log_listener, log_stats
+
+logger = get_logger(__name__)
+
+# Seconds; covers sub-ms cache/BM25 paths up to slow LLM and web calls
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# --------------------------------------------------------------------------
+# Metric definitions
+# --------------------------------------------------------------------------
+HTTP_LATENCY = Histogram(
+    "chatbot_http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "path", "status"], buckets=LATENCY_BUCKETS,
+)
+NODE_LATENCY = Histogram(
+    "chatbot_node_latency_seconds", "LangGraph node latency", ["node"], buckets=LATENCY_BUCKETS,
+)
+TOOL_LATENCY = Histogram(
+    "chatbot_tool_latency_seconds", "Upstream MCP tool call latency (cache misses only)",
+    ["tool"], buckets=LATENCY_BUCKETS,
+)
+RETRIEVER_LATENCY = Histogram(
+    "chatbot_retriever_latency_seconds", "Query embedding and retrieval latency",
+    ["stage"], buckets=LATENCY_BUCKETS,
+)
+LLM_LATENCY = Histogram(
+    "chatbot_llm_latency_seconds", "Groq call latency (full completion, including streaming)",
+    ["model", "purpose"], buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "chatbot_llm_tokens_total", "Groq token usage", ["model", "purpose", "kind"],
+)
+CONTEXT_TOKENS = Counter(
+    "chatbot_context_tokens_total", "Estimated RAG context tokens: retrieved candidates, un-budgeted top-k, sent to the LLM, saved",
+    ["kind"],
+)
+ERRORS = Counter(
+    "chatbot_errors_total", "Errors by component and exception type", ["component", "error"],
+)
+ROUTES = Counter(
+    "chatbot_routes_total", "Routing decisions by intent and method", ["intent", "method"],
+)
+
+
+# --------------------------------------------------------------------------
+# Recording helpers
+# --------------------------------------------------------------------------
+def record_error(component: str, error: BaseException):
+    ERRORS.labels(component=component, error=type(error).__name__).inc()
+
+
+@contextmanager
+def track(histogram: Histogram, component: str, **labels):
+    """Observe the block's duration; count an error if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        record_error(component, e)
+        raise
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - start)
+
+
+def record_route(intent: str, method: str):
+    ROUTES.labels(intent=intent, method=method).inc()
+
+
+def record_context(report: dict):
+    for kind in ("candidate", "baseline", "context"):
+        CONTEXT_TOKENS.labels(kind=kind).inc(report[f"{kind}_tokens"])
+    CONTEXT_TOKENS.labels(kind="saved").inc(report["tokens_saved"])
+
+
+def record_llm_usage(model: str, purpose: str, usage):
+    """Token counts from a Groq `usage` object (absent on some streamed responses)."""
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, kind, None)
+        if value:
+            LLM_TOKENS.labels(model=model, purpose=purpose, kind=kind.split("_")[0]).inc(value)
+
+
+# --------------------------------------------------------------------------
+# Admission control gauges, read at scrape time
+# --------------------------------------------------------------------------
+class AdmissionCollector:
+    def collect(self):
+        active = GaugeMetricFamily("chatbot_admission_active", "Calls holding a slot", labels=["limiter"])
+        queued = GaugeMetricFamily("chatbot_admission_queue_depth", "Callers waiting for a slot", labels=["limiter"])
+        shed = CounterMetricFamily("chatbot_admission_shed", "Calls rejected by admission control",
+                                   labels=["limiter", "reason"])
+        for name, limiter in limiters.items():
+            snap = limiter.snapshot()
+            active.add_metric([name], snap["active"])
+            queued.add_metric([name], snap["queue_depth"])
+            shed.add_metric([name, "queue_full"], snap["shed"])
+            shed.add_metric([name, "queue_timeout"], snap["queue_timeouts"])
+        yield active
+        yield queued
+        yield shed
+
+
+REGISTRY.register(AdmissionCollector())
+
+
+# --------------------------------------------------------------------------
+# Log pipeline (src.logger) backlog and losses
+# --------------------------------------------------------------------------
+class LogPipelineCollector:
+    def collect(self):
+        yield GaugeMetricFamily("chatbot_log_queue_depth", "Log records waiting for the writer thread",
+                                value=log_listener.queue.qsize())
+        lost = CounterMetricFamily("chatbot_log_records_skipped", "Log records not written", labels=["reason"])
+        lost.add_metric(["queue_full"], log_stats["dropped"])
+        lost.add_metric(["sampled_out"], log_stats["sampled_out"])
+        yield lost
+
+
+REGISTRY.register(LogPipelineCollector())
@@ -1,6 +1,7 @@
 import os
+from contextlib import nullcontext
 import pandas as pd
-from src.data_loader import load_all_raw_files
+from src.data_loader import iter_raw_files
 from src.PII_Masker import PIIMasker
 from src.logger import get_logger
 from src.custom_exception import CustomException
@@ -11,12 +12,28 @@ logger = get_logger(__name__)
 FINAL_DATA = os.path.join("artifacts", "FINAL_DATA")
 os.makedirs(FINAL_DATA, exist_ok=True)
 
+# Contextual (Presidio) masking on a process pool; set PRESIDIO_MASKING=false to skip
+USE_PRESIDIO = os.getenv("PRESIDIO_MASKING", "true").lower() in ("1", "true", "yes")
+# CSV columns with free text for Presidio; structured fields (Timestamp, RequestID,
+# ClientIP, ...) only get the regex pass
+PRESIDIO_COLUMNS = [c.strip() for c in os.getenv("PRESIDIO_COLUMNS", "Message").split(",") if c.strip()]
 
-def mask_dataframe(df, masker):
-    """Apply PII masking to every cell in a DataFrame."""
+
+def mask_dataframe(df, masker, use_presidio: bool = False, pool=None, max_workers: int = None,
+                   presidio_columns=PRESIDIO_COLUMNS):
+    """Regex-mask every cell in a DataFrame; Presidio only the free-text columns."""
     masked_df = df.copy()
     for col in masked_df.columns:
-        masked_df[col] = masked_df[col].astype(str).apply(lambda x: masker.mask_text(x))
+        masked_df[col] = masker.mask_many(masked_df[col].astype(str))
+
+    text_columns = [col for col in masked_df.columns if col in presidio_columns]
+    if use_presidio and text_columns:
+        # One pool run over every free-text cell, then reshape per column
+        cells = [v for col in text_columns for v in masked_df[col].tolist()]
+        masked_cells = masker.presidio_mask_parallel(cells, max_workers=max_workers, pool=pool)
+        rows = len(masked_df)
+        for i, col in enumerate(text_columns):
+            masked_df[col] = masked_cells[i * rows:(i + 1) * rows]
     return masked_df
 
 
@@ -24,27 +41,33 @@ def create_masked_final_data():
     try:
         logger.info("🚀 Starting PII masking pipeline...")
 
-        # Step 1: Load all raw data
-        docs = load_all_raw_files()
-
-        # Step 2: Initialize the PII Masker
+        # Step 1: Initialize the PII Masker (+ one Presidio pool for the whole run)
         masker = PIIMasker()
+        workers = masker.presidio_workers()
+        pool_ctx = masker.presidio_pool(workers) if USE_PRESIDIO else nullcontext()
+
+        # Step 2: Stream every raw file chunk by chunk and append masked output
+        started = set()
+        with pool_ctx as pool:
+            for file_name, chunk in iter_raw_files():
+                first = file_name not in started
+                started.add(file_name)
 
-        # Step 3: Process each file
-        for file_name, raw_text in docs:
-            input_path = os.path.join("artifacts", "RAW_DATA", file_name)
-            output_path = os.path.join(FINAL_DATA, f"masked_{file_name}")
-
-            if file_name.endswith(".csv"):
-                # Mask CSV while keeping structure
-                df = pd.read_csv(input_path)
-                masked_df = mask_dataframe(df, masker)
-                masked_df.to_csv(output_path, index=False)
-            else:
-                # Mask plain text files
-                masked_text = masker.mask_text(raw_text)
-                with open(output_path, "w", encoding="utf-8") as f:
-                    f.write(masked_text)
+                if isinstance(chunk, pd.DataFrame):
+                    # Mask CSV while keeping structure
+                    output_path = os.path.join(FINAL_DATA, f"masked_{file_name}")
+                    masked_df = mask_dataframe(chunk, masker, use_presidio=USE_PRESIDIO, pool=pool,
+                                               max_workers=workers)
+                    masked_df.to_csv(output_path, index=False, mode="w" if first else "a", header=first)
+                else:
+                    # Mask text-like files (PDF pages are written out as text)
+                    base, ext = os.path.splitext(file_name)
+                    out_name = f"masked_{file_name}" if ext.lower() != ".pdf" else f"masked_{base}.txt"
+                    output_path = os.path.join(FINAL_DATA, out_name)
+                    masked_text = masker.mask_many([chunk], use_presidio=USE_PRESIDIO, max_workers=workers,
+                                                   pool=pool)[0]
+                    with open(output_path, "w" if first else "a", encoding="utf-8") as f:
+                        f.write(masked_text)
 
         logger.info("✅ PII masking pipeline completed. Masked files saved in FINAL_DATA.")
 
@@ -0,0 +1,82 @@
+import os
+import asyncio
+import contextvars
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", "32"))
+QUERY_BATCH_WAIT_MS = float(os.getenv("QUERY_BATCH_WAIT_MS", "2"))
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent calls into one `batch_fn(items) -> results` call on a
+    worker thread.
+    - Idle: the first caller is flushed immediately (no added latency).
+    - Busy: callers arriving while a batch runs are queued and flushed together
+      (up to `max_batch`) as soon as it finishes. After a multi-item batch the
+      worker also waits `max_wait_ms` to let the next batch fill up.
+    """
+
+    def __init__(self, name: str, batch_fn, max_batch: int = QUERY_BATCH_MAX_SIZE,
+                 max_wait_ms: float = QUERY_BATCH_WAIT_MS):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._pending = []
+        self._worker = None
+        self._loop = None
+        self.stats = {"calls": 0, "batches": 0, "max_batch_seen": 0}
+
+    async def submit(self, item):
+        """Queue one item and wait for its result."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Futures belong to one event loop (see Limiter._bind_loop)
+            self._loop, self._pending, self._worker = loop, [], None
+
+        future = loop.create_future()
+        self._pending.append((item, future))
+        self.stats["calls"] += 1
+        if self._worker is None or self._worker.done():
+            # Fresh context: the worker serves many requests, so it must not log
+            # under the request ID of whichever caller happened to start it
+            self._worker = asyncio.create_task(self._drain(), context=contextvars.Context())
+        return await future
+
+    async def _drain(self):
+        last_size = 0
+        while self._pending:
+            if last_size > 1 and len(self._pending) < self.max_batch and self.max_wait_ms:
+                await asyncio.sleep(self.max_wait_ms / 1000)
+
+            batch = [(item, fut) for item, fut in self._pending[:self.max_batch] if not fut.done()]
+            del self._pending[:self.max_batch]
+            if not batch:
+                continue
+            last_size = len(batch)
+            self.stats["batches"] += 1
+            self.stats["max_batch_seen"] = max(self.stats["max_batch_seen"], last_size)
+
+            try:
+                results = await asyncio.to_thread(self.batch_fn, [item for item, _ in batch])
+            except Exception as e:
+                logger.error(f"{self.name} batch of {last_size} failed: {e}")
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            for (_, fut), result in zip(batch, results):
+                # Callers cancelled meanwhile (deadline, disconnect) just drop out
+                if not fut.done():
+                    fut.set_result(result)
+
+    def snapshot(self) -> dict:
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "avg_batch_size": round(self.stats["calls"] / batches, 2) if batches else 0.0,
+        }
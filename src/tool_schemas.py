@@ -0,0 +1,99 @@
+import json
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+# --------------------------------------------------------------------------
+# Function-calling schemas (OpenAI/Groq "tools" format) for ROUTER_MODE=tools.
+# One LLM request picks the tool and fills in its arguments.
+# --------------------------------------------------------------------------
+TOOL_SCHEMAS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "get_weather",
+            "description": "Current weather (temperature, wind) for a city or coordinates.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "city": {"type": "string", "description": "City name, e.g. 'Chennai'"},
+                    "latitude": {"type": "number"},
+                    "longitude": {"type": "number"},
+                },
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "web_search",
+            "description": "Search the web for general knowledge, news or public information.",
+            "parameters": {
+                "type": "object",
+                "properties": {"query": {"type": "string", "description": "Search engine query"}},
+                "required": ["query"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "github_code_search",
+            "description": "Find code examples, scripts or repositories on GitHub.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Keywords to search code for"},
+                    "language": {"type": "string", "description": "Programming language, default python"},
+                },
+                "required": ["query"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "log_analytics",
+            "description": "Exact counts, percentiles, averages or trends over the service logs.",
+            "parameters": {"type": "object", "properties": {"question": {"type": "string"}}},
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_logs",
+            "description": "Look up individual log entries, internal policy or documentation.",
+            "parameters": {"type": "object", "properties": {"query": {"type": "string"}}},
+        },
+    },
+]
+
+TOOL_INTENTS = {
+    "get_weather": "Weather",
+    "web_search": "Tavily",
+    "github_code_search": "GitHub",
+    "log_analytics": "Analytics",
+    "search_logs": "RAG",
+}
+
+
+def parse_tool_call(message) -> tuple:
+    """
+    (intent, arguments) from a chat completion message.
+    Falls back to ("RAG", {}) when the model did not call a known tool or
+    returned arguments that are not valid JSON.
+    """
+    calls = getattr(message, "tool_calls", None) or []
+    if not calls:
+        return "RAG", {}
+    call = calls[0].function
+    intent = TOOL_INTENTS.get(call.name)
+    if intent is None:
+        logger.warning(f"Unknown tool '{call.name}' from LLM; fallback to RAG.")
+        return "RAG", {}
+    try:
+        args = json.loads(call.arguments or "{}")
+    except json.JSONDecodeError:
+        logger.warning(f"Invalid tool arguments from LLM: {call.arguments!r}")
+        args = {}
+    return intent, args if isinstance(args, dict) else {}
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.admission import (
+    DeadlineExceeded, Limiter, OverloadedError, deadline_stats, request_deadline, time_remaining,
+)
+
+
+def test_sheds_when_queue_full():
+    async def scenario():
+        limiter = Limiter("github", concurrency=1, max_queue=1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with limiter.slot():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(OverloadedError) as info:
+            await limiter.acquire()
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return limiter, info.value
+
+    limiter, error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert error.retry_after >= 1
+    assert limiter.stats["shed"] == 1
+    assert limiter.stats["admitted"] == 2
+    assert limiter.snapshot()["active"] == 0
+    assert OverloadedError("chat", 1).status_code == 429
+
+
+def test_queue_timeout():
+    async def scenario():
+        limiter = Limiter("llm", concurrency=1, max_queue=4, queue_timeout=0.05)
+        await limiter.acquire()
+        with pytest.raises(OverloadedError):
+            await limiter.acquire()
+        queued_after_timeout = len(limiter._waiters)
+        limiter.release()
+        return limiter, queued_after_timeout
+
+    limiter, queued = asyncio.run(scenario())
+    assert limiter.stats["queue_timeouts"] == 1
+    assert queued == 0
+    assert limiter.active == 0
+
+
+def test_run_in_thread_holds_slot_until_thread_returns():
+    finish = threading.Event()
+
+    async def scenario():
+        limiter = Limiter("llm", concurrency=1, max_queue=1)
+        call = asyncio.create_task(limiter.run_in_thread(finish.wait, 5))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        # the caller gave up, but the thread is still running in the slot
+        active_after_cancel = limiter.active
+        finish.set()
+        for _ in range(100):
+            if limiter.active == 0:
+                break
+            await asyncio.sleep(0.01)
+        return active_after_cancel, limiter.active
+
+    assert asyncio.run(scenario()) == (1, 0)
+
+
+def test_run_in_thread_propagates_errors_and_releases():
+    def boom():
+        raise ValueError("boom")
+
+    async def scenario():
+        limiter = Limiter("tavily", concurrency=1, max_queue=1)
+        with pytest.raises(ValueError):
+            await limiter.run_in_thread(boom)
+        assert await limiter.run_in_thread(sum, [1, 2]) == 3
+        return limiter.active
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_request_deadline():
+    async def scenario():
+        assert time_remaining() is None
+        async with request_deadline(5):
+            assert 0 < time_remaining() <= 5
+        before = deadline_stats["deadline_exceeded"]
+        with pytest.raises(DeadlineExceeded):
+            async with request_deadline(0.01):
+                await asyncio.sleep(1)
+        assert time_remaining() is None
+        return deadline_stats["deadline_exceeded"] - before
+
+    assert asyncio.run(scenario()) == 1
@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+
+from src.answer_cache import SemanticAnswerCache, entity_tokens
+
+VECTOR = np.array([0.6, 0.8, 0.0], dtype=np.float32)
+
+
+def make_cache(tmp_path, **kwargs):
+    (tmp_path / "index.faiss").write_bytes(b"v1")
+    return SemanticAnswerCache(index_dir=str(tmp_path), **kwargs)
+
+
+def test_entity_tokens_canonicalize_levels():
+    assert entity_tokens("ERRORS in ServiceA for request 6743") == {"ERROR", "servicea", "6743"}
+    assert entity_tokens("error logs servicea, request 6743") == entity_tokens("Errors for ServiceA request 6743")
+
+
+def test_semantic_hit_needs_same_entities(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("show errors in ServiceA", "A answer", "RAG", VECTOR)
+
+    assert cache.get_similar("show errors in ServiceB", VECTOR) is None
+    assert cache.get_similar("show errors for request 6744 in ServiceA", VECTOR) is None
+    assert cache.stats["entity_mismatches"] == 2
+
+    hit = cache.get_similar("list the error entries of ServiceA", VECTOR)
+    assert hit["result"] == "A answer"
+    assert cache.stats["semantic_hits"] == 1
+
+
+def test_semantic_lookup_respects_threshold(tmp_path):
+    cache = make_cache(tmp_path, similarity_threshold=0.95)
+    cache.put("show errors in ServiceA", "A answer", "RAG", VECTOR)
+    assert cache.get_similar("show errors in ServiceA", np.array([1.0, 0.0, 0.0])) is None
+    assert cache.stats["misses"] == 1
+
+
+def test_rag_entries_invalidated_when_index_changes(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("show errors in ServiceA", "A answer", "RAG", VECTOR)
+    cache.put("weather in chennai", "sunny", "Weather", None)
+    assert cache.get("show errors in ServiceA") is not None
+
+    index_file = tmp_path / "index.faiss"
+    stat = index_file.stat()
+    os.utime(index_file, (stat.st_atime, stat.st_mtime + 10))
+
+    assert cache.get("show errors in ServiceA") is None
+    assert cache.get_similar("show errors in ServiceA", VECTOR) is None
+    assert cache.stats["invalidations"] == 1
+    assert cache.get("weather in chennai")["result"] == "sunny"
+
+
+def test_lru_eviction_and_uncacheable_sources(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.put("q1", "a1", "Tavily")
+    cache.put("q2", "a2", "Tavily")
+    cache.get("q1")
+    cache.put("q3", "a3", "Tavily")
+    cache.put("q4", "a4", "Unknown")
+
+    assert cache.get("q2") is None
+    assert cache.get("q1")["result"] == "a1"
+    assert cache.get("q4") is None
+    assert cache.stats["evictions"] == 1
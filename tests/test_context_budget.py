@@ -0,0 +1,75 @@
+from langchain_core.documents import Document
+
+from src.context_budget import (
+    CHARS_PER_TOKEN, ContextBudgeter, content_signature, estimate_tokens, strip_overlap,
+)
+from src.hybrid_retriever import TOP_K_RETRIEVAL
+
+ROW = ("Unnamed: 0: {i} | Timestamp: 2023-11-20T08:4{i}:00 | LogLevel: ERROR | Service: {service} | "
+       "Message: Database Connection Failure | RequestID: {request} | User: User17 | TimeTaken: {ms}ms")
+
+
+def row(i, request=6743, service="ServiceA", ms=12):
+    return Document(page_content=ROW.format(i=i, request=request, service=service, ms=ms),
+                    metadata={"timestamp": f"08:4{i}", "row_id": i})
+
+
+def test_defaults_match_top_k():
+    budgeter = ContextBudgeter()
+    assert budgeter.max_docs == TOP_K_RETRIEVAL
+
+
+def test_exact_duplicates_dropped():
+    doc = row(1)
+    context, report = ContextBudgeter().assemble("q", [doc, Document(page_content=doc.page_content + "  ")])
+    assert context == doc.page_content
+    assert report["exact_duplicates"] == 1
+    assert report["selected"] == 1
+
+
+def test_near_duplicates_folded_with_differences():
+    assert content_signature(row(1).page_content) == content_signature(row(2).page_content)
+    docs = [row(1), row(2), row(3, ms=79)]
+    context, report = ContextBudgeter(token_budget=1000, near_dup_threshold=0.8).assemble("q", docs)
+    assert report["near_duplicates"] == 2
+    assert report["selected"] == 1
+    assert "[+2 similar entries, 08:41 to 08:43: TimeTaken 79ms]" in context
+
+
+def test_overlapping_chunks_of_one_row_trimmed():
+    first = "Message: " + "a" * 40 + " shared overlap between chunks"
+    second = "shared overlap between chunks and the tail of the row"
+    assert strip_overlap(first, second) == "and the tail of the row"
+    assert strip_overlap(first, "unrelated text") == "unrelated text"
+
+    docs = [Document(page_content=first, metadata={"row_id": 7}),
+            Document(page_content=second, metadata={"row_id": 7})]
+    context, _ = ContextBudgeter(token_budget=1000).assemble("q", docs)
+    assert context == first + "\nand the tail of the row"
+
+
+def test_budget_and_max_docs_cut():
+    docs = [row(i, request=1000 + i, service=f"Service{i}") for i in range(6)]
+    row_tokens = estimate_tokens(docs[0].page_content)
+
+    _, report = ContextBudgeter(token_budget=2 * row_tokens, max_docs=5).assemble("q", docs)
+    assert report["selected"] == 2
+    assert report["context_tokens"] <= 2 * row_tokens
+
+    _, report = ContextBudgeter(token_budget=10_000, max_docs=3).assemble("q", docs)
+    assert report["selected"] == 3
+
+    # a first chunk larger than the whole budget is truncated, not dropped
+    context, report = ContextBudgeter(token_budget=10, max_docs=3).assemble("q", docs)
+    assert report["selected"] == 1
+    assert len(context) == 10 * CHARS_PER_TOKEN
+
+
+def test_tokens_saved_against_top_k_context():
+    docs = [row(1), row(2)] + [row(i, request=2000 + i, service=f"Service{i}") for i in range(3, 9)]
+    context, report = ContextBudgeter().assemble("q", docs)
+    baseline = estimate_tokens("\n".join(d.page_content for d in docs[:TOP_K_RETRIEVAL]))
+    assert report["baseline_tokens"] == baseline
+    assert report["candidate_tokens"] > baseline
+    assert report["tokens_saved"] == max(baseline - report["context_tokens"], 0)
+    assert report["context_tokens"] <= ContextBudgeter().token_budget
@@ -0,0 +1,43 @@
+import asyncio
+import csv
+import time
+
+import pytest
+
+from src.feedback_store import FeedbackStore, UnknownAnswerError
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_unknown_answer_rejected(tmp_path):
+    store = FeedbackStore(str(tmp_path / "feedback.csv"))
+    with pytest.raises(UnknownAnswerError):
+        store.record("missing", 1)
+
+
+def test_close_waits_for_flush_in_progress(tmp_path):
+    path = tmp_path / "feedback.csv"
+    store = FeedbackStore(str(path), flush_size=2, flush_interval_s=60)
+    write = store._write
+
+    def slow_write(batch):
+        time.sleep(0.1)
+        write(batch)
+
+    store._write = slow_write
+
+    async def scenario():
+        await store.start()
+        for rating in (1, 0, 1):
+            store.record(store.register(f"q{rating}", "RAG"), rating)
+        # the writer is now mid-flush on its worker thread
+        await asyncio.sleep(0.02)
+        await store.close()
+
+    asyncio.run(scenario())
+    assert len(read_rows(path)) == 3
+    assert store.snapshot()["pending"] == 0
+    assert store.stats["written"] == 3
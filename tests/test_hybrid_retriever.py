@@ -0,0 +1,80 @@
+import pickle
+
+import numpy as np
+
+from src.hybrid_retriever import (
+    LEXICAL_INDEX_FILE, HybridRetriever, InvertedIndex, field_identifiers,
+)
+
+ROWS = {
+    "d0": "Unnamed: 0: 6743 | Timestamp: 2024-01-01 10:00:00 | RequestID: 1001 | User: user17 | Message: timeout",
+    "d1": "Unnamed: 0: 1 | Timestamp: 2024-01-01 10:01:00 | RequestID: 6743 | User: user42 | Message: login ok",
+    "d2": "Unnamed: 0: 2 | Timestamp: 2024-01-01 10:02:00 | RequestID: 1002 | User: user17 | Message: retry",
+    "d3": "Unnamed: 0: 3 | Timestamp: 2024-01-01 10:03:00 | RequestID: 1003 | IP: 10.0.0.5 | Message: denied",
+}
+
+
+def make_index():
+    return InvertedIndex().build(list(ROWS), list(ROWS.values()))
+
+
+def test_field_identifiers_skip_row_index_and_timestamp():
+    keys = field_identifiers(ROWS["d0"])
+    assert keys == {"requestid:1001", "user:user17"}
+    assert field_identifiers(ROWS["d3"]) == {"requestid:1003", "ip:10.0.0.5"}
+
+
+def test_row_index_does_not_collide_with_request_id():
+    index = make_index()
+    # 6743 is d0's row index but d1's request ID
+    assert index.exact_matches("what happened to request 6743?") == ["d1"]
+
+
+def test_identifiers_intersect_across_fields():
+    index = make_index()
+    assert sorted(index.exact_matches("user17")) == ["d0", "d2"]
+    assert index.exact_matches("user17 request 1002") == ["d2"]
+    assert index.exact_matches("user42 request 1002") == []
+    assert index.exact_matches("requests from 10.0.0.5") == ["d3"]
+
+
+def test_exact_matches_limit_and_candidates():
+    index = make_index()
+    assert index.exact_matches("user17", limit=1) == []
+    candidates = np.array([False, False, True, False])
+    assert index.exact_matches("user17", candidates=candidates) == ["d2"]
+    assert index.exact_matches("no identifiers here") == []
+
+
+def test_load_rejects_index_without_field_postings(tmp_path):
+    index = make_index()
+    index.save(str(tmp_path))
+    loaded = InvertedIndex.load(str(tmp_path))
+    assert loaded.exact_matches("request 6743") == ["d1"]
+
+    state = dict(index.__dict__)
+    del state["field_postings"], state["identifier_fields"]
+    with open(tmp_path / LEXICAL_INDEX_FILE, "wb") as f:
+        pickle.dump(state, f)
+    assert InvertedIndex.load(str(tmp_path)) is None
+
+
+class FakeDoc:
+    def __init__(self, doc_id):
+        self.doc_id = doc_id
+
+
+class FakeDocstore:
+    def search(self, doc_id):
+        return FakeDoc(doc_id)
+
+
+class FakeVectorstore:
+    docstore = FakeDocstore()
+
+
+def test_exact_match_ranked_first():
+    retriever = HybridRetriever(FakeVectorstore(), lexical=make_index(), k=2)
+    # the vector search ranks the row-index collision (d0) on top
+    docs = retriever._fuse("request 6743", ["d0", "d2", "d1"], None)
+    assert [doc.doc_id for doc in docs] == ["d1", "d0"]
@@ -0,0 +1,62 @@
+import random
+import re
+
+import pandas as pd
+import pytest
+
+from src.regex_masker import RegexMaskEngine, REGEX_PATTERNS
+
+LEGACY_PATTERNS = {
+    name: re.compile(p.replace("(?i:", "(?:"), re.IGNORECASE if name == "pan" else 0)
+    for name, p in REGEX_PATTERNS.items()
+}
+
+
+def legacy_regex_mask(text: str) -> str:
+    """PIIMasker.regex_mask before the engine: one search + sub per pattern, in order."""
+    for pii_type, pattern in LEGACY_PATTERNS.items():
+        if pattern.search(text):
+            text = pattern.sub(f"[{pii_type.upper()}_MASKED]", text)
+    return text
+
+
+EDGE_CASES = [
+    "1234 9876543210",                                # card start before a phone
+    "9876543210 1234",
+    "call +91 9876543210 or 919876543210",
+    "card 4111 1111 1111 1111 and 4111-1111-1111-1111",
+    "aadhaar 1234 5678 9012 next to 9876543210",
+    "1234 5678 9012 3456 7890",
+    "mail john.doe99@example.com or 9876543210@corp.in",
+    "PAN abcde1234f and ABCDE1234F",
+    "12345678901234567890",
+    "RequestID: 6743 | ClientIP: 192.168.1.102 | TimeTaken: 28ms",
+    "no pii here",
+    "",
+]
+
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_engine_matches_legacy_on_edge_cases(text):
+    assert RegexMaskEngine().mask(text) == legacy_regex_mask(text)
+
+
+def test_higher_priority_pattern_wins_overlap():
+    assert RegexMaskEngine().mask("1234 9876543210") == "1234 [PHONE_MASKED]"
+
+
+def test_engine_matches_legacy_on_random_mixes():
+    rng = random.Random(7)
+    pieces = ["9876543210", "1234", "5678 9012", "4111-1111", "a@b.co", "+91 ", "ABCDE1234F",
+              " ", "-", "x", "|", "0", "99"]
+    engine = RegexMaskEngine()
+    for _ in range(2000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 10)))
+        assert engine.mask(text) == legacy_regex_mask(text), text
+
+
+def test_mask_many_keeps_series_shape():
+    series = pd.Series(["user@example.com", "ok", "user@example.com"], index=[3, 4, 5], name="Message")
+    masked = RegexMaskEngine().mask_many(series)
+    assert masked.tolist() == ["[EMAIL_MASKED]", "ok", "[EMAIL_MASKED]"]
+    assert list(masked.index) == [3, 4, 5] and masked.name == "Message"
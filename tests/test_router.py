@@ -0,0 +1,42 @@
+import asyncio
+import zlib
+
+import numpy as np
+
+from src import chatbot
+from src.chatbot import SemanticRouter
+
+
+class HashingEmbeddings:
+    """Bag-of-words vectors: identical texts embed identically, no model needed."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        vector = np.zeros(64, dtype=np.float32)
+        for word in text.lower().split():
+            vector[zlib.crc32(word.encode()) % 64] += 1.0
+        return vector
+
+
+def test_exemplar_match_routes_without_llm():
+    router = SemanticRouter(HashingEmbeddings(), None)
+    query = "what is the weather today"
+    intent, confidence, method = asyncio.run(
+        router.classify_intent(query, HashingEmbeddings().embed_query(query))
+    )
+    assert (intent, method) == ("Weather", "embedding")
+    assert confidence >= chatbot.INTENT_CONFIDENCE_THRESHOLD
+    assert router.stats["embedding"] == 1
+
+
+def test_missing_exemplars_counted_apart_from_missing_llm(monkeypatch):
+    monkeypatch.setattr(chatbot, "client", None)
+    router = SemanticRouter(None, None)
+
+    intent, confidence, method = asyncio.run(router.classify_intent("show the error logs"))
+
+    assert (intent, confidence, method) == ("RAG", None, "llm")
+    assert router.stats["embedding_unavailable"] == 1
+    assert router.stats["llm_unavailable"] == 0
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from src import MCP_tools
+from src.MCP_tools import ToolResultCache
+
+
+class Upstream:
+    """Counts calls; each call waits `delay` seconds, then returns (or raises)."""
+
+    def __init__(self, delay=0.05, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def fetch(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return f"value-{self.calls}"
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(MCP_tools.time, "time", lambda: now[0])
+    cache = ToolResultCache({"weather": 60})
+    cache.put("weather", "chennai", "sunny")
+
+    now[0] += 59
+    assert cache.peek("weather", "chennai") == "sunny"
+    now[0] += 2
+    assert cache.peek("weather", "chennai") is None
+
+
+def test_lru_eviction():
+    cache = ToolResultCache({"github": 60}, max_entries=2)
+    cache.put("github", "a", 1)
+    cache.put("github", "b", 2)
+    cache.peek("github", "a")
+    cache.put("github", "c", 3)
+
+    assert cache.peek("github", "b") is None
+    assert cache.peek("github", "a") == 1
+    assert cache.stats["evictions"] == 1
+
+
+def test_concurrent_calls_share_one_fetch():
+    cache = ToolResultCache({"tavily": 60})
+    upstream = Upstream()
+
+    async def run():
+        results = await asyncio.gather(*[cache.get_or_call("tavily", "k8s", upstream.fetch) for _ in range(5)])
+        cached = await cache.get_or_call("tavily", "k8s", upstream.fetch)
+        return results, cached
+
+    results, cached = asyncio.run(run())
+    assert results == ["value-1"] * 5
+    assert cached == "value-1"
+    assert upstream.calls == 1
+    assert cache.stats == {"hits": 1, "misses": 1, "coalesced": 4, "evictions": 0}
+
+
+def test_failures_reach_every_waiter_and_are_not_cached():
+    cache = ToolResultCache({"tavily": 60})
+    upstream = Upstream(error=RuntimeError("upstream down"))
+
+    async def run():
+        return await asyncio.gather(
+            *[cache.get_or_call("tavily", "k8s", upstream.fetch) for _ in range(3)], return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert upstream.calls == 1
+    assert cache.peek("tavily", "k8s") is None
+    assert cache.snapshot()["inflight"] == 0
+
+
+def test_cancelled_leader_hands_over_to_a_follower():
+    cache = ToolResultCache({"tavily": 60})
+    upstream = Upstream()
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_call("tavily", "k8s", upstream.fetch))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(cache.get_or_call("tavily", "k8s", upstream.fetch)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    results = asyncio.run(run())
+    # One follower became the new leader; the others coalesced onto its fetch
+    assert results == ["value-2"] * 3
+    assert upstream.calls == 2
+    assert cache.peek("tavily", "k8s") == "value-2"